@@ -1,23 +1,64 @@
-from PyQt5.QtWidgets import QApplication, QDialogButtonBox, QDialogButtonBox, QMainWindow, QTabWidget, QWidget, QVBoxLayout, QFormLayout, QLabel, QLineEdit, QPushButton, QDateEdit, QTableWidget, QTableWidgetItem, QComboBox, QMessageBox, QDialog, QGroupBox, QHBoxLayout, QRadioButton, QCheckBox, QDialogButtonBox
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication, QDialogButtonBox, QDialogButtonBox, QMainWindow, QTabWidget, QWidget, QVBoxLayout, QFormLayout, QLabel, QLineEdit, QPushButton, QDateEdit, QTableWidget, QTableWidgetItem, QTableView, QAbstractItemView, QFileDialog, QComboBox, QListWidget, QListWidgetItem, QMessageBox, QDialog, QProgressBar, QGroupBox, QHBoxLayout, QRadioButton, QCheckBox, QDialogButtonBox, QInputDialog
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal, pyqtSlot
 from PyQt5 import QtWidgets
-from sqlalchemy import create_engine, Column, Integer, String, Date, ForeignKey
+import sqlalchemy
+from sqlalchemy import bindparam, case, event, func, or_, cast, select, create_engine, Column, Integer, String, Date, DateTime, ForeignKey, Float, Index, tuple_, text, column
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError, OperationalError
 from sqlalchemy.orm import declarative_base, sessionmaker
-from datetime import datetime
+from sqlalchemy.pool import QueuePool
+from bisect import bisect_left
+from collections import Counter, OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime
+from functools import wraps
+from itertools import compress, islice, repeat
+from urllib.parse import parse_qs, urlsplit
+from array import array
+import argparse
+import asyncio
+import csv
+import gzip
+import json
+import os
+import platform
+import random
+import re
+import sqlite3
+import statistics
+import subprocess
+import sys
+import threading
+import unicodedata
+import time
 
 Base = declarative_base()
 
 class Book(Base):
     __tablename__ = 'books'
     id = Column(Integer, primary_key=True)
-    isbn = Column(String)
+    isbn = Column(String, unique=True, index=True)
     title = Column(String)
     author = Column(String)
     publisher = Column(String)
     publication_year = Column(Integer)
     page_count = Column(Integer)
     genre = Column(String)
-    status = Column(String)
+    status = Column(String, index=True)
+    loan_count = Column(Integer, nullable=False, default=0, server_default='0', index=True)
+    # Kopya sayaçları ödünç/iade ile aynı işlemde güncellenir; durum (status) bunlardan türetilir.
+    total_copies = Column(Integer, nullable=False, default=0, server_default='0')
+    available_copies = Column(Integer, nullable=False, default=0, server_default='0', index=True)
+
+class Copy(Base):
+    __tablename__ = 'copies'
+    __table_args__ = (
+        Index('ix_copies_book_id_status', 'book_id', 'status'),
+    )
+    id = Column(Integer, primary_key=True)
+    book_id = Column(Integer, ForeignKey('books.id'), nullable=False)
+    status = Column(String, nullable=False, default='Mevcut')
 
 class Member(Base):
     __tablename__ = 'members'
@@ -27,68 +68,3329 @@ class Member(Base):
     registration_date = Column(Date)
     contact_info = Column(String)
 
-class Lending(Base):
-    __tablename__ = 'lendings'
-    id = Column(Integer, primary_key=True)
-    book_id = Column(Integer, ForeignKey('books.id'))
-    member_id = Column(Integer, ForeignKey('members.id'))
-    lending_date = Column(Date)
-    return_date = Column(Date)
-    returned = Column(Integer, default=0)
+class Lending(Base):
+    __tablename__ = 'lendings'
+    __table_args__ = (
+        Index('ix_lendings_book_id_returned', 'book_id', 'returned'),
+        Index('ix_lendings_member_id_returned', 'member_id', 'returned'),
+        Index('ix_lendings_returned_return_date', 'returned', 'return_date'),
+    )
+    id = Column(Integer, primary_key=True)
+    book_id = Column(Integer, ForeignKey('books.id'))
+    copy_id = Column(Integer, ForeignKey('copies.id'), index=True)
+    member_id = Column(Integer, ForeignKey('members.id'))
+    lending_date = Column(Date)
+    return_date = Column(Date, index=True)
+    returned = Column(Integer, default=0, index=True)
+    returned_on = Column(Date)
+
+class LendingHistory(Base):
+    # İadesi üzerinden ARCHIVE_AFTER_DAYS geçmiş ödünçler buraya taşınır; sıcak 'lendings' tablosu
+    # açık ve yeni kapanmış ödünçlerle sınırlı kalır. Kimlikler (id) korunur.
+    __tablename__ = 'lending_history'
+    __table_args__ = (
+        Index('ix_lending_history_book_id', 'book_id'),
+        Index('ix_lending_history_member_id', 'member_id'),
+        Index('ix_lending_history_lending_date', 'lending_date'),
+        Index('ix_lending_history_return_date', 'return_date'),
+    )
+    id = Column(Integer, primary_key=True)
+    book_id = Column(Integer, ForeignKey('books.id'))
+    copy_id = Column(Integer, ForeignKey('copies.id'))
+    member_id = Column(Integer, ForeignKey('members.id'))
+    lending_date = Column(Date)
+    return_date = Column(Date)
+    returned = Column(Integer, default=1)
+    returned_on = Column(Date)
+    archived_at = Column(Date)
+
+class Hold(Base):
+    # Kitap başına ayırtma sırası: önce öncelik (küçük olan önce), sonra sıraya giriş (id). Bekleyen ilk ayırtma
+    # (book_id, status, priority, id) dizininde tek aramayla bulunur. İade edilen kopya aynı işlemde sıradakine ayrılır.
+    __tablename__ = 'holds'
+    __table_args__ = (
+        Index('ix_holds_queue', 'book_id', 'status', 'priority', 'id'),
+        Index('ix_holds_member_id_status', 'member_id', 'status'),
+        Index('ix_holds_active_member_book', 'member_id', 'book_id', unique=True,
+              sqlite_where=text("status IN ('Bekliyor', 'Ayrıldı')")),
+    )
+    id = Column(Integer, primary_key=True)
+    book_id = Column(Integer, ForeignKey('books.id'), nullable=False)
+    member_id = Column(Integer, ForeignKey('members.id'), nullable=False)
+    priority = Column(Integer, nullable=False, default=1)
+    status = Column(String, nullable=False, default='Bekliyor')
+    placed_at = Column(DateTime)
+    copy_id = Column(Integer, ForeignKey('copies.id'), index=True)
+    assigned_on = Column(Date)
+    closed_on = Column(Date)
+
+class Notice(Base):
+    # Gecikme ve yaklaşan teslim bildirimleri için giden kutusu; her ödünç için her türden tek bildirim yazılır.
+    # Gönderici (e-posta/SMS) süreç bekleyenleri sent_at boş olanlardan okur.
+    __tablename__ = 'notices'
+    __table_args__ = (
+        Index('ix_notices_lending_id_kind', 'lending_id', 'kind', unique=True),
+        Index('ix_notices_sent_at', 'sent_at'),
+    )
+    id = Column(Integer, primary_key=True)
+    lending_id = Column(Integer, ForeignKey('lendings.id'), nullable=False)
+    kind = Column(String, nullable=False)
+    member_id = Column(Integer, ForeignKey('members.id'))
+    book_id = Column(Integer, ForeignKey('books.id'))
+    contact_info = Column(String)
+    subject = Column(String)
+    body = Column(String)
+    return_date = Column(Date)
+    created_on = Column(Date)
+    sent_at = Column(DateTime)
+
+LENDING_COLUMNS = ["id", "book_id", "copy_id", "member_id", "lending_date", "return_date", "returned", "returned_on"]
+
+class CirculationRollup(Base):
+    # Günlük ödünç/iade/gecikme toplamları (üye boyutunda aylık); panolar ham ödünç tablolarını taramadan buradan okur.
+    # Birincil anahtar sırası rapor aralığıyla aynıdır; WITHOUT ROWID ile satırlar bu sırada kümelenir.
+    __tablename__ = 'circulation_daily'
+    __table_args__ = {"sqlite_with_rowid": False}
+    dimension = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+    key = Column(String, primary_key=True)
+    loans = Column(Integer, nullable=False, default=0)
+    returns = Column(Integer, nullable=False, default=0)
+    overdues = Column(Integer, nullable=False, default=0)
+
+class RollupState(Base):
+    # lendings: özetlere işlenmiş en büyük ödünç kimliği; overdues: gecikmeleri sayılmış son günün sıra numarası.
+    __tablename__ = 'rollup_state'
+    name = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False)
+
+class SchemaVersion(Base):
+    __tablename__ = 'schema_version'
+    version = Column(Integer, primary_key=True)
+    description = Column(String)
+    applied_at = Column(DateTime)
+
+DATABASE_URL = "sqlite:///library.db"
+STATS_TOP_K = 10
+
+# Birden fazla iş istasyonu aynı dosyayı açtığında okuyucular yazarı beklemesin diye WAL kullanılır.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -65536,
+    "mmap_size": 268435456,
+    "busy_timeout": 5000,
+    "temp_store": "MEMORY",
+}
+POOL_SIZE = 8
+ENTITY_CACHE_SIZE = 4096
+ENTITY_CACHE_TTL = 60
+SEARCH_DEBOUNCE_MS = 200
+SEARCH_LIVE_LIMIT = 50
+SEARCH_CACHE_SIZE = 256
+SEARCH_CACHE_TTL = 30
+SEARCH_RANKED_LIMIT = 1000
+FUZZY_CANDIDATES = 200
+FUZZY_THRESHOLD = 0.3
+WRITE_RETRIES = 5
+WRITE_RETRY_DELAY = 0.05
+HOLD_PRIORITIES = {"Premium": 0, "Standart": 1}
+HOLD_ACTIVE = ('Bekliyor', 'Ayrıldı')
+ARCHIVE_AFTER_DAYS = 30
+ARCHIVE_BATCH_SIZE = 10000
+ARCHIVE_INTERVAL_MS = 60 * 60 * 1000
+ARCHIVE_START_DELAY_MS = 10 * 1000
+ROLLUP_INTERVAL_MS = 60 * 60 * 1000
+ROLLUP_BATCH_SIZE = 250000
+NOTICE_BATCH_SIZE = 5000
+SNAPSHOT_BATCH_SIZE = 50000
+NOTICE_DUE_DAYS = 2
+STATS_REPORT_LIMIT = 100
+ROLLUP_DIMENSIONS = {"genre": "Tür", "publisher": "Yayınevi", "membership_type": "Üyelik Tipi", "member": "Üye"}
+
+BOOK_SEARCH_INDEX_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+        title, author, publisher, genre,
+        content='books', content_rowid='id', tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts(rowid, title, author, publisher, genre)
+        VALUES (new.id, new.title, new.author, new.publisher, new.genre);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, author, publisher, genre)
+        VALUES ('delete', old.id, old.title, old.author, old.publisher, old.genre);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE OF title, author, publisher, genre ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, author, publisher, genre)
+        VALUES ('delete', old.id, old.title, old.author, old.publisher, old.genre);
+        INSERT INTO books_fts(rowid, title, author, publisher, genre)
+        VALUES (new.id, new.title, new.author, new.publisher, new.genre);
+    END""",
+]
+
+# Tetikleyiciler yalnızca yerleşik SQL kullanır; kitap tablosuna her SQLite istemcisi (sqlite3 kabuğu, başka
+# süreçler) yazabilir. Türkçe harfler replace() zinciriyle katlanır, kalan büyük/küçük harf ve aksan farklarını
+# dizinlerin tokenizer'ı giderir. Arama tarafı aynı tabloyu kullanır (trigram_fold).
+FOLD_LETTERS = {"İ": "i", "ı": "i", "Ş": "s", "ş": "s", "Ç": "c", "ç": "c", "Ğ": "g", "ğ": "g", "Ö": "o", "ö": "o",
+                "Ü": "u", "ü": "u", "Â": "a", "â": "a", "Î": "i", "î": "i", "Û": "u", "û": "u"}
+
+def sql_fold(expression):
+    for letter, folded in FOLD_LETTERS.items():
+        expression = f"replace({expression}, '{letter}', '{folded}')"
+    return expression
+
+def folded_index_rows(prefix, command=None):
+    fts_columns = ", ".join(sql_fold(f"{prefix}{name}") for name in ("title", "author", "publisher", "genre"))
+    name = sql_fold(f"COALESCE({prefix}title, '') || ' ' || COALESCE({prefix}author, '')")
+    if command is None:
+        return f"""INSERT INTO books_fts(rowid, title, author, publisher, genre) VALUES ({prefix}id, {fts_columns});
+        INSERT INTO books_trigram(rowid, name) VALUES ({prefix}id, {name});"""
+    return f"""INSERT INTO books_fts(books_fts, rowid, title, author, publisher, genre)
+        VALUES ('{command}', {prefix}id, {fts_columns});
+        INSERT INTO books_trigram(books_trigram, rowid, name) VALUES ('{command}', {prefix}id, {name});"""
+
+# Türkçeye duyarlı katlanmış metin üzerinde kurulan dizinler: kelime dizini ve bulanık arama için trigram dizini.
+FOLDED_SEARCH_INDEX_DDL = [
+    "DROP TRIGGER IF EXISTS books_fts_ai",
+    "DROP TRIGGER IF EXISTS books_fts_ad",
+    "DROP TRIGGER IF EXISTS books_fts_au",
+    "DROP TABLE IF EXISTS books_fts",
+    "DROP TABLE IF EXISTS books_trigram",
+    """CREATE VIRTUAL TABLE books_fts USING fts5(
+        title, author, publisher, genre, content='', tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE VIRTUAL TABLE books_trigram USING fts5(name, content='', tokenize='trigram')""",
+    f"""CREATE TRIGGER books_fts_ai AFTER INSERT ON books BEGIN
+        {folded_index_rows("new.")}
+    END""",
+    f"""CREATE TRIGGER books_fts_ad AFTER DELETE ON books BEGIN
+        {folded_index_rows("old.", "delete")}
+    END""",
+    f"""CREATE TRIGGER books_fts_au AFTER UPDATE OF title, author, publisher, genre ON books BEGIN
+        {folded_index_rows("old.", "delete")}
+        {folded_index_rows("new.")}
+    END""",
+    f"""INSERT INTO books_fts(rowid, title, author, publisher, genre)
+        SELECT id, {", ".join(sql_fold(name) for name in ("title", "author", "publisher", "genre"))} FROM books""",
+    f"""INSERT INTO books_trigram(rowid, name)
+        SELECT id, {sql_fold("COALESCE(title, '') || ' ' || COALESCE(author, '')")} FROM books""",
+]
+
+class MigrationError(Exception):
+    pass
+
+class LibraryError(Exception):
+    pass
+
+class NotFoundError(LibraryError):
+    pass
+
+def migrate_book_search_index(connection):
+    exists = connection.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'")).first()
+    for statement in BOOK_SEARCH_INDEX_DDL:
+        connection.execute(text(statement))
+    if not exists:
+        connection.execute(text("INSERT INTO books_fts(books_fts) VALUES ('rebuild')"))
+
+LOOKUP_INDEX_DDL = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_books_isbn ON books (isbn)",
+    "CREATE INDEX IF NOT EXISTS ix_books_status ON books (status)",
+    "CREATE INDEX IF NOT EXISTS ix_lendings_book_id_returned ON lendings (book_id, returned)",
+    "CREATE INDEX IF NOT EXISTS ix_lendings_member_id_returned ON lendings (member_id, returned)",
+    "CREATE INDEX IF NOT EXISTS ix_lendings_return_date ON lendings (return_date)",
+    "CREATE INDEX IF NOT EXISTS ix_lendings_returned ON lendings (returned)",
+]
+
+def migrate_lookup_indexes(connection):
+    duplicates = connection.execute(text(
+        "SELECT isbn FROM books WHERE isbn IS NOT NULL GROUP BY isbn HAVING COUNT(*) > 1 LIMIT 20")).scalars().all()
+    if duplicates:
+        raise MigrationError("Aynı ISBN numarasına sahip birden fazla kitap var, benzersiz ISBN kısıtı eklenemedi: "
+                             + ", ".join(duplicates))
+    for statement in LOOKUP_INDEX_DDL:
+        connection.execute(text(statement))
+    connection.execute(text("ANALYZE"))
+
+def migrate_loan_counters(connection):
+    columns = [row[1] for row in connection.execute(text("PRAGMA table_info(books)"))]
+    if 'loan_count' not in columns:
+        connection.execute(text("ALTER TABLE books ADD COLUMN loan_count INTEGER NOT NULL DEFAULT 0"))
+    connection.execute(text(
+        "UPDATE books SET loan_count = (SELECT COUNT(*) FROM lendings WHERE lendings.book_id = books.id)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_books_loan_count ON books (loan_count)"))
+
+def migrate_overdue_index(connection):
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_lendings_returned_return_date ON lendings (returned, return_date)"))
+
+DEFAULT_BOOKS = [
+    dict(isbn='123456789', title='Example Book 1', author='John Doe', publisher='Publisher A',
+         publication_year=2020, page_count=200, genre='Fiction', status='Mevcut', loan_count=0),
+    dict(isbn='987654321', title='Example Book 2', author='Jane Smith', publisher='Publisher B',
+         publication_year=2018, page_count=250, genre='Science', status='Mevcut', loan_count=0),
+]
+DEFAULT_MEMBERS = [
+    dict(full_name='Alice Brown', membership_type='Standart', contact_info='alice@example.com'),
+    dict(full_name='Bob Green', membership_type='Premium', contact_info='bob@example.com'),
+]
+
+def seed_default_data(connection):
+    # Örnek kayıtlar yalnızca boş tablolara eklenir. Göç olarak bir kez çalışır; sonraki açılışlarda sorgu yapılmaz.
+    if connection.execute(select(Book.id).limit(1)).first() is None:
+        connection.execute(Book.__table__.insert(), DEFAULT_BOOKS)
+    if connection.execute(select(Member.id).limit(1)).first() is None:
+        connection.execute(Member.__table__.insert(),
+                           [dict(member, registration_date=date.today()) for member in DEFAULT_MEMBERS])
+
+def backfill_copies(connection, after_id=0):
+    # Kopyası olmayan her kitaba (eski tek nüsha modeli, toplu içe aktarma) durumuyla tek kopya açılır.
+    connection.execute(text(
+        "INSERT INTO copies (book_id, status) SELECT id, COALESCE(status, 'Mevcut') FROM books "
+        "WHERE id > :after AND NOT EXISTS (SELECT 1 FROM copies WHERE copies.book_id = books.id)"), {"after": after_id})
+    connection.execute(text(
+        "UPDATE books SET total_copies = 1, available_copies = (COALESCE(status, 'Mevcut') = 'Mevcut') "
+        "WHERE id > :after AND total_copies = 0"), {"after": after_id})
+
+def migrate_copies(connection):
+    book_columns = [row[1] for row in connection.execute(text("PRAGMA table_info(books)"))]
+    for name in ("total_copies", "available_copies"):
+        if name not in book_columns:
+            connection.execute(text(f"ALTER TABLE books ADD COLUMN {name} INTEGER NOT NULL DEFAULT 0"))
+    lending_columns = [row[1] for row in connection.execute(text("PRAGMA table_info(lendings)"))]
+    if 'copy_id' not in lending_columns:
+        connection.execute(text("ALTER TABLE lendings ADD COLUMN copy_id INTEGER REFERENCES copies (id)"))
+    backfill_copies(connection)
+    connection.execute(text(
+        "UPDATE lendings SET copy_id = (SELECT MIN(id) FROM copies WHERE copies.book_id = lendings.book_id) "
+        "WHERE copy_id IS NULL"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_lendings_copy_id ON lendings (copy_id)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_books_available_copies ON books (available_copies)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_copies_book_id_status ON copies (book_id, status)"))
+    connection.execute(text("ANALYZE"))
+
+def create_all_lendings_view(connection):
+    # Görünüm, iki tabloda da bulunan sütunlarla (eski sürümden yükseltirken) yeniden kurulur.
+    present = [{row[1] for row in connection.execute(text(f"PRAGMA table_info({table})"))}
+               for table in ("lendings", "lending_history")]
+    columns = ", ".join(name for name in LENDING_COLUMNS if all(name in names for names in present))
+    connection.execute(text("DROP VIEW IF EXISTS all_lendings"))
+    connection.execute(text(f"CREATE VIEW all_lendings AS SELECT {columns} FROM lendings "
+                            f"UNION ALL SELECT {columns} FROM lending_history"))
+
+def migrate_lending_history(connection):
+    # Tablonun kendisini create_all kurar; harici raporlar için iki tabloyu birleştiren görünüm eklenir.
+    LendingHistory.__table__.create(connection, checkfirst=True)
+    create_all_lendings_view(connection)
+
+def migrate_holds(connection):
+    Hold.__table__.create(connection, checkfirst=True)
+
+def migrate_notices(connection):
+    Notice.__table__.create(connection, checkfirst=True)
+
+def migrate_folded_search_index(connection):
+    for statement in FOLDED_SEARCH_INDEX_DDL:
+        connection.execute(text(statement))
+
+def migrate_rollups(connection):
+    for table in ("lendings", "lending_history"):
+        columns = [row[1] for row in connection.execute(text(f"PRAGMA table_info({table})"))]
+        if 'returned_on' not in columns:
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN returned_on DATE"))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_lending_history_return_date ON lending_history (return_date)"))
+    create_all_lendings_view(connection)
+    # Mevcut geçmiş ilk toplama çalışmasında işlenir; bugüne kadarki gecikmeler de o sırada sayılır.
+    connection.execute(RollupState.__table__.delete())
+    connection.execute(RollupState.__table__.insert(), [dict(name="lendings", value=0),
+                                                       dict(name="overdues", value=date.today().toordinal())])
+
+# Sıralı şema adımları; uygulanan her sürüm schema_version tablosuna yazılır. Yeni adımlar sona eklenir.
+MIGRATIONS = [
+    (1, "books_fts tam metin dizini", migrate_book_search_index),
+    (2, "ISBN, durum ve ödünç sorguları için dizinler", migrate_lookup_indexes),
+    (3, "kitap başına ödünç sayaçları", migrate_loan_counters),
+    (4, "gecikmiş ödünçler için (returned, return_date) dizini", migrate_overdue_index),
+    (5, "boş veritabanına örnek kitap ve üyeler", seed_default_data),
+    (6, "kopya (nüsha) tablosu ve kitap başına mevcut/toplam sayaçları", migrate_copies),
+    (7, "iade edilmiş ödünçler için lending_history arşivi ve all_lendings görünümü", migrate_lending_history),
+    (8, "günlük ödünç/iade/gecikme özet tabloları ve iade tarihi", migrate_rollups),
+    (9, "Türkçe katlamalı kelime dizini ve bulanık arama için trigram dizini", migrate_folded_search_index),
+    (10, "kitap başına ayırtma (rezervasyon) sırası", migrate_holds),
+    (11, "gecikme bildirimleri giden kutusu", migrate_notices),
+]
+
+def schema_version(engine):
+    with engine.connect() as connection:
+        try:
+            return connection.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+        except OperationalError:
+            return 0
+
+def run_migrations(engine):
+    # Güncel şemada tek sorguyla döner; create_all ve göçler yalnızca eksik sürüm varsa çalışır.
+    current = schema_version(engine)
+    if current >= MIGRATIONS[-1][0]:
+        return current
+    Base.metadata.create_all(engine)
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        with engine.begin() as connection:
+            migrate(connection)
+            connection.execute(SchemaVersion.__table__.insert().values(
+                version=version, description=description, applied_at=datetime.now()))
+    return MIGRATIONS[-1][0]
+
+def make_engine(database_url=DATABASE_URL, pool_size=POOL_SIZE, pragmas=None, profiled=False):
+    if not database_url.startswith("sqlite"):
+        return create_engine(database_url, pool_size=pool_size)
+    settings = dict(SQLITE_PRAGMAS, **(pragmas or {}))
+    in_memory = database_url in ("sqlite://", "sqlite:///:memory:")
+    connect_args = {"check_same_thread": False}
+    if profiled:
+        # Satır sayan imleç yalnızca tanılama sekmesi olan arayüzde kurulur; CLI ve HTTP düz sqlite3 kullanır.
+        connect_args["factory"] = ProfiledConnection
+    if in_memory:
+        settings.pop("journal_mode")
+        engine = create_engine(database_url, connect_args=connect_args)
+    else:
+        engine = create_engine(database_url, poolclass=QueuePool, pool_size=pool_size, max_overflow=pool_size,
+                               pool_timeout=settings["busy_timeout"] / 1000,
+                               connect_args=dict(connect_args, timeout=settings["busy_timeout"] / 1000))
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in settings.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return engine
+
+N_PLUS_ONE_THRESHOLD = 10
+LATENCY_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+profile_state = threading.local()
+
+class ProfiledCursor(sqlite3.Cursor):
+    # Okunan satırları o an açık olan eyleme yazar; eylem yoksa maliyeti tek bir öznitelik okumasıdır.
+    def count(self, rows):
+        frames = getattr(profile_state, "frames", None)
+        if frames:
+            frames[-1].rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        return self.count(super().fetchall())
+
+    def fetchmany(self, *args):
+        return self.count(super().fetchmany(*args))
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            self.count((row,))
+        return row
+
+class ProfiledConnection(sqlite3.Connection):
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+class LatencyHistogram:
+    def __init__(self, bounds=LATENCY_BOUNDS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, milliseconds):
+        self.counts[bisect_left(self.bounds, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        self.max = max(self.max, milliseconds)
+
+    def percentile(self, fraction):
+        # Kova sınırına yuvarlanmış yaklaşık değer; son kovada gözlenen en büyük değer döner.
+        target = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if count and seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        labels = [f"<={bound}" for bound in self.bounds] + [f">{self.bounds[-1]}"]
+        return {"count": self.count, "total_ms": round(self.total, 3), "max_ms": round(self.max, 3),
+                "p50_ms": round(self.percentile(0.5), 3), "p95_ms": round(self.percentile(0.95), 3),
+                "buckets": {label: count for label, count in zip(labels, self.counts) if count}}
+
+class ActionFrame:
+    __slots__ = ("name", "started", "queries", "sql_time", "rows", "statements", "query_started")
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.rows = 0
+        self.statements = Counter()
+        self.query_started = None
+
+class ActionStats:
+    def __init__(self):
+        self.calls = 0
+        self.queries = 0
+        self.rows = 0
+        self.latency = LatencyHistogram()
+        self.sql = LatencyHistogram()
+        self.populate = LatencyHistogram()
+
+    def to_dict(self):
+        return {"calls": self.calls, "queries": self.queries, "rows": self.rows,
+                "queries_per_call": round(self.queries / self.calls, 2) if self.calls else 0,
+                "latency": self.latency.to_dict(), "sql": self.sql.to_dict(), "populate": self.populate.to_dict()}
+
+class QueryProfiler:
+    # Eylem başına sorgu sayısı, SQL süresi, okunan satır ve ekran doldurma süresini histogramlarla tutar.
+    # İç içe eylemler dıştakine eklenir. Aynı SELECT bir eylemde eşik kadar tekrarlanırsa N+1 olarak işaretlenir.
+    def __init__(self, engine=None, n_plus_one_threshold=N_PLUS_ONE_THRESHOLD):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.findings = {}
+        self.startup = []
+        self.caches = {}
+        if engine is not None:
+            self.attach(engine)
+
+    def attach(self, engine):
+        event.listen(engine, "before_cursor_execute", self.before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self.after_cursor_execute)
+
+    @staticmethod
+    def current():
+        frames = getattr(profile_state, "frames", None)
+        return frames[-1] if frames else None
+
+    def before_cursor_execute(self, connection, cursor, statement, parameters, context, executemany):
+        frame = self.current()
+        if frame is not None:
+            frame.query_started = time.perf_counter()
+
+    def after_cursor_execute(self, connection, cursor, statement, parameters, context, executemany):
+        frame = self.current()
+        if frame is None or frame.query_started is None:
+            return
+        frame.sql_time += time.perf_counter() - frame.query_started
+        frame.query_started = None
+        frame.queries += 1
+        if not executemany and statement.lstrip()[:6].upper() == "SELECT":
+            frame.statements[statement] += 1
+
+    def stats_for(self, name):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = ActionStats()
+        return stats
+
+    @contextmanager
+    def action(self, name):
+        frames = profile_state.__dict__.setdefault("frames", [])
+        frame = ActionFrame(name)
+        frames.append(frame)
+        try:
+            yield frame
+        finally:
+            frames.pop()
+            self.record(frame, time.perf_counter() - frame.started)
+            if frames:
+                parent = frames[-1]
+                parent.queries += frame.queries
+                parent.sql_time += frame.sql_time
+                parent.rows += frame.rows
+                parent.statements.update(frame.statements)
+
+    @contextmanager
+    def populating(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            with self.lock:
+                self.stats_for(name).populate.add(elapsed)
+
+    def record(self, frame, elapsed):
+        with self.lock:
+            stats = self.stats_for(frame.name)
+            stats.calls += 1
+            stats.queries += frame.queries
+            stats.rows += frame.rows
+            stats.latency.add(elapsed * 1000)
+            stats.sql.add(frame.sql_time * 1000)
+            for statement, count in frame.statements.items():
+                if count < self.n_plus_one_threshold:
+                    continue
+                finding = self.findings.setdefault((frame.name, statement), {
+                    "action": frame.name, "statement": " ".join(statement.split()), "occurrences": 0,
+                    "max_repeats": 0})
+                finding["occurrences"] += 1
+                finding["max_repeats"] = max(finding["max_repeats"], count)
+                finding["last_seen"] = datetime.now().isoformat(timespec="seconds")
+
+    def reset(self):
+        with self.lock:
+            self.stats.clear()
+            self.findings.clear()
+
+    def snapshot(self):
+        with self.lock:
+            return {"generated_at": datetime.now().isoformat(timespec="seconds"),
+                    "startup": dict(self.startup),
+                    "caches": {name: stats() for name, stats in self.caches.items()},
+                    "n_plus_one_threshold": self.n_plus_one_threshold,
+                    "actions": {name: stats.to_dict() for name, stats in sorted(self.stats.items())},
+                    "n_plus_one": sorted((dict(finding) for finding in self.findings.values()),
+                                         key=lambda finding: -finding["max_repeats"])}
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as target:
+            json.dump(self.snapshot(), target, indent=2, ensure_ascii=False)
+
+def instrumented(method):
+    # Arayüz yuvalarını (slot) profil eylemi olarak sarar; sinyallerin ek argümanları yok sayılır.
+    @wraps(method)
+    def wrapper(self, *args):
+        with self.profiler.action(method.__name__):
+            return method(self)
+    return wrapper
+
+def is_busy_error(error):
+    message = str(getattr(error, "orig", error)).lower()
+    return isinstance(error, OperationalError) and ("locked" in message or "busy" in message)
+
+def retry_on_busy(operation):
+    # Yazma çakışmasında işlem geri alınır ve artan beklemeyle baştan denenir; her deneme yeni oturum açar.
+    @wraps(operation)
+    def wrapper(*args, **kwargs):
+        for attempt in range(WRITE_RETRIES):
+            try:
+                return operation(*args, **kwargs)
+            except OperationalError as e:
+                if not is_busy_error(e) or attempt == WRITE_RETRIES - 1:
+                    raise
+                time.sleep(WRITE_RETRY_DELAY * 2 ** attempt)
+    return wrapper
+
+ListView = namedtuple("ListView", ["columns", "headers", "criteria"])
+
+def nullable_key(column, default=""):
+    # Keyset sayfalama NULL anahtarla çalışmaz (SQL'de satır karşılaştırması NULL döner, Python'da TypeError);
+    # boş değerler sıralanabilir bir varsayılana çevrilir. Tarihler ISO metni olarak aynı sırada karşılaştırılır.
+    expression = cast(column, String) if isinstance(column.type, Date) else column
+    return func.coalesce(expression, default).label(column.key)
+
+LIST_VIEWS = {
+    "books": ListView([Book.id, nullable_key(Book.isbn), nullable_key(Book.title), nullable_key(Book.author),
+                       nullable_key(Book.publisher), nullable_key(Book.publication_year, 0),
+                       nullable_key(Book.page_count, 0), nullable_key(Book.genre), nullable_key(Book.status),
+                       Book.available_copies, Book.total_copies],
+                      ['ID', 'ISBN', 'Kitap Adı', 'Yazar', 'Yayınevi', 'Basım Yılı', 'Sayfa Sayısı', 'Tür', 'Durum',
+                       'Mevcut Kopya', 'Toplam Kopya'],
+                      []),
+    "members": ListView([Member.id, nullable_key(Member.full_name), nullable_key(Member.membership_type),
+                         nullable_key(Member.registration_date), nullable_key(Member.contact_info)],
+                        ['ID', 'Ad Soyad', 'Üyelik Türü', 'Kayıt Tarihi', 'İletişim Bilgileri'],
+                        []),
+    "lendings": ListView([Lending.id, nullable_key(Lending.book_id, 0), nullable_key(Lending.member_id, 0),
+                          nullable_key(Lending.lending_date), nullable_key(Lending.return_date),
+                          nullable_key(Lending.returned, 0)],
+                         ["ID", "Kitap ID", "Üye ID", "Ödünç Tarihi", "Teslim Tarihi", "Durum"],
+                         [Lending.returned == False]),
+}
+
+HOT_QUERIES = [
+    ("ISBN ile kitap", "SELECT id FROM books WHERE isbn = :isbn", {"isbn": ""}),
+    ("Duruma göre kitaplar", "SELECT id FROM books WHERE status = :status", {"status": "Mevcut"}),
+    ("Müsait olmayan kitaplar", "SELECT id FROM books WHERE available_copies = 0", {}),
+    ("Kitabın müsait kopyası", "SELECT id FROM copies WHERE book_id = :id AND status = 'Mevcut' LIMIT 1", {"id": 0}),
+    ("Kitabın açık ödünçleri", "SELECT id FROM lendings WHERE book_id = :id AND returned = 0", {"id": 0}),
+    ("Üyenin açık ödünçleri", "SELECT id FROM lendings WHERE member_id = :id AND returned = 0", {"id": 0}),
+    ("Teslim tarihi geçenler", "SELECT id FROM lendings WHERE return_date < :today", {"today": "1970-01-01"}),
+    ("Açık ödünç listesi", "SELECT id FROM lendings WHERE returned = 0 ORDER BY id", {}),
+    ("Gecikmiş ödünçler", "SELECT id FROM lendings WHERE returned = 0 AND return_date < :today "
+                          "ORDER BY return_date, id", {"today": "1970-01-01"}),
+    ("Bildirimi yazılmamış ödünçler", "SELECT id FROM lendings WHERE returned = 0 AND return_date < :today AND NOT "
+                                      "EXISTS (SELECT 1 FROM notices WHERE notices.lending_id = lendings.id AND "
+                                      "notices.kind = 'Gecikme') ORDER BY return_date, id", {"today": "1970-01-01"}),
+    ("Arşivlenecek ödünçler", "SELECT id FROM lendings WHERE returned = 1 AND return_date < :cutoff "
+                              "ORDER BY id LIMIT 10000", {"cutoff": "1970-01-01"}),
+    ("Kitabın ödünç geçmişi", "SELECT id FROM lending_history WHERE book_id = :id", {"id": 0}),
+    ("Üyenin ödünç geçmişi", "SELECT id FROM lending_history WHERE member_id = :id", {"id": 0}),
+    ("Sıradaki ayırtma", "SELECT id FROM holds WHERE book_id = :id AND status = 'Bekliyor' "
+                         "ORDER BY priority, id LIMIT 1", {"id": 0}),
+    ("Üyenin ayırtmaları", "SELECT id FROM holds WHERE member_id = :id AND status = 'Ayrıldı'", {"id": 0}),
+    ("Kopyaya ayrılan ayırtma", "SELECT id FROM holds WHERE copy_id = :id", {"id": 0}),
+]
+
+def check_query_plans(engine, queries=HOT_QUERIES):
+    full_scans = []
+    with engine.connect() as connection:
+        for name, sql, params in queries:
+            for row in connection.execute(text("EXPLAIN QUERY PLAN " + sql), params):
+                detail = row[-1]
+                if detail.startswith("SCAN") and "VIRTUAL TABLE" not in detail:
+                    full_scans.append((name, detail))
+    return full_scans
+
+def build_match_query(search_term):
+    # Her kelime önek olarak aranır: "sef sav" -> "sef"* "sav"*
+    tokens = re.findall(r"\w+", search_term)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+def availability_criterion(status):
+    # Müsaitlik kopya sayacından okunur; ödünç tablosuna bakılmaz.
+    return Book.available_copies > 0 if status == "Mevcut" else Book.available_copies == 0
+
+def search_catalog(session, search_term, status="Tüm Kitaplar", limit=None, fuzzy=True):
+    query = session.query(Book)
+    if status != "Tüm Kitaplar":
+        query = query.filter(availability_criterion(status))
+    match = build_match_query(normalize_search_term(search_term))
+    if match is None:
+        return query.order_by(Book.id).limit(limit).all()
+    ranked = text("SELECT rowid, bm25(books_fts) AS rank FROM books_fts WHERE books_fts MATCH :match") \
+        .bindparams(match=match).columns(column("rowid", Integer), column("rank", Float)).subquery("ranked")
+    books = query.join(ranked, ranked.c.rowid == Book.id).order_by(ranked.c.rank, Book.id).limit(limit).all()
+    if books or not fuzzy:
+        return books
+    # Kelime/önek eşleşmesi yoksa yazım hatası olabilir: trigram benzerliğine göre sıralı yakın sonuçlar döner.
+    return fuzzy_search(session, search_term, status, limit)
+
+def trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def fuzzy_score(term, value):
+    # Her arama kelimesinin metindeki en benzer kelimeyle trigram (Jaccard) benzerliği; kelimelerin ortalaması.
+    words = [trigrams(word) for word in normalize_search_term(value).split()]
+    tokens = [trigrams(token) for token in term.split()]
+    if not tokens or not words:
+        return 0.0
+    return sum(max(len(token & word) / len(token | word) for word in words) for token in tokens) / len(tokens)
+
+def build_trigram_query(term):
+    grams = sorted({term[i:i + 3] for i in range(len(term) - 2)})
+    return " OR ".join(f'"{gram}"' for gram in grams) or None
+
+def fuzzy_search(session, search_term, status="Tüm Kitaplar", limit=None):
+    # Aday kümesini trigram dizini (bm25) seçer; yalnızca FUZZY_CANDIDATES aday Python'da yeniden puanlanır.
+    term = normalize_search_term(search_term)
+    match = build_trigram_query(trigram_fold(search_term))
+    if match is None:
+        return []
+    candidates = text("SELECT rowid FROM books_trigram WHERE books_trigram MATCH :match ORDER BY rank LIMIT :count") \
+        .bindparams(match=match, count=FUZZY_CANDIDATES).columns(column("rowid", Integer)).subquery("candidates")
+    query = session.query(Book).join(candidates, candidates.c.rowid == Book.id)
+    if status != "Tüm Kitaplar":
+        query = query.filter(availability_criterion(status))
+    scored = sorted(((fuzzy_score(term, f"{book.title or ''} {book.author or ''}"), book.id, book)
+                     for book in query), key=lambda item: (-item[0], item[1]))
+    return [book for score, _, book in scored if score >= FUZZY_THRESHOLD][:limit]
+
+TURKISH_I = str.maketrans({"İ": "i", "I": "i", "ı": "i"})
+
+def fold_text(value):
+    # Türkçe İ/I/ı/i tek harf sayılır ("IŞIK", "ışık", "isik" aynı anahtara iner); diğer aksanlar atılır.
+    decomposed = unicodedata.normalize("NFKD", value.translate(TURKISH_I).casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+def normalize_search_term(search_term):
+    return " ".join(re.findall(r"\w+", fold_text(search_term)))
+
+def trigram_fold(search_term):
+    # Trigram dizinine yazılan metinle aynı katlama: yalnızca FOLD_LETTERS ve büyük/küçük harf.
+    return " ".join(re.findall(r"\w+", "".join(FOLD_LETTERS.get(char, char) for char in search_term).lower()))
+
+class SearchCache:
+    # (normalleştirilmiş terim, durum, sınır) anahtarlı LRU. Değişen kitap bir girdinin sonucundaysa ya da yeni
+    # hâliyle o aramaya uyuyorsa yalnızca o girdi silinir. Başka süreçlerin yazdıkları TTL dolunca görülür.
+    def __init__(self, capacity=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(search_term, status, limit):
+        return normalize_search_term(search_term), status, limit
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            self.entries.pop(key, None)
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, books, version):
+        # Sorgu sürerken bir geçersiz kılma olduysa sonuç eski olabilir; önbelleğe yazılmaz.
+        if version != self.version:
+            return
+        self.entries[key] = (time.monotonic(), books, frozenset(book.id for book in books))
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    @staticmethod
+    def matches(key, book):
+        term, status, _ = key
+        if status != "Tüm Kitaplar" and book.status != status:
+            return False
+        words = re.findall(r"\w+", fold_text(" ".join([book.title or "", book.author or "", book.publisher or "",
+                                                        book.genre or ""])))
+        return all(any(word.startswith(token) for word in words) for token in term.split()) or \
+            fuzzy_score(term, f"{book.title or ''} {book.author or ''}") >= FUZZY_THRESHOLD
+
+    def invalidate(self, book_ids, books):
+        self.version += 1
+        changed = set(book_ids)
+        for key in [key for key, (_, _, ids) in self.entries.items()
+                    if ids & changed or any(self.matches(key, book) for book in books)]:
+            del self.entries[key]
+
+    def clear(self):
+        self.version += 1
+        self.entries.clear()
+
+class CirculationStats:
+    # Sıralamalar books.loan_count dizini üzerinden okunur; maliyet ödünç sayısına değil K'ya bağlıdır.
+    def __init__(self, session):
+        self.session = session
+
+    def most_borrowed(self, limit=10):
+        return self.session.query(Book.id, Book.title, Book.loan_count) \
+            .order_by(Book.loan_count.desc(), Book.id.desc()).limit(limit).all()
+
+    def least_borrowed(self, limit=10):
+        return self.session.query(Book.id, Book.title, Book.loan_count) \
+            .order_by(Book.loan_count, Book.id).limit(limit).all()
+
+CatalogRow = namedtuple("CatalogRow", ["key", "books", "copies", "available", "loans", "open_loans", "overdue"])
+
+class ValueCodes:
+    # Sözlük kodlama: her farklı metin bir kez saklanır, sütunda yalnızca kodu tutulur. 0 boş değerdir.
+    def __init__(self):
+        self.values = [""]
+        self.codes = {"": 0}
+
+    def encode(self, value):
+        value = value or ""
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+class CatalogSnapshot:
+    # Katalog ve ödünç olaylarının sütunsal bellek kopyası. Her alan ayrı bir array'dir; tür, yayınevi ve durum
+    # sözlükle kodlanır (kitap başına ~50 bayt). Filtre ve sayımlar compress/map/Counter ile C döngülerinde çalışır,
+    # ORM nesnesi kurulmaz. (boyut, durum) başına kitap/kopya/ödünç toplamları yazmalarla birlikte artımlı tutulur;
+    # gruplamalar bu toplamlardan okunur. İlk kullanımda yüklenir; uygulama içi yazmalar ChangeTracker'dan işaretlenir,
+    # sonraki okumada yalnızca işaretli ve yeni eklenen satırlar okunur. Başka süreçlerin güncellemeleri reload ile alınır.
+    # Kitap sütunlarının 0. satırı, kataloğda olmayan kitaba ait ödünçler için boş gözcü satırdır.
+    book_columns = {"genre": "I", "publisher": "I", "status": "B", "publication_year": "i", "page_count": "i",
+                    "loan_count": "i", "total_copies": "i", "available_copies": "i"}
+    encoded = ("genre", "publisher", "status")
+    book_select = ("SELECT id, genre, publisher, status, COALESCE(publication_year, 0), COALESCE(page_count, 0), "
+                   "loan_count, total_copies, available_copies FROM books")
+    # julianday - 1721424.5 Python'daki date.toordinal() değeridir; tarih dönüşümü SQLite içinde yapılır.
+    lending_select = ("SELECT id, COALESCE(book_id, 0), "
+                      "COALESCE(CAST(julianday(lending_date) - 1721424.5 AS INTEGER), 0), "
+                      "COALESCE(CAST(julianday(return_date) - 1721424.5 AS INTEGER), 0), COALESCE(returned, 0) "
+                      "FROM all_lendings")
+    # Açık ödünç maskesi iade bayraklarının tersidir (0 -> 1); bytes.translate ile C'de çevrilir, ayrı küme tutulmaz.
+    open_flags = bytes([1]) + bytes(255)
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.books_loaded = False
+        self.lendings_loaded = False
+        self.stale_books = set()
+        self.stale_lendings = set()
+
+    def invalidate(self, changes):
+        with self.lock:
+            for entity, entity_id in changes:
+                if entity is Book:
+                    self.stale_books.add(entity_id)
+                elif entity is Lending:
+                    self.stale_lendings.add(entity_id)
+
+    def reload(self):
+        with self.lock:
+            self.books_loaded = self.lendings_loaded = False
+
+    @contextmanager
+    def current(self, session, lendings=False):
+        with self.lock:
+            connection = session.connection()
+            if self.books_loaded:
+                self.refresh_books(connection)
+            if not self.books_loaded:
+                self.load_books(connection)
+            if lendings and self.lendings_loaded:
+                self.refresh_lendings(connection)
+            if lendings and not self.lendings_loaded:
+                self.load_lendings(connection)
+            yield self
+
+    @staticmethod
+    def fetch_chunks(connection, sql, parameters=()):
+        # Milyonlarca satırda SQLAlchemy satır işleme baskın çıktığından sürücü imleci doğrudan okunur.
+        cursor = connection.connection.cursor()
+        try:
+            cursor.execute(sql, parameters)
+            while True:
+                rows = cursor.fetchmany(SNAPSHOT_BATCH_SIZE)
+                if not rows:
+                    return
+                yield rows
+        finally:
+            cursor.close()
+
+    def fetch_ids(self, connection, sql, ids):
+        ids = sorted(ids)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            for rows in self.fetch_chunks(connection, f"{sql} WHERE id IN ({', '.join('?' * len(chunk))})",
+                                          tuple(chunk)):
+                yield from rows
+
+    def load_books(self, connection):
+        self.stale_books = set()
+        self.ids = array("q", [0])
+        self.alive = bytearray(1)
+        self.columns = {name: array(typecode, [0]) for name, typecode in self.book_columns.items()}
+        self.columns["lendings"] = array("i", [0])
+        self.dictionaries = {name: ValueCodes() for name in self.encoded}
+        # İlk yükleme sütun sütun yapılır: parça devrik alınır (zip) ve her array tek extend ile büyür.
+        for rows in self.fetch_chunks(connection, self.book_select + " ORDER BY id"):
+            ids, *values = zip(*rows)
+            self.ids.extend(ids)
+            self.alive.extend(repeat(1, len(ids)))
+            self.columns["lendings"].extend(repeat(0, len(ids)))
+            for name, chunk in zip(self.book_columns, values):
+                if name in self.dictionaries:
+                    chunk = map(self.dictionaries[name].encode, chunk)
+                self.columns[name].extend(chunk)
+        self.totals = {dimension: {} for dimension in self.encoded}
+        for position in compress(range(len(self.ids)), self.alive):
+            self.tally(position, 1)
+        self.books_loaded = True
+        self.lendings_loaded = False
+
+    def tally(self, position, sign, lendings=None):
+        # (boyut kodu, durum kodu) -> [kitap, kopya, müsait kopya, ödünç]
+        columns = self.columns
+        if lendings is None:
+            values = (sign, sign * columns["total_copies"][position], sign * columns["available_copies"][position],
+                      sign * columns["lendings"][position])
+        else:
+            values = (0, 0, 0, lendings)
+        status = columns["status"][position]
+        for dimension, totals in self.totals.items():
+            key = (columns[dimension][position], status)
+            counts = totals.get(key)
+            if counts is None:
+                counts = totals[key] = [0, 0, 0, 0]
+            for index, value in enumerate(values):
+                counts[index] += value
+
+    def book_row(self, book_id):
+        position = bisect_left(self.ids, book_id)
+        return position if position < len(self.ids) and self.ids[position] == book_id else None
+
+    def put_book(self, row):
+        book_id = row[0]
+        values = [self.dictionaries[name].encode(value) if name in self.dictionaries else value
+                  for name, value in zip(self.book_columns, row[1:])]
+        position = self.book_row(book_id)
+        if position is None and book_id < self.ids[-1]:
+            # Kimlikler artan sırada eklenir; araya giren bir kimlik satır numaralarını kaydırır, tümü yeniden yüklenir.
+            self.books_loaded = self.lendings_loaded = False
+            return
+        if position is None:
+            position = len(self.ids)
+            self.ids.append(book_id)
+            self.alive.append(1)
+            self.columns["lendings"].append(0)
+            for name, value in zip(self.book_columns, values):
+                self.columns[name].append(value)
+        else:
+            if self.alive[position]:
+                self.tally(position, -1)
+            self.alive[position] = 1
+            for name, value in zip(self.book_columns, values):
+                self.columns[name][position] = value
+        self.tally(position, 1)
+
+    def drop_book(self, book_id):
+        position = self.book_row(book_id)
+        if position is not None and self.alive[position]:
+            self.tally(position, -1)
+            self.alive[position] = 0
+
+    def refresh_books(self, connection):
+        stale, self.stale_books = self.stale_books, set()
+        last = self.ids[-1]
+        found = set()
+        for row in self.fetch_ids(connection, self.book_select, [book_id for book_id in stale if book_id <= last]):
+            self.put_book(row)
+            found.add(row[0])
+        for book_id in stale - found:
+            self.drop_book(book_id)
+        for rows in self.fetch_chunks(connection, self.book_select + " WHERE id > ? ORDER BY id", (last,)):
+            for row in rows:
+                self.put_book(row)
+
+    def load_lendings(self, connection):
+        self.stale_lendings = set()
+        self.lending_ids = array("q")
+        self.lending_books = array("i")
+        self.lending_days = array("i")
+        self.return_days = array("i")
+        self.returned = bytearray()
+        book_rows = dict(zip(self.ids, range(len(self.ids))))
+        per_book = Counter()
+        for rows in self.fetch_chunks(connection, self.lending_select + " ORDER BY id"):
+            ids, book_ids, lending_days, return_days, returned = zip(*rows)
+            rows = array("i", map(book_rows.get, book_ids, repeat(0)))
+            self.lending_ids.extend(ids)
+            self.lending_books.extend(rows)
+            self.lending_days.extend(lending_days)
+            self.return_days.extend(return_days)
+            self.returned.extend(map(bool, returned))
+            per_book.update(rows)
+        counts = self.columns["lendings"]
+        for position in range(len(counts)):
+            lendings = per_book[position] - counts[position]
+            if lendings:
+                counts[position] += lendings
+                if self.alive[position]:
+                    self.tally(position, 1, lendings)
+        self.lendings_loaded = True
+
+    def put_lending(self, row):
+        lending_id, book_id, lending_day, return_day, returned = row
+        position = bisect_left(self.lending_ids, lending_id)
+        if position == len(self.lending_ids):
+            book_row = self.book_row(book_id) or 0
+            self.lending_ids.append(lending_id)
+            self.lending_books.append(book_row)
+            self.lending_days.append(lending_day)
+            self.return_days.append(return_day)
+            self.returned.append(1 if returned else 0)
+            self.columns["lendings"][book_row] += 1
+            if self.alive[book_row]:
+                self.tally(book_row, 1, 1)
+        elif self.lending_ids[position] == lending_id:
+            self.lending_days[position] = lending_day
+            self.return_days[position] = return_day
+            self.returned[position] = 1 if returned else 0
+        else:
+            self.lendings_loaded = False
+
+    def refresh_lendings(self, connection):
+        stale, self.stale_lendings = self.stale_lendings, set()
+        last = self.lending_ids[-1] if self.lending_ids else 0
+        for row in self.fetch_ids(connection, self.lending_select,
+                                  [lending_id for lending_id in stale if lending_id <= last]):
+            self.put_lending(row)
+        for rows in self.fetch_chunks(connection, self.lending_select + " WHERE id > ? ORDER BY id", (last,)):
+            for row in rows:
+                self.put_lending(row)
+
+    def code(self, name, value):
+        return self.dictionaries[name].codes.get(value or "") if name in self.dictionaries else value
+
+    def rows(self, **criteria):
+        # Her ölçüt önceki adımın satırlarını daraltır; ilk ölçüt bütün sütunu tek geçişte tarar.
+        rows = None
+        for name, value in criteria.items():
+            if value is None:
+                continue
+            column = self.columns[name]
+            code = self.code(name, value)
+            if code is None:
+                return []
+            if rows is None:
+                rows = list(compress(range(len(column)), map(code.__eq__, column)))
+            else:
+                rows = list(compress(rows, map(code.__eq__, map(column.__getitem__, rows))))
+        if rows is None:
+            return list(compress(range(len(self.alive)), self.alive))
+        return list(compress(rows, map(self.alive.__getitem__, rows)))
+
+    def book_ids(self, **criteria):
+        return list(map(self.ids.__getitem__, self.rows(**criteria)))
+
+    def count(self, **criteria):
+        return len(self.rows(**criteria))
+
+    def count_by(self, dimension, **criteria):
+        values = self.dictionaries[dimension].values
+        counts = Counter(map(self.columns[dimension].__getitem__, self.rows(**criteria)))
+        return {values[code]: count for code, count in counts.items()}
+
+    def lendings_per_book(self):
+        counts = self.columns["lendings"]
+        return {self.ids[row]: counts[row] for row in compress(range(1, len(counts)), islice(counts, 1, None))}
+
+    def breakdown(self, dimension, today, date_from=None, date_to=None, limit=None, status=None):
+        # Kitap, kopya ve ödünç sayıları artımlı toplamlardan, açık/gecikmiş ödünçler iade bayraklarından okunur.
+        # Tarih aralığı verilirse ödünçler olay sütunlarından sayılır (bütün ödünçler üzerinde tek geçiş).
+        keys = self.columns[dimension]
+        status_code = self.code("status", status) if status is not None else None
+        if status is not None and status_code is None:
+            return []
+        totals = {}
+        for (key, key_status), counts in self.totals[dimension].items():
+            if status_code is None or key_status == status_code:
+                merged = totals.setdefault(key, [0, 0, 0, 0])
+                for index, value in enumerate(counts):
+                    merged[index] += value
+        selected = self.alive if status_code is None else \
+            bytes(map(min, self.alive, map(status_code.__eq__, self.columns["status"])))
+
+        def count_lendings(positions):
+            book_rows = list(map(self.lending_books.__getitem__, positions))
+            return Counter(map(keys.__getitem__, compress(book_rows, map(selected.__getitem__, book_rows))))
+
+        if date_from is not None or date_to is not None:
+            days = range(date_from.toordinal() if date_from else 0, (date_to or date.max).toordinal() + 1)
+            loans = count_lendings(compress(range(len(self.lending_days)), map(days.__contains__, self.lending_days)))
+        else:
+            loans = {key: counts[3] for key, counts in totals.items()}
+        open_positions = list(compress(range(len(self.returned)), self.returned.translate(self.open_flags)))
+        open_loans = count_lendings(open_positions)
+        overdue = count_lendings(compress(open_positions, map(today.toordinal().__gt__,
+                                                              map(self.return_days.__getitem__, open_positions))))
+        values = self.dictionaries[dimension].values
+        rows = [CatalogRow(values[key], books, copies, available, loans.get(key, 0), open_loans[key], overdue[key])
+                for key, (books, copies, available, _) in totals.items() if books]
+        rows.sort(key=lambda row: (-row.books, row.key))
+        return rows[:limit]
+
+# Ödünç/iade işlemleri tek bir işlemde (transaction) çalışır; commit çağıran tarafa bırakılır.
+# Kitap durumu koşullu UPDATE ile değiştirilir, böylece aynı kitap iki kez ödünç verilemez.
+def find_entity(session, entity, entity_id, entities=None):
+    if entities is not None:
+        return entities.get(session, entity, entity_id)
+    return session.query(entity.id).filter_by(id=entity_id).first()
+
+def checkout_books(session, member_id, book_ids, lending_date, return_date, entities=None):
+    book_ids = list(dict.fromkeys(book_ids))
+    if not book_ids:
+        raise LibraryError("Lütfen kitap ID'sini girin.")
+    if lending_date >= return_date:
+        raise LibraryError("Teslim tarihi ödünç tarihinden önce olamaz.")
+    if find_entity(session, Member, member_id, entities) is None:
+        raise NotFoundError("Bu üye bulunamadı.")
+    available = dict(session.query(Book.id, Book.available_copies).filter(Book.id.in_(book_ids)))
+    missing = [book_id for book_id in book_ids if book_id not in available]
+    if missing:
+        raise NotFoundError("Bu kitap bulunamadı: " + ", ".join(map(str, missing)))
+    # Üyeye ayrılmış kopyası olan kitaplar raftaki kopyalara dokunmadan o kopyayla verilir.
+    held = dict(session.query(Hold.book_id, Hold.copy_id).filter(
+        Hold.member_id == member_id, Hold.book_id.in_(book_ids), Hold.status == 'Ayrıldı'))
+    unavailable = [book_id for book_id in book_ids if book_id not in held and available[book_id] <= 0]
+    if unavailable:
+        raise LibraryError("Bu kitap şu anda müsait değil: " + ", ".join(map(str, unavailable)))
+    shelf_ids = [book_id for book_id in book_ids if book_id not in held]
+    # SET ifadeleri güncelleme öncesi değerleri görür: son kopya verilirken durum 'Kiralık' olur.
+    updated = session.query(Book).filter(Book.id.in_(shelf_ids), Book.available_copies > 0).update(
+        {Book.available_copies: Book.available_copies - 1, Book.loan_count: Book.loan_count + 1,
+         Book.status: case((Book.available_copies > 1, 'Mevcut'), else_='Kiralık')},
+        synchronize_session=False) if shelf_ids else 0
+    if updated != len(shelf_ids):
+        raise LibraryError("Kitaplardan biri bu sırada başka bir üyeye ödünç verildi.")
+    if held:
+        session.query(Book).filter(Book.id.in_(held)).update({Book.loan_count: Book.loan_count + 1},
+                                                             synchronize_session=False)
+        if session.query(Copy).filter(Copy.id.in_(held.values()), Copy.status == 'Ayrılmış').update(
+                {Copy.status: 'Kiralık'}, synchronize_session=False) != len(held):
+            raise LibraryError("Ayrılmış kopyalardan biri bu sırada değişti.")
+    lendings = [Lending(book_id=book_id, copy_id=held.get(book_id) or reserve_copy(session, book_id),
+                        member_id=member_id, lending_date=lending_date, return_date=return_date, returned=0)
+                for book_id in book_ids]
+    session.add_all(lendings)
+    session.query(Hold).filter(Hold.member_id == member_id, Hold.book_id.in_(book_ids),
+                               Hold.status.in_(HOLD_ACTIVE)).update(
+        {Hold.status: 'Teslim Edildi', Hold.closed_on: lending_date}, synchronize_session=False)
+    session.flush()
+    rollup_new_lendings(session, [lending.id for lending in lendings])
+    for book_id in book_ids:
+        mark_changed(session, Book, book_id)
+    return lendings
+
+def reserve_copy(session, book_id):
+    copy_id = session.query(Copy.id).filter(Copy.book_id == book_id, Copy.status == 'Mevcut').limit(1).scalar()
+    if copy_id is None or not session.query(Copy).filter(Copy.id == copy_id, Copy.status == 'Mevcut').update(
+            {Copy.status: 'Kiralık'}, synchronize_session=False):
+        raise LibraryError(f"Kitabın kopya sayacı kopyalarla tutarsız: {book_id}")
+    return copy_id
+
+def add_copies(session, book_id, count, status='Mevcut'):
+    session.execute(Copy.__table__.insert(), [dict(book_id=book_id, status=status)] * count)
+    available = count if status == 'Mevcut' else 0
+    session.query(Book).filter(Book.id == book_id).update(
+        {Book.total_copies: Book.total_copies + count, Book.available_copies: Book.available_copies + available,
+         Book.status: case((Book.available_copies + available > 0, 'Mevcut'), else_='Kiralık')},
+        synchronize_session=False)
+    if available:
+        fill_holds(session, book_id)
+    mark_changed(session, Book, book_id)
+
+def set_book_status(session, book_id, status):
+    # Elle verilen durum ödünçte olmayan kopyalara uygulanır; sayaçlar kopyalardan yeniden sayılır.
+    copies = session.query(Copy).filter(Copy.book_id == book_id)
+    if status == 'Kiralık':
+        copies.filter(Copy.status == 'Mevcut').update({Copy.status: 'Kiralık'}, synchronize_session=False)
+    else:
+        on_loan = select(Lending.copy_id).where(Lending.book_id == book_id, Lending.returned == 0,
+                                                Lending.copy_id.isnot(None))
+        copies.filter(Copy.status == 'Kiralık', Copy.id.notin_(on_loan)).update(
+            {Copy.status: 'Mevcut'}, synchronize_session=False)
+    total, available = session.query(func.count(Copy.id), func.coalesce(
+        func.sum(case((Copy.status == 'Mevcut', 1), else_=0)), 0)).filter(Copy.book_id == book_id).one()
+    session.query(Book).filter(Book.id == book_id).update(
+        {Book.total_copies: total, Book.available_copies: available,
+         Book.status: 'Mevcut' if available else 'Kiralık'}, synchronize_session=False)
+    if available:
+        fill_holds(session, book_id)
+    mark_changed(session, Book, book_id)
+
+def checkout_book(session, book_id, member_id, lending_date, return_date):
+    return checkout_books(session, member_id, [book_id], lending_date, return_date)[0]
+
+def return_open_lendings(session, *criteria):
+    open_lendings = session.query(Lending.id, Lending.book_id, Lending.copy_id) \
+        .filter(Lending.returned == 0, *criteria).all()
+    if not open_lendings:
+        return []
+    lending_ids = [lending_id for lending_id, _, _ in open_lendings]
+    returned_copies = {}
+    for _, book_id, copy_id in open_lendings:
+        returned_copies.setdefault(book_id, []).append(copy_id)
+    today = date.today()
+    updated = session.query(Lending).filter(Lending.id.in_(lending_ids), Lending.returned == 0).update(
+        {Lending.returned: 1, Lending.returned_on: today}, synchronize_session=False)
+    if updated != len(lending_ids):
+        raise LibraryError("Bu ödünç zaten iadede.")
+    rollup_returns(session, lending_ids, today)
+    shelve_copies(session, returned_copies, today)
+    for lending_id in lending_ids:
+        mark_changed(session, Lending, lending_id)
+    return lending_ids
+
+def shelve_copies(session, copies_per_book, today):
+    # Geri gelen kopya önce kitabın ayırtma sırasındakine ayrılır; kalanlar rafa döner ve sayaçlara eklenir.
+    shelved = []
+    shelved_per_book = {}
+    for book_id, copy_ids in copies_per_book.items():
+        assigned = assign_holds(session, book_id, copy_ids, today)
+        rest = [copy_id for copy_id in copy_ids if copy_id not in assigned]
+        shelved.extend(copy_id for copy_id in rest if copy_id is not None)
+        if rest:
+            shelved_per_book[book_id] = len(rest)
+        mark_changed(session, Book, book_id)
+    if shelved:
+        session.query(Copy).filter(Copy.id.in_(shelved)).update({Copy.status: 'Mevcut'}, synchronize_session=False)
+    if shelved_per_book:
+        session.execute(
+            Book.__table__.update().where(Book.id == bindparam("returned_book_id")).values(
+                available_copies=Book.available_copies + bindparam("returned_count"), status='Mevcut'),
+            [dict(returned_book_id=book_id, returned_count=count) for book_id, count in shelved_per_book.items()])
+
+def return_lending_by_id(session, lending_id):
+    returned = session.query(Lending.returned).filter_by(id=lending_id).scalar()
+    if returned is None and session.query(LendingHistory.id).filter_by(id=lending_id).first():
+        raise LibraryError("Bu ödünç zaten iadede.")
+    if returned is None:
+        raise NotFoundError("Bu ödünç bulunamadı.")
+    if returned:
+        raise LibraryError("Bu ödünç zaten iadede.")
+    return return_open_lendings(session, Lending.id == lending_id)
+
+def return_book_for_member(session, book_id, member_id, entities=None):
+    if find_entity(session, Book, book_id, entities) is None:
+        raise NotFoundError("Bu kitap bulunamadı.")
+    if find_entity(session, Member, member_id, entities) is None:
+        raise NotFoundError("Bu üye bulunamadı.")
+    lending_ids = return_open_lendings(session, Lending.book_id == book_id, Lending.member_id == member_id)
+    if not lending_ids:
+        raise LibraryError("Bu kitap bu üyeye ait iade edilmemiş ödünç bulunamadı.")
+    return lending_ids
+
+def next_hold(session, book_id):
+    return session.query(Hold.id).filter(Hold.book_id == book_id, Hold.status == 'Bekliyor') \
+        .order_by(Hold.priority, Hold.id).limit(1).scalar()
+
+def assign_holds(session, book_id, copy_ids, today):
+    # Her kopya sıradaki bekleyen ayırtmaya verilir; kopya 'Ayrılmış' olur ve müsait sayaca girmez.
+    assigned = []
+    for copy_id in copy_ids:
+        if copy_id is None:
+            continue
+        hold_id = next_hold(session, book_id)
+        if hold_id is None:
+            break
+        session.query(Hold).filter(Hold.id == hold_id).update(
+            {Hold.status: 'Ayrıldı', Hold.copy_id: copy_id, Hold.assigned_on: today}, synchronize_session=False)
+        mark_changed(session, Hold, hold_id)
+        assigned.append(copy_id)
+    if assigned:
+        session.query(Copy).filter(Copy.id.in_(assigned)).update({Copy.status: 'Ayrılmış'},
+                                                                  synchronize_session=False)
+    return assigned
+
+def fill_holds(session, book_id):
+    # Rafa yeni çıkan kopyalar (yeni nüsha, geri açılan kitap) bekleyen ayırtmalara dağıtılır.
+    if next_hold(session, book_id) is None:
+        return
+    copy_ids = session.scalars(select(Copy.id).where(Copy.book_id == book_id, Copy.status == 'Mevcut')).all()
+    assigned = len(assign_holds(session, book_id, copy_ids, date.today()))
+    if assigned:
+        session.query(Book).filter(Book.id == book_id).update(
+            {Book.available_copies: Book.available_copies - assigned,
+             Book.status: case((Book.available_copies > assigned, 'Mevcut'), else_='Kiralık')},
+            synchronize_session=False)
+
+def hold_position(session, hold):
+    return session.query(func.count(Hold.id)).filter(
+        Hold.book_id == hold.book_id, Hold.status == 'Bekliyor',
+        tuple_(Hold.priority, Hold.id) < tuple_(hold.priority, hold.id)).scalar() + 1
+
+def place_hold(session, book_id, member_id, entities=None):
+    book = find_entity(session, Book, book_id, entities)
+    if book is None:
+        raise NotFoundError("Bu kitap bulunamadı.")
+    member = find_entity(session, Member, member_id, entities)
+    if member is None:
+        raise NotFoundError("Bu üye bulunamadı.")
+    if session.query(Lending.id).filter(Lending.book_id == book_id, Lending.member_id == member_id,
+                                        Lending.returned == 0).first():
+        raise LibraryError("Bu kitap zaten bu üyede.")
+    if session.query(Hold.id).filter(Hold.book_id == book_id, Hold.member_id == member_id,
+                                     Hold.status.in_(HOLD_ACTIVE)).first():
+        raise LibraryError("Bu üyenin bu kitap için zaten ayırtması var.")
+    if session.query(Book.available_copies).filter_by(id=book_id).scalar() > 0:
+        raise LibraryError("Kitap şu anda müsait, doğrudan ödünç verilebilir.")
+    membership_type = session.query(Member.membership_type).filter_by(id=member_id).scalar()
+    hold = Hold(book_id=book_id, member_id=member_id, priority=HOLD_PRIORITIES.get(membership_type, 1),
+                status='Bekliyor', placed_at=datetime.now())
+    session.add(hold)
+    session.flush()
+    return hold
+
+def cancel_hold_by_id(session, hold_id):
+    hold = session.get(Hold, hold_id)
+    if hold is None:
+        raise NotFoundError("Bu ayırtma bulunamadı.")
+    if hold.status not in HOLD_ACTIVE:
+        raise LibraryError("Bu ayırtma zaten kapanmış.")
+    copy_id = hold.copy_id if hold.status == 'Ayrıldı' else None
+    hold.status = 'İptal'
+    hold.closed_on = date.today()
+    session.flush()
+    if copy_id is not None:
+        shelve_copies(session, {hold.book_id: [copy_id]}, date.today())
+
+# Günlük özetler: her ödünç dört boyutta (tür, yayınevi, üyelik tipi, üye) sayılır. Ödünç ve iade yolları özetleri
+# aynı işlemde günceller; özetlerin gerisinde kalan (toplu yüklenen) ödünçleri ve gün dönümünde gecikmeye
+# düşenleri RollupBuilder işler. rollup_state kimlik/gün eşikleri her olayın tam bir kez sayılmasını sağlar.
+def rollup_state(connection):
+    return dict(connection.execute(select(RollupState.name, RollupState.value)).all())
+
+def set_rollup_state(connection, **values):
+    statement = sqlite_insert(RollupState.__table__)
+    connection.execute(statement.on_conflict_do_update(index_elements=["name"],
+                                                       set_={"value": statement.excluded.value}),
+                       [dict(name=name, value=value) for name, value in values.items()])
+
+def rollup_rows(connection, table, *criteria):
+    return connection.execute(
+        select(table.c.id, table.c.lending_date, table.c.return_date, table.c.returned, table.c.returned_on,
+               table.c.member_id, Book.genre, Book.publisher, Member.membership_type)
+        .select_from(table.outerjoin(Book.__table__, Book.id == table.c.book_id)
+                     .outerjoin(Member.__table__, Member.id == table.c.member_id))
+        .where(*criteria)).all()
+
+def lending_events(row, overdue_through):
+    # Gecikme, teslim tarihinden sonraki gün sayılır; o gün özetlere işlenmişse olay hemen eklenir.
+    yield "loans", row.lending_date
+    returned_on = row.returned_on or row.return_date
+    if row.returned:
+        yield "returns", returned_on
+    if overdue_through is not None and row.return_date is not None \
+            and row.return_date.toordinal() < overdue_through and (not row.returned or returned_on > row.return_date):
+        yield "overdues", date.fromordinal(row.return_date.toordinal() + 1)
+
+ROLLUP_FIELDS = {"loans": 0, "returns": 1, "overdues": 2}
+
+def add_rollup_events(totals, row, events):
+    # totals: (boyut, gün, anahtar) -> [ödünç, iade, gecikme]. Üye boyutu ay başına toplanır:
+    # günlük üye satırları neredeyse ödünç tablosu kadar büyür.
+    genre, publisher, membership_type, member = row.genre or "", row.publisher or "", row.membership_type or "", \
+        str(row.member_id)
+    for field, day in events:
+        column = ROLLUP_FIELDS[field]
+        day = day.isoformat()
+        for key in (("genre", day, genre), ("publisher", day, publisher), ("membership_type", day, membership_type),
+                    ("member", day[:8] + "01", member)):
+            counts = totals.get(key)
+            if counts is None:
+                counts = totals[key] = [0, 0, 0]
+            counts[column] += 1
+
+ROLLUP_UPSERT = (
+    "INSERT INTO circulation_daily (dimension, day, key, loans, returns, overdues) VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (dimension, day, key) DO UPDATE SET loans = loans + excluded.loans, "
+    "returns = returns + excluded.returns, overdues = overdues + excluded.overdues")
+
+def write_rollups(connection, totals):
+    # Yüz binlerce satırda Core parametre işleme baskın çıktığından sürücüye doğrudan, anahtar sırasıyla demet verilir.
+    if totals:
+        connection.exec_driver_sql(ROLLUP_UPSERT, [(*key, *counts) for key, counts in sorted(totals.items())])
+
+def rollup_new_lendings(session, lending_ids):
+    # Özetler güncelse (önceki bütün ödünçler işlenmişse) yeni ödünçler hemen eklenir, yoksa toplama işine kalır.
+    state = rollup_state(session)
+    first = min(lending_ids)
+    previous = session.query(func.max(Lending.id)).filter(Lending.id < first).scalar() or 0
+    if state.get("lendings") != previous:
+        return
+    totals = {}
+    for row in rollup_rows(session, Lending.__table__, Lending.id.in_(lending_ids)):
+        add_rollup_events(totals, row, lending_events(row, state.get("overdues")))
+    write_rollups(session.connection(), totals)
+    set_rollup_state(session, lendings=max(lending_ids))
+
+def rollup_returns(session, lending_ids, today):
+    # Özetlere henüz girmemiş ödünçlerin iadesi, o ödünçler işlenirken returned_on üzerinden sayılır.
+    watermark = rollup_state(session).get("lendings")
+    if watermark is None:
+        return
+    totals = {}
+    for row in rollup_rows(session, Lending.__table__, Lending.id.in_(lending_ids), Lending.id <= watermark):
+        add_rollup_events(totals, row, [("returns", today)])
+    write_rollups(session.connection(), totals)
+
+RollupRow = namedtuple("RollupRow", ["key", "label", "loans", "returns", "overdues"])
+
+class CirculationRollups:
+    # Özet tablolarından okuma; her sorgu (dimension, day) dizinindeki küçük bir aralığı tarar.
+    def __init__(self, session):
+        self.session = session
+
+    def sums(self):
+        return [func.sum(CirculationRollup.loans), func.sum(CirculationRollup.returns),
+                func.sum(CirculationRollup.overdues)]
+
+    def report(self, dimension, date_from, date_to, limit=STATS_TOP_K):
+        if dimension not in ROLLUP_DIMENSIONS:
+            raise LibraryError(f"Bilinmeyen istatistik boyutu: {dimension}")
+        loans, returns, overdues = self.sums()
+        if dimension == "member":
+            # Üye özetleri aylıktır; aralığın ilk ayı bütünüyle sayılır.
+            date_from = date_from.replace(day=1)
+        rows = self.session.query(CirculationRollup.key, loans, returns, overdues) \
+            .filter(CirculationRollup.dimension == dimension, CirculationRollup.day >= date_from,
+                    CirculationRollup.day <= date_to) \
+            .group_by(CirculationRollup.key).order_by(loans.desc(), CirculationRollup.key).limit(limit).all()
+        names = {}
+        if dimension == "member":
+            names = {str(member_id): name for member_id, name in self.session.query(Member.id, Member.full_name)
+                     .filter(Member.id.in_([int(key) for key, *_ in rows if key.isdigit()]))}
+        return [RollupRow(key, names.get(key) or key or "—", loans, returns, overdues)
+                for key, loans, returns, overdues in rows]
+
+    def daily(self, date_from, date_to):
+        # Her olayın tam bir türü olduğundan tür boyutunun günlük toplamı genel toplamdır.
+        loans, returns, overdues = self.sums()
+        return self.session.query(CirculationRollup.day, loans, returns, overdues) \
+            .filter(CirculationRollup.dimension == "genre", CirculationRollup.day >= date_from,
+                    CirculationRollup.day <= date_to) \
+            .group_by(CirculationRollup.day).order_by(CirculationRollup.day).all()
+
+    def totals(self, date_from, date_to):
+        loans, returns, overdues = self.sums()
+        row = self.session.query(loans, returns, overdues).filter(
+            CirculationRollup.dimension == "genre", CirculationRollup.day >= date_from,
+            CirculationRollup.day <= date_to).one()
+        return tuple(value or 0 for value in row)
+
+class RollupBuilder:
+    # Özetlerin gerisinde kalan ödünçleri kimlik aralıkları hâlinde (sıcak ve arşiv tablolarından) işler,
+    # ardından bugüne kadar gecikmeye düşen ödünçleri sayar. Her parça kendi işleminde eşikle birlikte yazılır.
+    def __init__(self, session_factory, batch_size=ROLLUP_BATCH_SIZE, progress=None):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.progress = progress
+
+    @retry_on_busy
+    def ingest_batch(self):
+        with self.session_factory.begin() as session:
+            state = rollup_state(session)
+            low = state.get("lendings", 0)
+            newest = session.query(func.max(Lending.id)).scalar() or 0
+            if newest <= low:
+                return None
+            high = min(newest, low + self.batch_size)
+            totals = {}
+            count = 0
+            for table in (Lending.__table__, LendingHistory.__table__):
+                for row in rollup_rows(session, table, table.c.id > low, table.c.id <= high):
+                    add_rollup_events(totals, row, lending_events(row, state.get("overdues")))
+                    count += 1
+            write_rollups(session.connection(), totals)
+            set_rollup_state(session, lendings=high)
+            return count
+
+    @retry_on_busy
+    def close_overdue_days(self, today):
+        with self.session_factory.begin() as session:
+            state = rollup_state(session)
+            through = state.get("overdues", today.toordinal())
+            if through >= today.toordinal():
+                return 0
+            totals = {}
+            for table in (Lending.__table__, LendingHistory.__table__):
+                rows = rollup_rows(session, table, table.c.return_date >= date.fromordinal(through),
+                                   table.c.return_date < today, table.c.id <= state.get("lendings", 0),
+                                   or_(table.c.returned == 0, table.c.returned_on > table.c.return_date))
+                for row in rows:
+                    add_rollup_events(totals, row, [("overdues", date.fromordinal(row.return_date.toordinal() + 1))])
+            write_rollups(session.connection(), totals)
+            set_rollup_state(session, overdues=today.toordinal())
+            return sum(counts[ROLLUP_FIELDS["overdues"]] for (dimension, _, _), counts in totals.items()
+                       if dimension == "genre")
+
+    def run(self, today=None):
+        today = today or date.today()
+        ingested = 0
+        while True:
+            count = self.ingest_batch()
+            if count is None:
+                break
+            ingested += count
+            if self.progress:
+                self.progress(ingested)
+        self.close_overdue_days(today)
+        return ingested
+
+    def rebuild(self, today=None):
+        with self.session_factory.begin() as session:
+            session.execute(CirculationRollup.__table__.delete())
+            set_rollup_state(session, lendings=0, overdues=(today or date.today()).toordinal())
+        return self.run(today)
+
+class LendingArchiver:
+    # İadesinin üzerinden after_days geçmiş ödünçleri lending_history'ye taşır. returned_on 8. sürümden önceki
+    # iadelerde boştur; onlarda teslim tarihi kullanılır.
+    # Her parça ayrı kısa bir işlemde taşınır; yazarlar uzun beklemez, kesilen iş sonraki çalışmada kaldığı yerden sürer.
+    def __init__(self, engine, after_days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE, progress=None):
+        self.engine = engine
+        self.after_days = after_days
+        self.batch_size = batch_size
+        self.progress = progress
+
+    @retry_on_busy
+    def archive_batch(self, cutoff, today):
+        with self.engine.begin() as connection:
+            # En büyük kimlik sıcak tabloda bırakılır: SQLite yeni satıra MAX(id) + 1 verir, arşivdeki kimlik tekrar kullanılmaz.
+            newest = connection.execute(select(func.max(Lending.id))).scalar()
+            # Kimlik sırasıyla seçilir: taşınan satırlar aynı sayfalardan silinir, dağınık yazma azalır.
+            ids = connection.execute(
+                select(Lending.id).where(Lending.returned == 1,
+                                         func.coalesce(Lending.returned_on, Lending.return_date) < cutoff,
+                                         Lending.id < newest)
+                .order_by(Lending.id).limit(self.batch_size)).scalars().all()
+            if not ids:
+                return 0
+            columns = [Lending.__table__.c[name] for name in LENDING_COLUMNS]
+            connection.execute(LendingHistory.__table__.insert().from_select(
+                LENDING_COLUMNS + ["archived_at"],
+                select(*columns, sqlalchemy.literal(today, Date)).where(Lending.id.in_(ids))))
+            connection.execute(Lending.__table__.delete().where(Lending.id.in_(ids)))
+            return len(ids)
+
+    def run(self, today=None):
+        today = today or date.today()
+        cutoff = today.fromordinal(today.toordinal() - self.after_days)
+        moved = 0
+        while True:
+            count = self.archive_batch(cutoff, today)
+            if not count:
+                return moved
+            moved += count
+            if self.progress:
+                self.progress(moved)
+
+class OverdueReport:
+    headers = ["Ödünç ID", "Kitap ID", "Kitap İsim", "Üye ID", "Üye", "Ödünç Tarihi", "Teslim Tarihi",
+               "Gecikme (Gün)"]
+
+    def __init__(self, today=None):
+        self.today = today or date.today()
+        days_overdue = cast(func.julianday(self.today.isoformat()) - func.julianday(Lending.return_date), Integer)
+        # En uzun gecikme önce: (return_date, id) sırası ix_lendings_returned_return_date dizininden okunur.
+        self.query = KeysetQuery(
+            [Lending.id, Lending.book_id, Book.title, Lending.member_id, Member.full_name, Lending.lending_date,
+             Lending.return_date, days_overdue.label("days_overdue")],
+            criteria=[Lending.returned == 0, Lending.return_date < self.today],
+            joins=[(Book, Book.id == Lending.book_id), (Member, Member.id == Lending.member_id)],
+            key=(6, 0))
+
+    def rows(self, session, batch_size=1000):
+        return self.query.iterate(session, batch_size)
+
+    def model(self, session, parent=None):
+        return LazyTableModel(session, self.query.columns, self.headers, self.query.criteria, self.query.joins,
+                              self.query.key, parent=parent)
+
+class BookResults:
+    # Arama ve filtre sonuç listesi; sayfalar kimlik listesi (IdListQuery) ya da keyset ile okunur. Kelime aramasında
+    # bm25 puanı bir kez hesaplanır ve en iyi SEARCH_RANKED_LIMIT eşleşmenin kimlikleri sırasıyla saklanır; sayfalar
+    # bu listeden okunur. Kelime eşleşmesi yoksa bulanık aramanın sınırlı (FUZZY_CANDIDATES) sonucu benzerlik sırasıyla
+    # listelenir. Terimsiz filtrede kimlikler ve toplam sayı sütunsal kopyadan (CatalogSnapshot) alınır. Anahtar
+    # sütunları başlıkta gösterilmez.
+    headers = ["ID", "Kitap Adı", "Yazar", "Yayınevi", "Tür", "Basım Yılı", "Durum", "Mevcut Kopya", "Toplam Kopya"]
+
+    def __init__(self, session, search_term="", status="Tüm Kitaplar", snapshot=None):
+        columns = [Book.id, func.coalesce(Book.title, "").label("title"), func.coalesce(Book.author, "").label("author"),
+                   func.coalesce(Book.publisher, "").label("publisher"), func.coalesce(Book.genre, "").label("genre"),
+                   func.coalesce(Book.publication_year, 0).label("publication_year"),
+                   func.coalesce(Book.status, "").label("status"), Book.available_copies, Book.total_copies]
+        criteria = [] if status == "Tüm Kitaplar" else [availability_criterion(status)]
+        match = build_match_query(normalize_search_term(search_term))
+        self.fuzzy = False
+        self.total = None
+        self.limited = False
+        if match is None and snapshot is not None:
+            with snapshot.current(session) as current:
+                book_ids = current.book_ids(status=None if status == "Tüm Kitaplar" else status)
+            self.query = IdListQuery(columns, book_ids, criteria)
+            self.total = len(book_ids)
+            return
+        if match is None:
+            self.query = KeysetQuery(columns, criteria)
+            return
+        ranked = text("SELECT rowid, bm25(books_fts) AS rank FROM books_fts WHERE books_fts MATCH :match") \
+            .bindparams(match=match).columns(column("rowid", Integer), column("rank", Float)).subquery("ranked")
+        book_ids = session.scalars(select(Book.id).join(ranked, ranked.c.rowid == Book.id).where(*criteria)
+                                   .order_by(ranked.c.rank, Book.id).limit(SEARCH_RANKED_LIMIT)).all()
+        self.limited = len(book_ids) == SEARCH_RANKED_LIMIT
+        if not book_ids:
+            self.fuzzy = True
+            book_ids = [book.id for book in fuzzy_search(session, search_term, status)]
+        # Başlığa göre sıralamada da yalnızca bu adaylar listelenir.
+        self.query = IdListQuery(columns, book_ids, criteria + [Book.id.in_(book_ids)])
+        self.total = len(book_ids)
+
+    def model(self, session, executor=None, parent=None):
+        return LazyTableModel(session, self.query.columns, self.headers, executor=executor, parent=parent,
+                              query=self.query)
+
+NoticeResult = namedtuple("NoticeResult", ["kind", "scanned", "written"])
+
+class OverdueNotifier:
+    # O türden bildirimi henüz yazılmamış açık ödünçleri (notices ile NOT EXISTS) (return_date, id) sırasıyla parça
+    # parça tarar, üye iletişim bilgisini aynı sorguda alır ve bildirimleri notices giden kutusuna yazar. Her çalıştırma
+    # baştan tarar: sonradan girilmiş geçmiş tarihli ödünçler de bulunur, kesilen iş tekrar çalıştırılınca yazılmış
+    # bildirimler atlanır (lending_id, kind tekil). Çalıştırma içindeki anahtar yalnızca bellekte tutulur.
+    kinds = ("Gecikme", "Hatırlatma")
+    insert = ("INSERT OR IGNORE INTO notices (lending_id, kind, member_id, book_id, contact_info, subject, body, "
+              "return_date, created_on) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+    def __init__(self, engine, batch_size=NOTICE_BATCH_SIZE, due_days=NOTICE_DUE_DAYS, progress=None):
+        self.Session = sessionmaker(bind=engine)
+        self.batch_size = batch_size
+        self.due_days = due_days
+        self.progress = progress
+
+    def query(self, kind, today):
+        if kind == "Gecikme":
+            window = [Lending.return_date < today]
+        else:
+            window = [Lending.return_date >= today,
+                      Lending.return_date <= today.fromordinal(today.toordinal() + self.due_days)]
+        return KeysetQuery(
+            [Lending.id, Lending.return_date, Lending.member_id, Lending.book_id, Book.title, Member.full_name,
+             Member.contact_info],
+            criteria=[Lending.returned == 0, *window,
+                      ~select(Notice.id).where(Notice.lending_id == Lending.id, Notice.kind == kind).exists()],
+            joins=[(Book, Book.id == Lending.book_id), (Member, Member.id == Lending.member_id)],
+            key=(1, 0))
+
+    @staticmethod
+    def message(kind, row, today):
+        lending_id, return_date, member_id, book_id, title, full_name, contact_info = row
+        if kind == "Gecikme":
+            return (f"Gecikmiş ödünç: {title}",
+                    f"Sayın {full_name}, '{title}' adlı kitabın teslim tarihi {return_date.isoformat()} idi "
+                    f"({(today - return_date).days} gün gecikme). Lütfen en kısa sürede iade edin.")
+        return (f"Teslim tarihi yaklaşıyor: {title}",
+                f"Sayın {full_name}, '{title}' adlı kitabın teslim tarihi {return_date.isoformat()}. "
+                f"Lütfen zamanında iade edin.")
+
+    @retry_on_busy
+    def notify_batch(self, kind, today, after=None):
+        with self.Session.begin() as session:
+            rows = self.query(kind, today).page(session, after, self.batch_size)
+            if not rows:
+                return [], 0
+            written = session.connection().exec_driver_sql(self.insert, [
+                (row[0], kind, row[2], row[3], row[6], *self.message(kind, row, today), row[1].isoformat(),
+                 today.isoformat()) for row in rows]).rowcount
+            return rows, written
+
+    def run(self, today=None):
+        today = today or date.today()
+        results = []
+        for kind in self.kinds:
+            scanned = written = 0
+            after = None
+            while True:
+                rows, batch_written = self.notify_batch(kind, today, after)
+                scanned += len(rows)
+                written += batch_written
+                if self.progress and rows:
+                    self.progress(kind, scanned, written)
+                if len(rows) < self.batch_size:
+                    break
+                after = (rows[-1][1], rows[-1][0])
+            results.append(NoticeResult(kind, scanned, written))
+        return results
+
+ImportResult = namedtuple("ImportResult", ["processed", "inserted", "rejected"])
+
+class BookImporter:
+    # CSV/JSONL dosyasını satır satır okur, doğrular ve toplu INSERT (executemany) ile büyük işlemlerde yazar.
+    fields = ['isbn', 'title', 'author', 'publisher', 'publication_year', 'page_count', 'genre', 'status']
+
+    def __init__(self, engine, batch_size=5000, transaction_size=100000, progress=None):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.transaction_size = transaction_size
+        self.progress = progress
+
+    def read_rows(self, path):
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8", newline="") as source:
+            if ".jsonl" in path or ".ndjson" in path:
+                for line in source:
+                    if line.strip():
+                        try:
+                            yield json.loads(line)
+                        except ValueError:
+                            yield None
+            else:
+                yield from csv.DictReader(source)
+
+    def validate(self, row, known_isbns):
+        if not isinstance(row, dict):
+            return None, "okunamayan satır"
+        book = {field: str(row.get(field) or '').strip() for field in self.fields}
+        book['status'] = book['status'] or 'Mevcut'
+        missing = [field for field in self.fields if not book[field]]
+        if missing:
+            return None, "eksik alan: " + ", ".join(missing)
+        if book['status'] not in ('Mevcut', 'Kiralık'):
+            return None, "geçersiz durum: " + book['status']
+        try:
+            book['publication_year'] = int(book['publication_year'])
+            book['page_count'] = int(book['page_count'])
+        except ValueError:
+            return None, "basım yılı ve sayfa sayısı sayı olmalı"
+        if book['isbn'] in known_isbns:
+            return None, "ISBN zaten mevcut: " + book['isbn']
+        book['loan_count'] = 0
+        return book, None
+
+    def run(self, path, rejects_path=None):
+        with self.engine.connect() as connection:
+            known_isbns = set(connection.execute(
+                select(Book.isbn).where(Book.isbn.isnot(None)).execution_options(yield_per=10000)).scalars())
+        processed = inserted = rejected = 0
+        rejects_file = open(rejects_path, "w", encoding="utf-8", newline="") if rejects_path else None
+        rejects = csv.writer(rejects_file) if rejects_file else None
+        if rejects:
+            rejects.writerow(["satir", "neden"])
+        batch = []
+        connection = self.engine.connect()
+        transaction = connection.begin()
+        pending = 0
+        last_id = connection.execute(select(func.max(Book.id))).scalar() or 0
+
+        def insert_batch(batch):
+            nonlocal last_id
+            connection.execute(Book.__table__.insert(), batch)
+            backfill_copies(connection, last_id)
+            last_id = connection.execute(select(func.max(Book.id))).scalar() or 0
+
+        try:
+            for processed, row in enumerate(self.read_rows(path), start=1):
+                book, reason = self.validate(row, known_isbns)
+                if book is None:
+                    rejected += 1
+                    if rejects:
+                        rejects.writerow([processed, reason])
+                    continue
+                known_isbns.add(book['isbn'])
+                batch.append(book)
+                if len(batch) >= self.batch_size:
+                    insert_batch(batch)
+                    inserted += len(batch)
+                    pending += len(batch)
+                    batch = []
+                    if pending >= self.transaction_size:
+                        transaction.commit()
+                        transaction = connection.begin()
+                        pending = 0
+                    if self.progress:
+                        self.progress(processed, inserted, rejected)
+            if batch:
+                insert_batch(batch)
+                inserted += len(batch)
+            transaction.commit()
+        except Exception:
+            transaction.rollback()
+            raise
+        finally:
+            connection.close()
+            if rejects_file:
+                rejects_file.close()
+        if self.progress:
+            self.progress(processed, inserted, rejected)
+        return ImportResult(processed, inserted, rejected)
+
+class TableExporter:
+    # Satırlar sunucu tarafı imleçle (stream_results + yield_per) parça parça okunur; bellek kullanımı sabittir.
+    entities = {"books": Book, "copies": Copy, "members": Member, "lendings": Lending,
+                "lending_history": LendingHistory, "holds": Hold, "notices": Notice}
+
+    def __init__(self, engine, batch_size=5000):
+        self.engine = engine
+        self.batch_size = batch_size
+
+    def build_query(self, name, status=None, date_from=None, date_to=None, returned=None):
+        entity = self.entities[name]
+        table = entity.__table__
+        query = select(table).order_by(table.c.id)
+        date_column = {"members": table.c.get("registration_date"), "lendings": table.c.get("lending_date"),
+                       "lending_history": table.c.get("lending_date")}.get(name)
+        if status is not None and name == "books":
+            query = query.where(table.c.status == status)
+        if returned is not None and name == "lendings":
+            query = query.where(table.c.returned == int(returned))
+        if date_column is not None:
+            if date_from is not None:
+                query = query.where(date_column >= date_from)
+            if date_to is not None:
+                query = query.where(date_column <= date_to)
+        return query
+
+    def export(self, name, path, fmt=None, **filters):
+        fmt = fmt or ("jsonl" if ".jsonl" in path else "csv")
+        query = self.build_query(name, **filters)
+        count = 0
+        if path == "-":
+            target = sys.stdout
+        elif path.endswith(".gz"):
+            target = gzip.open(path, "wt", encoding="utf-8", newline="")
+        else:
+            target = open(path, "w", encoding="utf-8", newline="")
+        try:
+            with self.engine.connect() as connection:
+                result = connection.execution_options(stream_results=True, yield_per=self.batch_size).execute(query)
+                columns = list(result.keys())
+                writer = csv.writer(target) if fmt == "csv" else None
+                if writer:
+                    writer.writerow(columns)
+                for rows in result.partitions():
+                    if writer:
+                        writer.writerows(rows)
+                    else:
+                        target.writelines(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str) + "\n"
+                                          for row in rows)
+                    count += len(rows)
+        finally:
+            if target is not sys.stdout:
+                target.close()
+        return count
+
+BookRecord = namedtuple("BookRecord", [c.name for c in Book.__table__.columns])
+HoldRecord = namedtuple("HoldRecord", [c.name for c in Hold.__table__.columns])
+MemberRecord = namedtuple("MemberRecord", [c.name for c in Member.__table__.columns])
+
+BOOK_STATUSES = ("Mevcut", "Kiralık")
+MEMBERSHIP_TYPES = ("Standart", "Premium")
+
+def to_record(record_type, instance):
+    return record_type(*(getattr(instance, field) for field in record_type._fields))
+
+def book_records(session, book_ids, batch_size=5000):
+    # ORM nesnesi kurmadan, kimlik sırasıyla ve parça parça (SQLite parametre sınırı) okunur.
+    records = []
+    for start in range(0, len(book_ids), batch_size):
+        records.extend(BookRecord(*row) for row in session.execute(
+            select(*Book.__table__.columns).where(Book.id.in_(book_ids[start:start + batch_size])).order_by(Book.id)))
+    return records
+
+class EntityCache:
+    # Kitap ve üyeler için kimliğe ve ISBN'e göre okuma-içinden (read-through) sınırlı LRU. Uygulama içindeki
+    # yazmalar commit anında ilgili kayıtları düşürür; yükleme sırasında commit olduysa yüklenen kayıt saklanmaz.
+    def __init__(self, capacity=ENTITY_CACHE_SIZE, ttl=ENTITY_CACHE_TTL):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.records = {Book: BookRecord, Member: MemberRecord}
+        self.entries = {Book: OrderedDict(), Member: OrderedDict()}
+        self.isbn_index = {}
+        self.generation = 0
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def cached(self, entity, entity_id):
+        with self.lock:
+            entry = self.entries[entity].get(entity_id)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                self.entries[entity].move_to_end(entity_id)
+                self.hits[entity.__tablename__] += 1
+                return entry[1]
+            self.misses[entity.__tablename__] += 1
+            return None
+
+    def put(self, entity, record, generation):
+        with self.lock:
+            if generation != self.generation:
+                return
+            entries = self.entries[entity]
+            entries[record.id] = (time.monotonic(), record)
+            entries.move_to_end(record.id)
+            if entity is Book:
+                self.isbn_index[record.isbn] = record.id
+            while len(entries) > self.capacity:
+                _, (_, evicted) = entries.popitem(last=False)
+                if entity is Book and self.isbn_index.get(evicted.isbn) == evicted.id:
+                    del self.isbn_index[evicted.isbn]
+
+    def load(self, session, entity, criterion):
+        generation = self.generation
+        row = session.query(*entity.__table__.columns).filter(criterion).first()
+        if row is None:
+            return None
+        record = self.records[entity](*row)
+        self.put(entity, record, generation)
+        return record
+
+    def get(self, session, entity, entity_id):
+        record = self.cached(entity, entity_id)
+        if record is None:
+            record = self.load(session, entity, entity.id == entity_id)
+        return record
+
+    def get_book_by_isbn(self, session, isbn):
+        book_id = self.isbn_index.get(isbn)
+        record = self.cached(Book, book_id) if book_id is not None else None
+        if record is None or record.isbn != isbn:
+            if book_id is None:
+                self.misses[Book.__tablename__] += 1
+            record = self.load(session, Book, Book.isbn == isbn)
+        return record
+
+    def invalidate(self, changes):
+        with self.lock:
+            self.generation += 1
+            for entity, entity_id in changes:
+                entry = self.entries.get(entity, {}).pop(entity_id, None)
+                if entry is not None and entity is Book and self.isbn_index.get(entry[1].isbn) == entity_id:
+                    del self.isbn_index[entry[1].isbn]
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            for entries in self.entries.values():
+                entries.clear()
+            self.isbn_index.clear()
+
+    def stats(self):
+        with self.lock:
+            return {entity.__tablename__: {"size": len(entries), "hits": self.hits[entity.__tablename__],
+                                           "misses": self.misses[entity.__tablename__]}
+                    for entity, entries in self.entries.items()}
+
+class LibraryService:
+    # Arayüzden bağımsız iş katmanı. Her çağrı kendi oturumunu açar, yazma işlemleri tek işlemde commit edilir;
+    # kullanıcıya gösterilecek hatalar LibraryError olarak yükseltilir. PyQt penceresi ve HTTP sunucusu bunu kullanır.
+    def __init__(self, session_factory, collect_changes=False):
+        self.Session = session_factory
+        self.changes = ChangeTracker(session_factory, collect_changes)
+        self.entities = EntityCache()
+        self.changes.listeners.append(self.entities.invalidate)
+        self.snapshot = CatalogSnapshot()
+        self.changes.listeners.append(self.snapshot.invalidate)
+        self.rollups = RollupBuilder(session_factory)
+
+    @contextmanager
+    def reading(self, session=None):
+        if session is not None:
+            yield session
+            return
+        with self.Session() as session:
+            yield session
+
+    def writing(self):
+        return self.Session.begin()
+
+    @staticmethod
+    def validate_book(isbn, title, author, publisher, publication_year, page_count, genre, status):
+        if not isbn or not title or not author or not publisher or not publication_year or not page_count \
+                or not genre or not status:
+            raise LibraryError("Lütfen tüm alanları doldurun.")
+        if status not in BOOK_STATUSES:
+            raise LibraryError("Geçersiz kitap durumu: " + status)
+
+    @staticmethod
+    def validate_member(full_name, membership_type, registration_date, contact_info):
+        if not full_name or not membership_type or not registration_date or not contact_info:
+            raise LibraryError("Lütfen tüm alanları doldurun.")
+        if membership_type not in MEMBERSHIP_TYPES:
+            raise LibraryError("Geçersiz üyelik türü: " + membership_type)
+
+    def get_books(self, book_ids: list, session=None) -> list:
+        with self.reading(session) as session:
+            return book_records(session, book_ids)
+
+    def get_book(self, book_id: int, session=None) -> BookRecord:
+        with self.reading(session) as session:
+            book = self.entities.get(session, Book, book_id)
+            if book is None:
+                raise NotFoundError("Bu kitap bulunamadı.")
+            return book
+
+    def get_book_by_isbn(self, isbn: str, session=None) -> BookRecord:
+        with self.reading(session) as session:
+            book = self.entities.get_book_by_isbn(session, isbn)
+            if book is None:
+                raise NotFoundError("Bu kitap bulunamadı.")
+            return book
+
+    @retry_on_busy
+    def add_book(self, isbn: str, title: str, author: str, publisher: str, publication_year: int, page_count: int,
+                 genre: str, status: str = "Mevcut", copies: int = 1) -> int:
+        self.validate_book(isbn, title, author, publisher, publication_year, page_count, genre, status)
+        if copies < 1:
+            raise LibraryError("Kopya sayısı en az 1 olmalı.")
+        with self.writing() as session:
+            if session.query(Book.id).filter_by(isbn=isbn).first():
+                raise LibraryError("Bu ISBN numarası zaten mevcut.")
+            book = Book(isbn=isbn, title=title, author=author, publisher=publisher,
+                        publication_year=publication_year, page_count=page_count, genre=genre, status=status)
+            session.add(book)
+            session.flush()
+            add_copies(session, book.id, copies, status)
+            return book.id
+
+    @retry_on_busy
+    def add_copies(self, book_id: int, count: int) -> None:
+        if count < 1:
+            raise LibraryError("Kopya sayısı en az 1 olmalı.")
+        with self.writing() as session:
+            if session.query(Book.id).filter_by(id=book_id).first() is None:
+                raise NotFoundError("Bu kitap bulunamadı.")
+            add_copies(session, book_id, count)
+
+    @retry_on_busy
+    def edit_book(self, book_id: int, isbn: str, title: str, author: str, publisher: str, publication_year: int,
+                  page_count: int, genre: str, status: str) -> None:
+        self.validate_book(isbn, title, author, publisher, publication_year, page_count, genre, status)
+        with self.writing() as session:
+            book = session.get(Book, book_id)
+            if book is None:
+                raise NotFoundError("Bu kitap bulunamadı.")
+            if session.query(Book.id).filter(Book.isbn == isbn, Book.id != book_id).first():
+                raise LibraryError("Bu ISBN numarası zaten mevcut.")
+            book.isbn = isbn
+            book.title = title
+            book.author = author
+            book.publisher = publisher
+            book.publication_year = publication_year
+            book.page_count = page_count
+            book.genre = genre
+            if status != book.status:
+                session.flush()
+                set_book_status(session, book_id, status)
+
+    @retry_on_busy
+    def delete_book(self, book_id: int) -> None:
+        with self.writing() as session:
+            book = session.get(Book, book_id)
+            if book is None:
+                raise NotFoundError("Bu kitap bulunamadı.")
+            if session.query(Lending.id).filter_by(book_id=book_id).first() or \
+                    session.query(LendingHistory.id).filter_by(book_id=book_id).first():
+                raise LibraryError("Bu kitap ödünç verilmiş, silinemez.")
+            if session.query(Hold.id).filter(Hold.book_id == book_id, Hold.status.in_(HOLD_ACTIVE)).first():
+                raise LibraryError("Bu kitap için bekleyen ayırtmalar var, silinemez.")
+            session.query(Hold).filter_by(book_id=book_id).delete(synchronize_session=False)
+            session.query(Copy).filter_by(book_id=book_id).delete(synchronize_session=False)
+            session.delete(book)
+
+    def get_member(self, member_id: int, session=None) -> MemberRecord:
+        with self.reading(session) as session:
+            member = self.entities.get(session, Member, member_id)
+            if member is None:
+                raise NotFoundError("Bu üye bulunamadı.")
+            return member
+
+    @retry_on_busy
+    def add_member(self, full_name: str, membership_type: str, registration_date: date, contact_info: str) -> int:
+        self.validate_member(full_name, membership_type, registration_date, contact_info)
+        with self.writing() as session:
+            member = Member(full_name=full_name, membership_type=membership_type,
+                            registration_date=registration_date, contact_info=contact_info)
+            session.add(member)
+            session.flush()
+            return member.id
+
+    @retry_on_busy
+    def edit_member(self, member_id: int, full_name: str, membership_type: str, registration_date: date,
+                    contact_info: str) -> None:
+        self.validate_member(full_name, membership_type, registration_date, contact_info)
+        with self.writing() as session:
+            member = session.get(Member, member_id)
+            if member is None:
+                raise NotFoundError("Bu üye bulunamadı.")
+            member.full_name = full_name
+            member.membership_type = membership_type
+            member.registration_date = registration_date
+            member.contact_info = contact_info
+
+    @retry_on_busy
+    def delete_member(self, member_id: int) -> None:
+        with self.writing() as session:
+            member = session.get(Member, member_id)
+            if member is None:
+                raise NotFoundError("Bu üye bulunamadı.")
+            if session.query(Lending.id).filter_by(member_id=member_id).first() or \
+                    session.query(LendingHistory.id).filter_by(member_id=member_id).first():
+                raise LibraryError("Bu üye ödünç verilmiş kitapların var, silinemez.")
+            if session.query(Hold.id).filter(Hold.member_id == member_id, Hold.status.in_(HOLD_ACTIVE)).first():
+                raise LibraryError("Bu üyenin bekleyen ayırtmaları var, silinemez.")
+            session.query(Hold).filter_by(member_id=member_id).delete(synchronize_session=False)
+            session.delete(member)
+
+    @retry_on_busy
+    def lend_books(self, member_id: int, book_ids: list, lending_date: date, return_date: date) -> list:
+        with self.writing() as session:
+            lendings = checkout_books(session, member_id, book_ids, lending_date, return_date, self.entities)
+            session.flush()
+            return [lending.id for lending in lendings]
+
+    def lend_book(self, book_id: int, member_id: int, lending_date: date, return_date: date) -> int:
+        return self.lend_books(member_id, [book_id], lending_date, return_date)[0]
+
+    @retry_on_busy
+    def return_lending(self, lending_id: int) -> list:
+        with self.writing() as session:
+            return return_lending_by_id(session, lending_id)
+
+    @retry_on_busy
+    def return_book(self, book_id: int, member_id: int) -> list:
+        with self.writing() as session:
+            return return_book_for_member(session, book_id, member_id, self.entities)
+
+    @retry_on_busy
+    def place_hold(self, book_id: int, member_id: int) -> tuple:
+        try:
+            with self.writing() as session:
+                hold = place_hold(session, book_id, member_id, self.entities)
+                return hold.id, hold_position(session, hold)
+        except IntegrityError:
+            raise LibraryError("Bu üyenin bu kitap için zaten ayırtması var.")
+
+    @retry_on_busy
+    def cancel_hold(self, hold_id: int) -> None:
+        with self.writing() as session:
+            cancel_hold_by_id(session, hold_id)
+
+    def book_holds(self, book_id: int, limit: int = None, session=None) -> list:
+        with self.reading(session) as session:
+            return [to_record(HoldRecord, hold) for hold in session.query(Hold).filter(
+                Hold.book_id == book_id, Hold.status == 'Bekliyor').order_by(Hold.priority, Hold.id).limit(limit)]
+
+    def member_holds(self, member_id: int, session=None) -> list:
+        with self.reading(session) as session:
+            return [to_record(HoldRecord, hold) for hold in session.query(Hold).filter(
+                Hold.member_id == member_id, Hold.status.in_(HOLD_ACTIVE)).order_by(Hold.id)]
+
+    def assigned_holds(self, lending_ids: list, session=None) -> list:
+        # İade masası için: geri alınan kopyalardan ayırtmaya ayrılanlar (rafa kaldırılmamalı).
+        with self.reading(session) as session:
+            copy_ids = select(Lending.copy_id).where(Lending.id.in_(lending_ids))
+            return [to_record(HoldRecord, hold) for hold in session.query(Hold).filter(
+                Hold.copy_id.in_(copy_ids), Hold.status == 'Ayrıldı').order_by(Hold.id)]
+
+    def search_books(self, search_term: str, status: str = "Tüm Kitaplar", limit: int = None,
+                     session=None) -> list:
+        with self.reading(session) as session:
+            return [to_record(BookRecord, book) for book in search_catalog(session, search_term, status, limit)]
+
+    def book_results(self, search_term: str = "", status: str = "Tüm Kitaplar", session=None) -> BookResults:
+        with self.reading(session) as session:
+            return BookResults(session, search_term, status, self.snapshot)
+
+    def filter_books(self, status: str = "Tüm Kitaplar", limit: int = None, session=None) -> list:
+        # Kimlikler sütunsal kopyadan süzülür; kayıtlar yalnızca döndürülecek kitaplar için okunur.
+        with self.reading(session) as session:
+            with self.snapshot.current(session) as snapshot:
+                book_ids = snapshot.book_ids(status=None if status == "Tüm Kitaplar" else status)
+            return book_records(session, book_ids[:limit])
+
+    def most_borrowed(self, limit: int = STATS_TOP_K, session=None) -> list:
+        with self.reading(session) as session:
+            return [tuple(row) for row in CirculationStats(session).most_borrowed(limit)]
+
+    def least_borrowed(self, limit: int = STATS_TOP_K, session=None) -> list:
+        with self.reading(session) as session:
+            return [tuple(row) for row in CirculationStats(session).least_borrowed(limit)]
+
+    def count_lendings_per_book(self, session=None) -> dict:
+        with self.reading(session) as session:
+            with self.snapshot.current(session, lendings=True) as snapshot:
+                return snapshot.lendings_per_book()
+
+    def catalog_breakdown(self, dimension: str, date_from: date = None, date_to: date = None, limit: int = None,
+                          status: str = None, session=None) -> list:
+        if dimension not in CatalogSnapshot.encoded:
+            raise LibraryError("Geçersiz boyut: " + dimension)
+        with self.reading(session) as session:
+            with self.snapshot.current(session, lendings=True) as snapshot:
+                return snapshot.breakdown(dimension, date.today(), date_from, date_to, limit, status=status)
+
+    def overdue(self, today: date = None, limit: int = None, session=None) -> list:
+        with self.reading(session) as session:
+            return list(islice(OverdueReport(today).rows(session), limit))
+
+    def refresh_rollups(self) -> None:
+        # Okuma çağrıları özetleri güncellemez; bu çağrı zamanlayıcılardan (masaüstü, HTTP sunucusu) ve stats
+        # komutundan yapılır.
+        self.rollups.run()
+
+    def circulation_report(self, dimension: str, date_from: date, date_to: date, limit: int = STATS_TOP_K,
+                           session=None) -> list:
+        with self.reading(session) as session:
+            return CirculationRollups(session).report(dimension, date_from, date_to, limit)
+
+    def circulation_totals(self, date_from: date, date_to: date, session=None) -> tuple:
+        with self.reading(session) as session:
+            return CirculationRollups(session).totals(date_from, date_to)
+
+    def circulation_daily(self, date_from: date, date_to: date, session=None) -> list:
+        with self.reading(session) as session:
+            return [tuple(row) for row in CirculationRollups(session).daily(date_from, date_to)]
+
+class LibraryHTTPServer:
+    # Masaüstü ve kiosk istemcileri için küçük bir JSON/HTTP arayüzü. Bağlantılar asyncio ile karşılanır,
+    # veritabanı çağrıları ortak motoru paylaşan iş parçacığı havuzunda çalışır. HTTP/1.1 keep-alive desteklenir.
+    reasons = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               500: "Internal Server Error"}
+
+    def __init__(self, service, host="127.0.0.1", port=8080, workers=16):
+        self.service = service
+        self.host = host
+        self.port = port
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.routes = [
+            ("GET", r"/books", self.list_books),
+            ("POST", r"/books", self.create_book),
+            ("GET", r"/books/(\d+)", self.show_book),
+            ("PUT", r"/books/(\d+)", self.update_book),
+            ("DELETE", r"/books/(\d+)", self.remove_book),
+            ("POST", r"/books/(\d+)/copies", self.add_copies),
+            ("POST", r"/members", self.create_member),
+            ("GET", r"/members/(\d+)", self.show_member),
+            ("PUT", r"/members/(\d+)", self.update_member),
+            ("DELETE", r"/members/(\d+)", self.remove_member),
+            ("POST", r"/lendings", self.create_lendings),
+            ("POST", r"/lendings/(\d+)/return", self.return_lending),
+            ("POST", r"/returns", self.return_book),
+            ("POST", r"/holds", self.create_hold),
+            ("DELETE", r"/holds/(\d+)", self.cancel_hold),
+            ("GET", r"/books/(\d+)/holds", self.book_holds),
+            ("GET", r"/members/(\d+)/holds", self.member_holds),
+            ("GET", r"/stats/most-borrowed", self.most_borrowed),
+            ("GET", r"/stats/least-borrowed", self.least_borrowed),
+            ("GET", r"/stats/circulation", self.circulation),
+            ("GET", r"/stats/daily", self.circulation_daily),
+            ("GET", r"/stats/catalog", self.catalog),
+            ("GET", r"/overdue", self.overdue),
+        ]
+        self.routes = [(method, re.compile(pattern + "$"), handler) for method, pattern, handler in self.routes]
+
+    @staticmethod
+    def book_fields(payload):
+        return dict(isbn=str(payload.get("isbn", "")), title=str(payload.get("title", "")),
+                    author=str(payload.get("author", "")), publisher=str(payload.get("publisher", "")),
+                    publication_year=int(payload.get("publication_year") or 0),
+                    page_count=int(payload.get("page_count") or 0), genre=str(payload.get("genre", "")),
+                    status=str(payload.get("status") or "Mevcut"))
+
+    @staticmethod
+    def member_fields(payload):
+        registration_date = payload.get("registration_date")
+        return dict(full_name=str(payload.get("full_name", "")),
+                    membership_type=str(payload.get("membership_type") or "Standart"),
+                    registration_date=date.fromisoformat(registration_date) if registration_date else date.today(),
+                    contact_info=str(payload.get("contact_info", "")))
+
+    @staticmethod
+    def limit(query):
+        return int(query["limit"][0]) if "limit" in query else None
+
+    def list_books(self, query, payload):
+        if "isbn" in query:
+            return 200, [self.service.get_book_by_isbn(query["isbn"][0])._asdict()]
+        status = query.get("status", ["Tüm Kitaplar"])[0]
+        if not query.get("q", [""])[0].strip():
+            return 200, [book._asdict() for book in self.service.filter_books(status, self.limit(query) or 100)]
+        books = self.service.search_books(query["q"][0], status, self.limit(query) or 100)
+        return 200, [book._asdict() for book in books]
+
+    @staticmethod
+    def id_list(value, name):
+        if not isinstance(value, list) or not value or \
+                not all(isinstance(item, int) and not isinstance(item, bool) for item in value):
+            raise LibraryError(f"{name} boş olmayan bir tam sayı listesi olmalı.")
+        return value
+
+    def create_book(self, query, payload):
+        return 201, {"id": self.service.add_book(**self.book_fields(payload), copies=int(payload.get("copies") or 1))}
+
+    def show_book(self, book_id, query, payload):
+        return 200, self.service.get_book(int(book_id))._asdict()
+
+    def update_book(self, book_id, query, payload):
+        self.service.edit_book(int(book_id), **self.book_fields(payload))
+        return 200, {"id": int(book_id)}
+
+    def remove_book(self, book_id, query, payload):
+        self.service.delete_book(int(book_id))
+        return 200, {"id": int(book_id)}
+
+    def add_copies(self, book_id, query, payload):
+        self.service.add_copies(int(book_id), int(payload.get("count") or 1))
+        return 200, self.service.get_book(int(book_id))._asdict()
+
+    def create_member(self, query, payload):
+        return 201, {"id": self.service.add_member(**self.member_fields(payload))}
+
+    def show_member(self, member_id, query, payload):
+        return 200, self.service.get_member(int(member_id))._asdict()
+
+    def update_member(self, member_id, query, payload):
+        self.service.edit_member(int(member_id), **self.member_fields(payload))
+        return 200, {"id": int(member_id)}
+
+    def remove_member(self, member_id, query, payload):
+        self.service.delete_member(int(member_id))
+        return 200, {"id": int(member_id)}
+
+    def create_lendings(self, query, payload):
+        book_ids = self.id_list(payload["book_ids"], "book_ids") if "book_ids" in payload else \
+            [int(payload["book_id"])]
+        lending_date = date.fromisoformat(payload["lending_date"]) if payload.get("lending_date") else date.today()
+        return_date = date.fromisoformat(payload["return_date"])
+        lending_ids = self.service.lend_books(int(payload["member_id"]), book_ids, lending_date, return_date)
+        return 201, {"lending_ids": lending_ids}
+
+    def returned(self, lending_ids):
+        return {"returned": lending_ids, "holds": [hold._asdict() for hold in self.service.assigned_holds(lending_ids)]}
+
+    def return_lending(self, lending_id, query, payload):
+        return 200, self.returned(self.service.return_lending(int(lending_id)))
+
+    def return_book(self, query, payload):
+        return 200, self.returned(self.service.return_book(int(payload["book_id"]), int(payload["member_id"])))
+
+    def create_hold(self, query, payload):
+        hold_id, position = self.service.place_hold(int(payload["book_id"]), int(payload["member_id"]))
+        return 201, {"id": hold_id, "position": position}
+
+    def cancel_hold(self, hold_id, query, payload):
+        self.service.cancel_hold(int(hold_id))
+        return 200, {"id": int(hold_id)}
+
+    def book_holds(self, book_id, query, payload):
+        return 200, [hold._asdict() for hold in self.service.book_holds(int(book_id), self.limit(query) or 100)]
+
+    def member_holds(self, member_id, query, payload):
+        return 200, [hold._asdict() for hold in self.service.member_holds(int(member_id))]
+
+    def most_borrowed(self, query, payload):
+        rows = self.service.most_borrowed(self.limit(query) or STATS_TOP_K)
+        return 200, [{"book_id": book_id, "title": title, "loan_count": count} for book_id, title, count in rows]
+
+    def least_borrowed(self, query, payload):
+        rows = self.service.least_borrowed(self.limit(query) or STATS_TOP_K)
+        return 200, [{"book_id": book_id, "title": title, "loan_count": count} for book_id, title, count in rows]
+
+    @staticmethod
+    def date_range(query):
+        date_to = date.fromisoformat(query["to"][0]) if "to" in query else date.today()
+        date_from = date.fromisoformat(query["from"][0]) if "from" in query else \
+            date_to.fromordinal(date_to.toordinal() - 30)
+        return date_from, date_to
+
+    def circulation(self, query, payload):
+        date_from, date_to = self.date_range(query)
+        rows = self.service.circulation_report(query.get("dimension", ["genre"])[0], date_from, date_to,
+                                               self.limit(query) or STATS_TOP_K)
+        return 200, [row._asdict() for row in rows]
+
+    def circulation_daily(self, query, payload):
+        date_from, date_to = self.date_range(query)
+        return 200, [{"day": day.isoformat(), "loans": loans, "returns": returns, "overdues": overdues}
+                     for day, loans, returns, overdues in self.service.circulation_daily(date_from, date_to)]
+
+    def catalog(self, query, payload):
+        date_from = date.fromisoformat(query["from"][0]) if "from" in query else None
+        date_to = date.fromisoformat(query["to"][0]) if "to" in query else None
+        rows = self.service.catalog_breakdown(query.get("dimension", ["genre"])[0], date_from, date_to,
+                                              self.limit(query), query.get("status", [None])[0])
+        return 200, [row._asdict() for row in rows]
+
+    def overdue(self, query, payload):
+        today = date.fromisoformat(query["date"][0]) if "date" in query else None
+        rows = self.service.overdue(today, self.limit(query) or 100)
+        return 200, [dict(zip(["lending_id", "book_id", "title", "member_id", "full_name", "lending_date",
+                               "return_date", "days_overdue"], row)) for row in rows]
+
+    def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(url.path)
+            if not match:
+                continue
+            allowed = True
+            if route_method != method:
+                continue
+            try:
+                payload = json.loads(body) if body else {}
+                if not isinstance(payload, dict):
+                    raise LibraryError("İstek gövdesi bir JSON nesnesi olmalı.")
+                return handler(*match.groups(), parse_qs(url.query), payload)
+            except NotFoundError as e:
+                return 404, {"error": str(e)}
+            except (LibraryError, KeyError, ValueError, TypeError) as e:
+                return 400, {"error": str(e)}
+            except Exception as e:
+                return 500, {"error": str(e)}
+        return (405, {"error": "method not allowed"}) if allowed else (404, {"error": "not found"})
+
+    async def handle_connection(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length") or 0))
+                status, result = await loop.run_in_executor(self.pool, self.dispatch, method, target, body)
+                data = json.dumps(result, ensure_ascii=False, default=str).encode("utf-8")
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                writer.write((f"HTTP/1.1 {status} {self.reasons[status]}\r\n"
+                              f"Content-Type: application/json; charset=utf-8\r\n"
+                              f"Content-Length: {len(data)}\r\n"
+                              f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode("latin-1")
+                             + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def refresh_rollups(self, interval=ROLLUP_INTERVAL_MS):
+        # Özetler istekler sırasında değil, burada belirli aralıkla güncellenir.
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(self.pool, self.service.refresh_rollups)
+            except Exception as e:
+                print(f"özetler güncellenemedi: {e}", file=sys.stderr)
+            await asyncio.sleep(interval / 1000)
+
+    async def serve_forever(self):
+        server = await asyncio.start_server(self.handle_connection, self.host, self.port, backlog=1024)
+        refresher = asyncio.create_task(self.refresh_rollups())
+        async with server:
+            try:
+                await server.serve_forever()
+            finally:
+                refresher.cancel()
+
+GenerateResult = namedtuple("GenerateResult", ["books", "members", "lendings", "open_lendings"])
+
+class DataGenerator:
+    # Gerçekçi çarpıklıkla sentetik veri üretir: kitap ve üye popülerliği Zipf dağılımına, ödünç tarihleri
+    # son yıllara doğru artan bir eğriye uyar. Aynı tohumla aynı veri üretilir. Satırlar toplu INSERT ile yazılır.
+    syllables = ["ka", "le", "mi", "ro", "sa", "tu", "ne", "ya", "dı", "şe", "gö", "çi", "ün", "ar", "ğı", "bo",
+                 "el", "ze", "ha", "pı", "ve", "lu", "de", "ku", "rü", "iş", "on", "ma", "ci", "ta"]
+    genres = [("Roman", 30), ("Bilim Kurgu", 10), ("Tarih", 9), ("Çocuk", 12), ("Polisiye", 8), ("Şiir", 5),
+              ("Felsefe", 4), ("Bilim", 7), ("Biyografi", 5), ("Fantastik", 6), ("Deneme", 4)]
+    membership_types = [("Standart", 85), ("Premium", 15)]
+    loan_days = {"Standart": 14, "Premium": 21}
+    lending_insert = ("INSERT INTO lendings (book_id, copy_id, member_id, lending_date, return_date, returned) "
+                      "VALUES (?, ?, ?, ?, ?, ?)")
+    max_copies = 40
+
+    def __init__(self, engine, books=10000, members=1000, lendings=100000, open_ratio=0.05, years=3, seed=13,
+                 batch_size=50000, progress=None):
+        self.engine = engine
+        self.books = books
+        self.members = members
+        self.lendings = lendings
+        self.open_ratio = open_ratio
+        self.years = years
+        self.batch_size = batch_size
+        self.progress = progress
+        self.random = random.Random(seed)
+        self.today = date.today()
+
+    def zipf_weights(self, count, exponent):
+        weights = [1.0 / (rank ** exponent) for rank in range(1, count + 1)]
+        self.random.shuffle(weights)
+        total = 0.0
+        cumulative = []
+        for weight in weights:
+            total += weight
+            cumulative.append(total)
+        return cumulative
+
+    def words(self, count):
+        words = set()
+        while len(words) < count:
+            words.add("".join(self.random.choice(self.syllables) for _ in range(self.random.randint(2, 4))))
+        return sorted(words)
+
+    def insert(self, connection, table, rows):
+        for start in range(0, len(rows), self.batch_size):
+            connection.execute(table.insert(), rows[start:start + self.batch_size])
+
+    def generate_members(self, connection, first_id):
+        names = [word.capitalize() for word in self.words(600)]
+        types = [name for name, _ in self.membership_types]
+        type_weights = [weight for _, weight in self.membership_types]
+        membership = []
+        batch = []
+        for member_id in range(first_id, first_id + self.members):
+            membership_type = self.random.choices(types, type_weights)[0]
+            membership.append(membership_type)
+            full_name = f"{self.random.choice(names)} {self.random.choice(names)}"
+            batch.append(dict(id=member_id, full_name=full_name, membership_type=membership_type,
+                              registration_date=self.today.fromordinal(
+                                  self.today.toordinal() - self.random.randint(0, 365 * (self.years + 2))),
+                              contact_info=f"uye{member_id}@example.com"))
+            if len(batch) >= self.batch_size:
+                self.insert(connection, Member.__table__, batch)
+                batch = []
+        self.insert(connection, Member.__table__, batch)
+        return membership
+
+    def copy_counts(self, cumulative):
+        # Popüler kitaplardan daha çok nüsha alınır: en popüler kitap max_copies + 1, kuyruktakiler 1 kopya.
+        weights = [cumulative[0]] + [cumulative[i] - cumulative[i - 1] for i in range(1, len(cumulative))]
+        top = max(weights, default=1.0)
+        return array("l", [1 + int(self.max_copies * weight / top) for weight in weights])
+
+    def generate_copies(self, connection, first_book, copies, open_set):
+        first_copy = (connection.execute(select(func.max(Copy.id))).scalar() or 0) + 1
+        first_copies = array("l", [0]) * len(copies)
+        batch = []
+        copy_id = first_copy
+        for book, count in enumerate(copies):
+            first_copies[book] = copy_id
+            for index in range(count):
+                status = "Kiralık" if index == 0 and book in open_set else "Mevcut"
+                batch.append(dict(id=copy_id + index, book_id=first_book + book, status=status))
+            copy_id += count
+            if len(batch) >= self.batch_size:
+                self.insert(connection, Copy.__table__, batch)
+                batch = []
+        self.insert(connection, Copy.__table__, batch)
+        return first_copies
+
+    def generate_books(self, connection, first_id, copies, open_set):
+        vocabulary = self.words(3000)
+        authors = [f"{word.capitalize()} {other.capitalize()}"
+                   for word, other in zip(self.words(2000), reversed(self.words(2000)))]
+        author_weights = self.zipf_weights(len(authors), 1.0)
+        publishers = [f"{word.capitalize()} Yayınları" for word in self.words(400)]
+        publisher_weights = self.zipf_weights(len(publishers), 1.2)
+        word_weights = self.zipf_weights(len(vocabulary), 1.0)
+        genres = [name for name, _ in self.genres]
+        genre_weights = [weight for _, weight in self.genres]
+        batch = []
+        for book, book_id in enumerate(range(first_id, first_id + self.books)):
+            available = copies[book] - (book in open_set)
+            title = " ".join(self.random.choices(vocabulary, cum_weights=word_weights,
+                                                 k=self.random.randint(1, 4))).capitalize()
+            batch.append(dict(id=book_id, isbn=f"978{book_id:010d}", title=title,
+                              author=self.random.choices(authors, cum_weights=author_weights)[0],
+                              publisher=self.random.choices(publishers, cum_weights=publisher_weights)[0],
+                              publication_year=min(self.today.year, int(self.random.triangular(1900, self.today.year,
+                                                                                               2015))),
+                              page_count=self.random.randint(48, 900),
+                              genre=self.random.choices(genres, genre_weights)[0],
+                              status="Mevcut" if available else "Kiralık", loan_count=0,
+                              total_copies=copies[book], available_copies=available))
+            if len(batch) >= self.batch_size:
+                self.insert(connection, Book.__table__, batch)
+                batch = []
+        self.insert(connection, Book.__table__, batch)
+
+    def run(self):
+        with self.engine.connect() as connection:
+            first_book = (connection.execute(select(func.max(Book.id))).scalar() or 0) + 1
+            first_member = (connection.execute(select(func.max(Member.id))).scalar() or 0) + 1
+        book_weights = self.zipf_weights(self.books, 1.07)
+        member_weights = self.zipf_weights(self.members, 0.8)
+        loan_counts = array("l", [0]) * self.books
+        open_books = self.random.sample(range(self.books), int(self.books * self.open_ratio))
+        open_set = set(open_books)
+        copies = self.copy_counts(book_weights)
+        history_days = 365 * self.years
+        with self.engine.begin() as connection:
+            membership = self.generate_members(connection, first_member)
+            self.generate_books(connection, first_book, copies, open_set)
+            first_copies = self.generate_copies(connection, first_book, copies, open_set)
+        if self.progress:
+            self.progress("books", self.books)
+        written = 0
+        while written < self.lendings:
+            count = min(self.batch_size, self.lendings - written)
+            books = self.random.choices(range(self.books), cum_weights=book_weights, k=count)
+            members = self.random.choices(range(self.members), cum_weights=member_weights, k=count)
+            batch = []
+            for book, member in zip(books, members):
+                loan_counts[book] += 1
+                # Karekök, tarihleri geçmişe göre son günlere yığar: kütüphane kullanımı zamanla artar.
+                age = 30 + int(history_days * (1 - self.random.random() ** 0.5))
+                lending_date = self.today.fromordinal(self.today.toordinal() - age)
+                return_date = self.today.fromordinal(lending_date.toordinal() + self.loan_days[membership[member]])
+                copy_id = first_copies[book] + self.random.randrange(copies[book])
+                batch.append((first_book + book, copy_id, first_member + member, lending_date.isoformat(),
+                              return_date.isoformat(), 1))
+            # Milyonlarca satırda ORM/Core parametre işleme maliyeti baskın çıktığından sürücüye doğrudan demet verilir.
+            with self.engine.begin() as connection:
+                connection.exec_driver_sql(self.lending_insert, batch)
+            written += count
+            if self.progress:
+                self.progress("lendings", written)
+        with self.engine.begin() as connection:
+            batch = []
+            for book in open_books:
+                loan_counts[book] += 1
+                member = self.random.choices(range(self.members), cum_weights=member_weights)[0]
+                lending_date = self.today.fromordinal(self.today.toordinal() - self.random.randint(0, 40))
+                return_date = self.today.fromordinal(lending_date.toordinal() + self.loan_days[membership[member]])
+                batch.append(dict(book_id=first_book + book, copy_id=first_copies[book],
+                                  member_id=first_member + member, lending_date=lending_date, return_date=return_date, returned=False))
+            self.insert(connection, Lending.__table__, batch)
+            statement = Book.__table__.update().where(Book.id == bindparam("book_id")).values(
+                loan_count=bindparam("new_count"))
+            batch = []
+            for book, count in enumerate(loan_counts):
+                if count:
+                    batch.append(dict(book_id=first_book + book, new_count=count))
+                if len(batch) >= self.batch_size:
+                    connection.execute(statement, batch)
+                    batch = []
+            if batch:
+                connection.execute(statement, batch)
+            connection.execute(text("ANALYZE"))
+        return GenerateResult(self.books, self.members, self.lendings + len(open_books), len(open_books))
+
+class LibraryBenchmark:
+    # Sıcak yolları gerçek kod üzerinden ölçer ve karşılaştırılabilir JSON üretir. Ödünç/iade ölçümleri
+    # veriyi değiştirdiği için üretilmiş (generate) bir veritabanı kopyası üzerinde çalıştırılmalıdır.
+    def __init__(self, engine, repeat=20, seed=13):
+        self.engine = engine
+        self.Session = sessionmaker(bind=engine)
+        self.service = LibraryService(self.Session)
+        self.repeat = repeat
+        self.random = random.Random(seed)
+
+    @staticmethod
+    def summary(timings):
+        timings = sorted(timings)
+        milliseconds = lambda seconds: round(seconds * 1000, 3)
+        return {"n": len(timings), "min_ms": milliseconds(timings[0]),
+                "median_ms": milliseconds(statistics.median(timings)),
+                "p95_ms": milliseconds(timings[min(len(timings) - 1, int(len(timings) * 0.95))]),
+                "mean_ms": milliseconds(statistics.fmean(timings)), "max_ms": milliseconds(timings[-1])}
+
+    def measure(self, operation, arguments):
+        timings = []
+        for argument in arguments:
+            started = time.perf_counter()
+            operation(argument)
+            timings.append(time.perf_counter() - started)
+        return self.summary(timings)
+
+    def search_terms(self):
+        with self.Session() as session:
+            titles = [title for title, in session.query(Book.title).order_by(Book.id).limit(2000)]
+        words = [word for title in titles for word in re.findall(r"\w+", title)] or ["kitap"]
+        return [self.random.choice(words)[:self.random.randint(2, 6)] for _ in range(self.repeat)]
+
+    def available_books(self, count):
+        with self.Session() as session:
+            return [book_id for book_id, in session.query(Book.id).filter(Book.status == "Mevcut")
+                    .order_by(func.random()).limit(count)]
+
+    def rollup_dimensions(self):
+        # İlk toplama ölçüme katılmasın diye özetler önceden güncellenir.
+        self.service.refresh_rollups()
+        return list(ROLLUP_DIMENSIONS) * max(1, self.repeat // len(ROLLUP_DIMENSIONS))
+
+    def load_snapshot(self, _):
+        self.service.snapshot.reload()
+        self.warm_snapshot(())
+
+    def warm_snapshot(self, arguments):
+        # Sütunsal kopyanın ilk yüklenmesi sorgu ölçümlerine katılmaz; catalog_snapshot_load olarak ayrıca ölçülür.
+        with self.Session() as session:
+            with self.service.snapshot.current(session, lendings=True):
+                pass
+        return list(arguments)
+
+    def refresh_lists(self, _):
+        with self.Session() as session:
+            for name in ("books", "members", "lendings"):
+                LazyTableModel(session, *LIST_VIEWS[name]).reload()
+
+    def run(self, only=None):
+        with self.Session() as session:
+            member_id = session.query(Member.id).order_by(Member.id).limit(1).scalar()
+        today = date.today()
+        due = today.fromordinal(today.toordinal() + 14)
+        books = self.available_books(self.repeat * 2)
+        lent = {}
+
+        def lend(book_id):
+            lent[book_id] = self.service.lend_book(book_id, member_id, today, due)
+
+        cases = [
+            ("search_books", lambda term: self.service.search_books(term), self.search_terms),
+            ("catalog_snapshot_load", self.load_snapshot, lambda: range(1)),
+            ("filter_books", lambda status: self.service.filter_books(status),
+             lambda: self.warm_snapshot(["Kiralık"] * self.repeat)),
+            ("refresh_lists", self.refresh_lists, lambda: range(self.repeat)),
+            ("lend_book", lend, lambda: books),
+            ("return_lending", lambda book_id: self.service.return_lending(lent[book_id]),
+             lambda: books[:len(books) // 2]),
+            ("return_book", lambda book_id: self.service.return_book(book_id, member_id),
+             lambda: books[len(books) // 2:]),
+            ("count_lendings_per_book", lambda _: self.service.count_lendings_per_book(),
+             lambda: self.warm_snapshot(range(max(1, self.repeat // 5)))),
+            ("most_borrowed", lambda _: self.service.most_borrowed(), lambda: range(self.repeat)),
+            ("catalog_breakdown", lambda dimension: self.service.catalog_breakdown(dimension),
+             lambda: self.warm_snapshot(list(CatalogSnapshot.encoded) * max(1, self.repeat // 3))),
+            ("overdue_report", lambda _: self.service.overdue(),
+             lambda: range(max(1, self.repeat // 5))),
+            ("overdue_first_page", lambda _: self.service.overdue(limit=256), lambda: range(self.repeat)),
+            ("circulation_report", lambda dimension: self.service.circulation_report(
+                dimension, today.fromordinal(today.toordinal() - 365), today), self.rollup_dimensions),
+        ]
+        results = {}
+        for name, operation, arguments in cases:
+            if only and name not in only and not (name.startswith("return") and "lend_book" in only):
+                continue
+            if name.startswith("return") and not lent:
+                continue
+            arguments = list(arguments())
+            if arguments:
+                results[name] = self.measure(operation, arguments)
+        return {"meta": self.metadata(), "results": results}
+
+    def metadata(self):
+        with self.Session() as session:
+            counts = {"books": session.query(func.count(Book.id)).scalar(),
+                      "members": session.query(func.count(Member.id)).scalar(),
+                      "lendings": session.query(func.count(Lending.id)).scalar()}
+        try:
+            commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                    cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            commit = ""
+        return {"commit": commit or None, "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+                "sqlalchemy": sqlalchemy.__version__, "repeat": self.repeat, "rows": counts}
+
+    @staticmethod
+    def compare(baseline, current, threshold=1.2):
+        regressions = []
+        for name, result in current["results"].items():
+            before = baseline.get("results", {}).get(name)
+            if not before or not before["median_ms"]:
+                continue
+            ratio = result["median_ms"] / before["median_ms"]
+            regressions.append((name, before["median_ms"], result["median_ms"], ratio, ratio > threshold))
+        return regressions
+
+class ImportProgress(QObject):
+    changed = pyqtSignal(int, int, int)
+
+def mark_changed(session, entity, entity_id):
+    session.info.setdefault("changed", set()).add((entity, entity_id))
+
+class ChangeTracker:
+    # Commit edilen kayıtları toplar; ekranlar yalnızca değişen satırları günceller.
+    # Toplu UPDATE'ler nesne üzerinden geçmediği için mark_changed ile ayrıca işaretlenir.
+    def __init__(self, session, collect=True):
+        self.changed = {}
+        self.collect = collect
+        self.listeners = []
+        self.lock = threading.Lock()
+        event.listen(session, "after_flush", self.after_flush)
+        event.listen(session, "after_commit", self.after_commit)
+        event.listen(session, "after_rollback", self.after_rollback)
+
+    def after_flush(self, session, flush_context):
+        for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+            mark_changed(session, type(instance), instance.id)
+
+    def after_commit(self, session):
+        changes = session.info.pop("changed", ())
+        if not changes:
+            return
+        for listener in self.listeners:
+            listener(changes)
+        if self.collect:
+            for entity, entity_id in changes:
+                self.mark(entity, entity_id)
+
+    def after_rollback(self, session):
+        session.info.pop("changed", None)
+
+    def mark(self, entity, entity_id):
+        with self.lock:
+            self.changed.setdefault(entity, set()).add(entity_id)
+
+    def take(self):
+        with self.lock:
+            changed, self.changed = self.changed, {}
+        return changed
+
+class WorkerSignals(QObject):
+    finished = pyqtSignal(object, object)
+    failed = pyqtSignal(object, str)
+
+class QueryWorker(QRunnable):
+    # Her iş kendi oturumunu açar; sonuç GUI iş parçacığına sinyalle döner.
+    def __init__(self, session_factory, job, on_result):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.session_factory = session_factory
+        self.job = job
+        self.on_result = on_result
+        self.signals = WorkerSignals()
+        self.cancelled = False
+        self.dbapi_connection = None
+        self.lock = threading.Lock()
+
+    def run(self):
+        if self.cancelled:
+            self.signals.finished.emit(self, None)
+            return
+        try:
+            with self.session_factory() as session:
+                with self.lock:
+                    self.dbapi_connection = session.connection().connection.dbapi_connection
+                try:
+                    result = self.job(session)
+                    session.expunge_all()
+                finally:
+                    # Bağlantı havuza dönmeden önce bırakılır; geç gelen iptal onu alan başka bir sorguyu kesmez.
+                    with self.lock:
+                        self.dbapi_connection = None
+        except Exception as e:
+            self.signals.failed.emit(self, str(e))
+            return
+        self.signals.finished.emit(self, result)
+
+    def cancel(self):
+        with self.lock:
+            self.cancelled = True
+            if self.dbapi_connection is not None:
+                self.dbapi_connection.interrupt()
+
+class QueryExecutor(QObject):
+    busy_changed = pyqtSignal(bool)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, session_factory, max_threads=4, parent=None, profiler=None):
+        super().__init__(parent)
+        self.session_factory = session_factory
+        self.profiler = profiler
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self.latest = {}
+        self.running = {}
+
+    def submit(self, name, job, on_result, label=None):
+        # Aynı adla gelen yeni istek eskisini geçersiz kılar (ör. arama sürerken yeni arama).
+        previous = self.latest.get(name)
+        if previous is not None:
+            previous.cancel()
+        label = label or name
+        if self.profiler is not None:
+            job = self.profiled_job(label, job)
+            on_result = self.profiled_result(label, on_result)
+        worker = QueryWorker(self.session_factory, job, on_result)
+        worker.signals.finished.connect(self.on_finished)
+        worker.signals.failed.connect(self.on_failed)
+        self.latest[name] = worker
+        self.running[worker] = name
+        if len(self.running) == 1:
+            self.busy_changed.emit(True)
+        self.pool.start(worker)
+        return worker
+
+    def profiled_job(self, label, job):
+        def run(session):
+            with self.profiler.action(label):
+                return job(session)
+        return run
+
+    def profiled_result(self, label, on_result):
+        def deliver(result):
+            with self.profiler.populating(label):
+                on_result(result)
+        return deliver
+
+    def cancel(self, name):
+        worker = self.latest.pop(name, None)
+        if worker is not None:
+            worker.cancel()
+
+    def is_busy(self):
+        return bool(self.running)
+
+    def release(self, worker):
+        name = self.running.pop(worker, None)
+        if self.latest.get(name) is worker:
+            del self.latest[name]
+        if not self.running:
+            self.busy_changed.emit(False)
+
+    @pyqtSlot(object, object)
+    def on_finished(self, worker, result):
+        self.release(worker)
+        if not worker.cancelled:
+            worker.on_result(result)
+
+    @pyqtSlot(object, str)
+    def on_failed(self, worker, message):
+        name = self.running.get(worker)
+        self.release(worker)
+        if not worker.cancelled:
+            self.failed.emit(name, message)
+
+class KeysetQuery:
+    # Sütun listesi + ölçütler; sayfalar (key) sırasına göre "son anahtardan sonrası" olarak okunur.
+    def __init__(self, columns, criteria=(), joins=(), key=(0,), descending=False):
+        self.columns = list(columns)
+        self.criteria = list(criteria)
+        self.joins = list(joins)
+        self.key = list(key)
+        self.descending = descending
+
+    def build(self, session):
+        query = session.query(*self.columns)
+        for target, onclause in self.joins:
+            query = query.join(target, onclause)
+        return query.filter(*self.criteria)
+
+    def key_columns(self):
+        return [self.columns[i] for i in self.key]
+
+    def key_of(self, row):
+        return tuple(row[i] for i in self.key)
+
+    def page(self, session, after=None, limit=256):
+        query = self.build(session)
+        key_columns = self.key_columns()
+        if after is not None:
+            left = key_columns[0] if len(key_columns) == 1 else tuple_(*key_columns)
+            right = after[0] if len(key_columns) == 1 else tuple_(*after)
+            query = query.filter(left < right if self.descending else left > right)
+        order = [key.desc() for key in key_columns] if self.descending else key_columns
+        return [tuple(row) for row in query.order_by(*order).limit(limit)]
+
+    def follows(self, key, previous):
+        return key < previous if self.descending else key > previous
+
+    def get(self, session, row_id):
+        row = self.build(session).filter(self.columns[0] == row_id).first()
+        return None if row is None else tuple(row)
+
+    def iterate(self, session, batch_size=1000):
+        after = None
+        while True:
+            rows = self.page(session, after, batch_size)
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            after = self.key_of(rows[-1])
+
+class IdListQuery(KeysetQuery):
+    # Önceden belirlenmiş bir kimlik sırasını sayfalar (ör. sütunsal kopyadan süzülen kitaplar). Varsayılan anahtar
+    # satırın listedeki konumudur; her sayfada yalnızca o penceredeki kimlikler okunur. Ölçütler yine uygulanır, artık
+    # uymayan satırlar atlanır. Başka bir sütuna göre sıralanınca ölçütlerle olağan keyset sorgusuna döner.
+    def __init__(self, columns, ids, criteria=(), joins=()):
+        super().__init__(columns, criteria, joins, key=(len(columns),))
+        self.ids = ids
+        self.positions = None
+
+    def page(self, session, after=None, limit=256):
+        if self.key != [len(self.columns)]:
+            return super().page(session, after, limit)
+        if self.descending:
+            positions = iter(range((after[0] if after is not None else len(self.ids)) - 1, -1, -1))
+        else:
+            positions = iter(range(after[0] + 1 if after is not None else 0, len(self.ids)))
+        rows = []
+        while len(rows) < limit:
+            window = list(islice(positions, limit - len(rows)))
+            if not window:
+                break
+            found = {row[0]: tuple(row) for row in self.build(session).filter(
+                self.columns[0].in_([self.ids[position] for position in window]))}
+            rows.extend(found[self.ids[position]] + (position,) for position in window if self.ids[position] in found)
+        return rows
+
+    def get(self, session, row_id):
+        row = super().get(session, row_id)
+        if row is None or self.key != [len(self.columns)]:
+            return row
+        if self.positions is None:
+            self.positions = {book_id: position for position, book_id in enumerate(self.ids)}
+        position = self.positions.get(row_id)
+        return None if position is None else row + (position,)
+
+class LazyTableModel(QAbstractTableModel):
+    # Satırlar tablo kaydırıldıkça anahtar sırasına göre pencere pencere (keyset) yüklenir.
+    # Başlıkta gösterilenden fazla sütun verilebilir; fazlası yalnızca sıralama anahtarı olarak kullanılır.
+    loaded = pyqtSignal()
+
+    def __init__(self, session, columns, headers, criteria=(), joins=(), key=(0,), batch_size=256, executor=None,
+                 parent=None, query=None):
+        super().__init__(parent)
+        self.session = session
+        self.query = query or KeysetQuery(columns, criteria, joins, key)
+        self.default_key = list(self.query.key)
+        self.headers = list(headers)
+        self.batch_size = batch_size
+        self.executor = executor
+        self._rows = []
+        self._keys = []
+        self._exhausted = False
+        self._loading = False
+        self._generation = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        value = self._rows[index.row()][index.column()]
+        return '' if value is None else str(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # Sıralanan sütun + kimlik yeni keyset anahtarı olur; sayfalar baştan bu sırayla okunur. Sütun -1 (başlıkta
+        # sıralama göstergesi yok) varsayılan anahtara döner.
+        key = self.default_key if column < 0 else [column] if column == 0 else [column, 0]
+        descending = order == Qt.DescendingOrder
+        if key == self.query.key and descending == self.query.descending:
+            return
+        self.query.key = key
+        self.query.descending = descending
+        self.reload()
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted or self._loading:
+            return
+        after = self._keys[-1] if self._keys else None
+        if self.executor is None:
+            self.append_rows(self.query.page(self.session, after, self.batch_size))
+            return
+        self._loading = True
+        generation = self._generation
+        self.executor.submit(f"model-{id(self)}",
+                             lambda session: self.query.page(session, after, self.batch_size),
+                             lambda rows: self.append_rows(rows, generation),
+                             label=f"fetch {self.query.columns[0].class_.__tablename__}")
+
+    def append_rows(self, rows, generation=None):
+        if generation is not None:
+            if generation != self._generation:
+                return
+            self._loading = False
+        if len(rows) < self.batch_size:
+            self._exhausted = True
+        if self._keys:
+            rows = [row for row in rows if self.query.follows(self.query.key_of(row), self._keys[-1])]
+        if rows:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self._rows.extend(rows)
+            self._keys.extend(self.query.key_of(row) for row in rows)
+            self.endInsertRows()
+        self.loaded.emit()
+
+    def exhausted(self):
+        return self._exhausted
+
+    def key_position(self, key):
+        if not self.query.descending:
+            return bisect_left(self._keys, key)
+        low, high = 0, len(self._keys)
+        while low < high:
+            middle = (low + high) // 2
+            if self._keys[middle] > key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def row_id(self, row):
+        return self._rows[row][0]
+
+    def find_row(self, row_id):
+        if self.query.key == [0] and not self.query.descending:
+            position = bisect_left(self._keys, (row_id,))
+            if position < len(self._keys) and self._keys[position] == (row_id,):
+                return position
+            return -1
+        for position, row in enumerate(self._rows):
+            if row[0] == row_id:
+                return position
+        return -1
+
+    def remove_row(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._rows[row]
+        del self._keys[row]
+        self.endRemoveRows()
+
+    def apply_change(self, row_id):
+        # Tek satır yeniden okunur; ölçütlere artık uymuyorsa ya da silinmişse görünümden çıkarılır.
+        current = self.query.get(self.session, row_id)
+        position = self.find_row(row_id)
+        if current is not None:
+            key = self.query.key_of(current)
+            if position != -1 and self._keys[position] == key:
+                self._rows[position] = current
+                self.dataChanged.emit(self.index(position, 0), self.index(position, len(self.headers) - 1))
+                return
+        if position != -1:
+            self.remove_row(position)
+        if current is None:
+            return
+        # Henüz yüklenmemiş bölgeye düşen satırlar kaydırıldığında zaten gelecektir.
+        position = self.key_position(key)
+        if position == len(self._keys) and not self._exhausted:
+            return
+        self.beginInsertRows(QModelIndex(), position, position)
+        self._rows.insert(position, current)
+        self._keys.insert(position, key)
+        self.endInsertRows()
+
+    def reload(self):
+        self.beginResetModel()
+        self._rows = []
+        self._keys = []
+        self._exhausted = False
+        self._loading = False
+        self._generation += 1
+        self.endResetModel()
+        self.fetchMore()
 
 class LibraryManagement(QMainWindow):
-    def __init__(self):
+    def __init__(self, database_url=DATABASE_URL, pragmas=None, startup_report=False):
         super().__init__()
-        self.init_database()
+        self.startup_phases = []
+        self.startup_mark = self.startup_started = time.perf_counter()
+        self.startup_report = startup_report
+        self.init_database(database_url, pragmas)
         self.setGeometry(100, 100, 800, 600)
         self.book_id_input = QLineEdit()
         self.member_id_input = QLineEdit()
         self.init_ui()
+        self.mark_startup("arayüz")
+
+    def mark_startup(self, phase):
+        now = time.perf_counter()
+        self.startup_phases.append((phase, round((now - self.startup_mark) * 1000, 1)))
+        self.startup_mark = now
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.startup_mark is not None:
+            QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        # İlk olay döngüsü turu: pencere çizildi, henüz hiçbir veri sorgusu beklenmedi.
+        if self.startup_mark is None:
+            return
+        self.mark_startup("ilk çizim")
+        self.startup_phases.append(("toplam", round((time.perf_counter() - self.startup_started) * 1000, 1)))
+        self.startup_mark = None
+        self.profiler.startup = list(self.startup_phases)
+        # İlk arşivleme açılış ölçümünün ve ilk sekme sorgularının önüne geçmesin diye gecikmeli başlar.
+        QTimer.singleShot(ARCHIVE_START_DELAY_MS, self.archive_lendings)
+        if self.startup_report:
+            print("açılış: " + ", ".join(f"{phase} {ms} ms" for phase, ms in self.startup_phases), file=sys.stderr)
+
+    def init_database(self, database_url, pragmas=None):
+        engine = make_engine(database_url, pragmas=pragmas, profiled=True)
+        self.mark_startup("motor")
+        run_migrations(engine)
+        self.mark_startup("şema kontrolü")
+        self.Session = sessionmaker(bind=engine)
+        self.session = self.Session()
+        self.profiler = QueryProfiler(engine)
+        self.executor = QueryExecutor(self.Session, parent=self, profiler=self.profiler)
+        self.executor.failed.connect(self.show_query_error)
+        self.service = LibraryService(self.Session, collect_changes=True)
+        self.changes = self.service.changes
+        self.search_cache = SearchCache()
+        self.profiler.caches["kitap/üye"] = self.service.entities.stats
+        self.profiler.caches["arama"] = lambda: {"size": len(self.search_cache.entries),
+                                                 "hits": self.search_cache.hits, "misses": self.search_cache.misses}
+        self.archiver = LendingArchiver(engine)
+        self.archive_timer = QTimer(self)
+        self.archive_timer.setInterval(ARCHIVE_INTERVAL_MS)
+        self.archive_timer.timeout.connect(self.archive_lendings)
+        self.archive_timer.start()
+        self.mark_startup("oturum ve yürütücü")
+
+    def archive_lendings(self):
+        def job(session):
+            # Özetler arşivlemeden önce güncellenir; gün dönümünde gecikmeye düşenler de bu sırada sayılır.
+            self.service.refresh_rollups()
+            return self.archiver.run()
+
+        self.executor.submit("archive", job, self.show_archived)
 
-    def init_database(self):
-        engine = create_engine("sqlite:///library.db")
-        Base.metadata.create_all(engine)
-        Session = sessionmaker(bind=engine)
-        self.session = Session()
-        self.default_data()
-
-    def default_data(self):
-        if not self.session.query(Book).count():
-            self.session.add_all([
-                Book(isbn='123456789', title='Example Book 1', author='John Doe', publisher='Publisher A',
-                     publication_year=2020, page_count=200, genre='Fiction', status='Mevcut'),
-                Book(isbn='987654321', title='Example Book 2', author='Jane Smith', publisher='Publisher B',
-                     publication_year=2018, page_count=250, genre='Science', status='Mevcut')
-            ])
-        if not self.session.query(Member).count():
-            self.session.add_all([
-                Member(full_name='Alice Brown', membership_type='Standart', registration_date=datetime.now().date(),
-                       contact_info='alice@example.com'),
-                Member(full_name='Bob Green', membership_type='Premium', registration_date=datetime.now().date(),
-                       contact_info='bob@example.com')
-            ])
-        self.session.commit()
+    def show_archived(self, moved):
+        if moved:
+            self.statusBar().showMessage(f"{moved} eski ödünç kaydı arşive taşındı.", 5000)
 
     def init_ui(self):
         self.tabs = QTabWidget()
         self.setCentralWidget(self.tabs)
-        self.init_search_tab()
-        self.init_book_management_tab()
-        self.init_membership_tab()
-        self.init_lending_tab()
-        self.init_book_list_tab()
-        self.init_member_list_tab()
-        self.init_lending_list_tab()
-
-    def init_search_tab(self):
-        self.tab_search = QWidget()
-        layout = QVBoxLayout(self.tab_search)
-        self.tabs.addTab(self.tab_search, "Kitap Ara")
+        self.busy_indicator = QProgressBar()
+        self.busy_indicator.setRange(0, 0)
+        self.busy_indicator.setMaximumWidth(120)
+        self.busy_indicator.hide()
+        self.statusBar().addPermanentWidget(self.busy_indicator)
+        self.executor.busy_changed.connect(self.busy_indicator.setVisible)
+        # Sekmeler ilk açıldıklarında kurulur; liste sekmeleri verilerini de ancak o zaman arka planda çeker.
+        self.pending_tabs = {}
+        self.tabs.currentChanged.connect(self.build_tab)
+        self.add_lazy_tab("Kitap Ara", self.init_search_tab)
+        self.add_lazy_tab("Kitap İşlemleri", self.init_book_management_tab)
+        self.add_lazy_tab("Üyelik İşlemleri", self.init_membership_tab)
+        self.add_lazy_tab("Ödünç İşlemleri", self.init_lending_tab)
+        self.add_lazy_tab("Kitap Listesi", self.init_book_list_tab)
+        self.add_lazy_tab("Üye Listesi", self.init_member_list_tab)
+        self.add_lazy_tab("Ödünç Verilen Kitaplar", self.init_lending_list_tab)
+        self.add_lazy_tab("İstatistikler", self.init_statistics_tab)
+        self.add_lazy_tab("Tanılama", self.init_diagnostics_tab)
+        self.build_tab(self.tabs.currentIndex())
+
+    def add_lazy_tab(self, title, builder):
+        tab = QWidget()
+        self.pending_tabs[tab] = builder
+        self.tabs.addTab(tab, title)
+
+    def build_tab(self, index):
+        tab = self.tabs.widget(index)
+        builder = self.pending_tabs.pop(tab, None)
+        if builder is not None:
+            builder(tab)
+
+    def ensure_tab(self, builder):
+        for tab, pending in list(self.pending_tabs.items()):
+            if pending == builder:
+                del self.pending_tabs[tab]
+                builder(tab)
+
+    def init_search_tab(self, tab):
+        self.tab_search = tab
+        layout = QVBoxLayout(tab)
         self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Başlık, yazar, yayınevi veya tür")
         layout.addWidget(self.search_input)
         self.search_button = QPushButton("Ara")
         layout.addWidget(self.search_button)
         self.search_button.clicked.connect(self.search_books)
+        self.search_input.returnPressed.connect(self.search_books)
+        # Yazarken arama: son tuştan SEARCH_DEBOUNCE_MS sonra çalışır, eski sorgu yürütücüde iptal edilir.
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.live_search)
+        # Sinyal argümanı start'a aralık olarak geçmesin diye lambda ile bağlanır.
+        self.search_input.textChanged.connect(lambda *_: self.search_timer.start())
 
         self.filter_group = QGroupBox("Filtrele")
         filter_layout = QHBoxLayout(self.filter_group)
@@ -98,57 +3400,171 @@ class LibraryManagement(QMainWindow):
         filter_layout.addWidget(self.filter_by_status)
         self.filter_button = QPushButton("Filtrele")
         filter_layout.addWidget(self.filter_button)
+        self.filter_button.clicked.connect(self.filter_books)
+        self.filter_by_status.currentIndexChanged.connect(lambda *_: self.search_timer.start())
         layout.addWidget(self.filter_group)
+        self.search_summary = QLabel()
+        layout.addWidget(self.search_summary)
+        self.search_results = QListWidget()
+        layout.addWidget(self.search_results)
 
-    def search_books(self):
-        search_term = self.search_input.text().lower()
-        status = self.filter_by_status.currentText()
-        if status == "Tüm Kitaplar":
-            books = self.session.query(Book).filter(
-                Book.title.like(f"%{search_term}%") |
-                Book.author.like(f"%{search_term}%") |
-                Book.publisher.like(f"%{search_term}%") |
-                Book.genre.like(f"%{search_term}%")
-            ).all()
-        elif status == "Mevcut":
-            books = self.session.query(Book).filter_by(status='Mevcut').filter(
-                Book.title.like(f"%{search_term}%") |
-                Book.author.like(f"%{search_term}%") |
-                Book.publisher.like(f"%{search_term}%") |
-                Book.genre.like(f"%{search_term}%")
-            ).all()
-        else:
-            books = self.session.query(Book).filter_by(status='Kiralık').filter(
-                Book.title.like(f"%{search_term}%") |
-                Book.author.like(f"%{search_term}%") |
-                Book.publisher.like(f"%{search_term}%") |
-                Book.genre.like(f"%{search_term}%")
-            ).all()
+    def open_dialog(self, dialog):
+        # Kalıcı (modal) pencere olay döngüsünün bir sonraki turunda açılır; böylece doldurma süresi
+        # kullanıcının pencerede geçirdiği süreden ayrı ölçülür.
+        QTimer.singleShot(0, lambda: dialog.exec_())
+
+    def init_diagnostics_tab(self, tab):
+        self.tab_diagnostics = tab
+        layout = QVBoxLayout(tab)
+        self.diagnostics_table = QTableWidget(0, 10)
+        self.diagnostics_table.setHorizontalHeaderLabels(
+            ["Eylem", "Çağrı", "Sorgu/Çağrı", "Satır", "p50 ms", "p95 ms", "En Fazla ms", "SQL ort. ms",
+             "Doldurma ort. ms", "N+1"])
+        self.diagnostics_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.diagnostics_table.verticalHeader().hide()
+        layout.addWidget(self.diagnostics_table)
+        layout.addWidget(QLabel("Olası N+1 sorguları:"))
+        self.n_plus_one_list = QListWidget()
+        layout.addWidget(self.n_plus_one_list)
+        buttons = QHBoxLayout()
+        for label, slot in [("Yenile", self.refresh_diagnostics), ("Sıfırla", self.reset_diagnostics),
+                            ("JSON Olarak Kaydet", self.dump_diagnostics)]:
+            button = QPushButton(label)
+            button.clicked.connect(slot)
+            buttons.addWidget(button)
+        layout.addLayout(buttons)
+        self.startup_label = QLabel()
+        layout.addWidget(self.startup_label)
+        self.cache_label = QLabel()
+        layout.addWidget(self.cache_label)
+        self.tabs.currentChanged.connect(
+            lambda index: self.refresh_diagnostics() if self.tabs.widget(index) is self.tab_diagnostics else None)
+        self.refresh_diagnostics()
+
+    def refresh_diagnostics(self):
+        snapshot = self.profiler.snapshot()
+        flagged = Counter(finding["action"] for finding in snapshot["n_plus_one"])
+        self.diagnostics_table.setRowCount(len(snapshot["actions"]))
+        for row, (name, stats) in enumerate(snapshot["actions"].items()):
+            average = lambda histogram: histogram["total_ms"] / histogram["count"] if histogram["count"] else 0
+            values = [name, stats["calls"], stats["queries_per_call"], stats["rows"], stats["latency"]["p50_ms"],
+                      stats["latency"]["p95_ms"], stats["latency"]["max_ms"], round(average(stats["sql"]), 3),
+                      round(average(stats["populate"]), 3), flagged.get(name, "")]
+            for col, value in enumerate(values):
+                self.diagnostics_table.setItem(row, col, QTableWidgetItem(str(value)))
+        self.diagnostics_table.resizeColumnsToContents()
+        self.startup_label.setText("Açılış: " + ", ".join(
+            f"{phase} {ms} ms" for phase, ms in snapshot["startup"].items()))
+        self.cache_label.setText("Önbellek isabet/ıska: " + json.dumps(snapshot["caches"], ensure_ascii=False))
+        self.n_plus_one_list.clear()
+        for finding in snapshot["n_plus_one"]:
+            self.n_plus_one_list.addItem(f"{finding['action']}: {finding['max_repeats']} kez "
+                                         f"({finding['occurrences']} çağrıda) — {finding['statement']}")
+
+    def reset_diagnostics(self):
+        self.profiler.reset()
+        self.refresh_diagnostics()
+
+    def dump_diagnostics(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Tanılama Verisini Kaydet", "diagnostics.json",
+                                              "JSON (*.json)")
+        if path:
+            self.profiler.dump(path)
+
+    def show_query_error(self, name, message):
+        QMessageBox.critical(self, "Hata", f"Sorgu çalıştırılamadı: {message}")
+
+    def call_service(self, operation):
+        try:
+            result = operation()
+        except LibraryError as e:
+            QMessageBox.warning(self, "Hata", str(e))
+            return None
+        except Exception as e:
+            QMessageBox.critical(self, "Hata", f"Beklenmedik bir hata oluştu: {str(e)}")
+            return None
+        finally:
+            self.apply_pending_changes()
+        return result
+
+    @staticmethod
+    def parse_id(text_value):
+        try:
+            return int(text_value)
+        except ValueError:
+            return None
+
+    def cached_search(self, name, search_term, status, limit, on_result):
+        key = self.search_cache.key(search_term, status, limit)
+        books = self.search_cache.get(key)
+        if books is not None:
+            self.executor.cancel(name)
+            on_result(books, True)
+            return
+
+        def store(books, version=self.search_cache.version):
+            self.search_cache.put(key, books, version)
+            on_result(books, False)
 
-        dialog = BookSearchDialog(books)
-        dialog.exec_()
+        self.executor.submit(name, lambda session: self.service.search_books(search_term, status, limit,
+                                                                             session=session), store)
+
+    @instrumented
+    def live_search(self):
+        self.cached_search("live-search", self.search_input.text(), self.filter_by_status.currentText(),
+                           SEARCH_LIVE_LIMIT, self.show_live_results)
+
+    def show_live_results(self, books, cached):
+        self.search_results.clear()
+        self.search_results.addItems([f"{book.id} — {book.title} / {book.author} "
+                                      f"({book.available_copies}/{book.total_copies} mevcut)" for book in books])
+        more = "+" if len(books) >= SEARCH_LIVE_LIMIT else ""
+        self.search_summary.setText(f"{len(books)}{more} sonuç" + (" (önbellekten)" if cached else ""))
+
+    @instrumented
+    def search_books(self):
+        self.search_timer.stop()
+        self.show_book_results("search", BookSearchDialog, self.search_input.text(),
+                               self.filter_by_status.currentText())
 
+    @instrumented
     def filter_books(self):
-        status = self.filter_by_status.currentText()
-        if status == "Tüm Kitaplar":
-            books = self.session.query(Book).all()
-        elif status == "Mevcut":
-            books = self.session.query(Book).filter_by(status='Mevcut').all()
-        else:
-            books = self.session.query(Book).filter_by(status='Kiralık').all()
+        self.show_book_results("filter", BookFilterDialog, "", self.filter_by_status.currentText())
+
+    def show_book_results(self, name, dialog_type, search_term, status):
+        # Sonuçlar listeye toplanmaz; diyalog açılır ve satırlar kaydırdıkça sayfa sayfa okunur.
+        self.executor.submit(name, lambda session: self.service.book_results(search_term, status, session),
+                             lambda results: self.open_dialog(dialog_type(self.session, results, self.executor,
+                                                                          self.open_book_for_edit, self)))
 
-        dialog = BookFilterDialog(books)
-        dialog.exec_()
+    def open_book_for_edit(self, book_id):
+        try:
+            book = self.service.get_book(book_id)
+        except NotFoundError as e:
+            QMessageBox.warning(self, "Hata", str(e))
+            return
+        self.ensure_tab(self.init_book_management_tab)
+        self.tabs.setCurrentWidget(self.tab_book_management)
+        self.book_operations_menu.setCurrentWidget(self.tab_edit_book)
+        self.book_id_input_edit.setText(str(book.id))
+        self.isbn_input_edit.setText(book.isbn or "")
+        self.title_input_edit.setText(book.title or "")
+        self.author_input_edit.setText(book.author or "")
+        self.publisher_input_edit.setText(book.publisher or "")
+        self.publication_year_input_edit.setText(str(book.publication_year or ""))
+        self.page_count_input_edit.setText(str(book.page_count or ""))
+        self.genre_input_edit.setText(book.genre or "")
+        self.status_input_edit.setCurrentText(book.status)
 
-    def init_book_management_tab(self):
-        self.tab_book_management = QWidget()
-        layout = QVBoxLayout(self.tab_book_management)
-        self.tabs.addTab(self.tab_book_management, "Kitap İşlemleri")
+    def init_book_management_tab(self, tab):
+        self.tab_book_management = tab
+        layout = QVBoxLayout(tab)
         self.book_operations_menu = QTabWidget()
         layout.addWidget(self.book_operations_menu)
         self.init_add_book_tab()
         self.init_edit_book_tab()
         self.init_delete_book_tab()
+        self.init_import_books_tab()
 
     def init_add_book_tab(self):
         self.tab_add_book = QWidget()
@@ -171,33 +3587,25 @@ class LibraryManagement(QMainWindow):
         self.status_input = QComboBox()
         self.status_input.addItems(["Mevcut", "Kiralık"])
         layout.addRow("Durum:", self.status_input)
+        self.copies_input = QLineEdit("1")
+        layout.addRow("Kopya Sayısı:", self.copies_input)
         self.add_book_button = QPushButton("Kitap Ekle")
         layout.addRow(self.add_book_button)
         self.add_book_button.clicked.connect(self.add_book)
 
+    @instrumented
     def add_book(self):
-        isbn = self.isbn_input.text()
-        title = self.title_input.text()
-        author = self.author_input.text()
-        publisher = self.publisher_input.text()
-        publication_year = int(self.publication_year_input.text())
-        page_count = int(self.page_count_input.text())
-        genre = self.genre_input.text()
-        status = self.status_input.currentText()
-
-        if not isbn or not title or not author or not publisher or not publication_year or not page_count or not genre or not status:
+        try:
+            publication_year = int(self.publication_year_input.text())
+            page_count = int(self.page_count_input.text())
+            copies = int(self.copies_input.text() or 1)
+        except ValueError:
             QMessageBox.warning(self, "Hata", "Lütfen tüm alanları doldurun.")
             return
 
-        if self.session.query(Book).filter_by(isbn=isbn).first():
-            QMessageBox.warning(self, "Hata", "Bu ISBN numarası zaten mevcut.")
-            return
-
-        new_book = Book(isbn=isbn, title=title, author=author, publisher=publisher,
-                        publication_year=publication_year, page_count=page_count, genre=genre, status=status)
-        self.session.add(new_book)
-        self.session.commit()
-        self.refresh_lists()
+        self.call_service(lambda: self.service.add_book(
+            self.isbn_input.text(), self.title_input.text(), self.author_input.text(), self.publisher_input.text(),
+            publication_year, page_count, self.genre_input.text(), self.status_input.currentText(), copies))
 
     def init_edit_book_tab(self):
         self.tab_edit_book = QWidget()
@@ -225,37 +3633,44 @@ class LibraryManagement(QMainWindow):
         self.edit_book_button = QPushButton("Kitap Düzenle")
         layout.addRow(self.edit_book_button)
         self.edit_book_button.clicked.connect(self.edit_book)
+        self.copies_input_edit = QLineEdit("1")
+        self.add_copies_button = QPushButton("Kopya Ekle")
+        self.add_copies_button.clicked.connect(self.add_copies)
+        copies_row = QHBoxLayout()
+        copies_row.addWidget(self.copies_input_edit)
+        copies_row.addWidget(self.add_copies_button)
+        layout.addRow("Eklenecek Kopya:", copies_row)
 
+    @instrumented
     def edit_book(self):
-        book_id = self.book_id_input_edit.text()
-        isbn = self.isbn_input_edit.text()
-        title = self.title_input_edit.text()
-        author = self.author_input_edit.text()
-        publisher = self.publisher_input_edit.text()
-        publication_year = int(self.publication_year_input_edit.text())
-        page_count = int(self.page_count_input_edit.text())
-        genre = self.genre_input_edit.text()
-        status = self.status_input_edit.currentText()
-
-        if not isbn or not title or not author or not publisher or not publication_year or not page_count or not genre or not status:
+        book_id = self.parse_id(self.book_id_input_edit.text())
+        if book_id is None:
+            QMessageBox.warning(self, "Hata", "Bu kitap bulunamadı.")
+            return
+        try:
+            publication_year = int(self.publication_year_input_edit.text())
+            page_count = int(self.page_count_input_edit.text())
+        except ValueError:
             QMessageBox.warning(self, "Hata", "Lütfen tüm alanları doldurun.")
             return
 
-        book = self.session.query(Book).filter_by(id=book_id).first()
-        if not book:
+        self.call_service(lambda: self.service.edit_book(
+            book_id, self.isbn_input_edit.text(), self.title_input_edit.text(), self.author_input_edit.text(),
+            self.publisher_input_edit.text(), publication_year, page_count, self.genre_input_edit.text(),
+            self.status_input_edit.currentText()))
+
+    @instrumented
+    def add_copies(self):
+        book_id = self.parse_id(self.book_id_input_edit.text())
+        if book_id is None:
             QMessageBox.warning(self, "Hata", "Bu kitap bulunamadı.")
             return
-
-        book.isbn = isbn
-        book.title = title
-        book.author = author
-        book.publisher = publisher
-        book.publication_year = publication_year
-        book.page_count = page_count
-        book.genre = genre
-        book.status = status
-        self.session.commit()
-        self.refresh_lists()
+        try:
+            count = int(self.copies_input_edit.text())
+        except ValueError:
+            QMessageBox.warning(self, "Hata", "Lütfen geçerli bir kopya sayısı girin.")
+            return
+        self.call_service(lambda: self.service.add_copies(book_id, count))
 
     def init_delete_book_tab(self):
         self.tab_delete_book = QWidget()
@@ -268,27 +3683,53 @@ class LibraryManagement(QMainWindow):
         layout.addWidget(self.delete_book_button)
         self.delete_book_button.clicked.connect(self.delete_book)
 
+    @instrumented
     def delete_book(self):
-        book_id = self.book_id_input_delete.text()
-
-        book = self.session.query(Book).filter_by(id=book_id).first()
-        if not book:
+        book_id = self.parse_id(self.book_id_input_delete.text())
+        if book_id is None:
             QMessageBox.warning(self, "Hata", "Bu kitap bulunamadı.")
             return
+        self.call_service(lambda: self.service.delete_book(book_id))
 
-        lendings = self.session.query(Lending).filter_by(book_id=book_id).all()
-        if lendings:
-            QMessageBox.warning(self, "Hata", "Bu kitap ödünç verilmiş, silinemez.")
+    def init_import_books_tab(self):
+        self.tab_import_books = QWidget()
+        layout = QVBoxLayout(self.tab_import_books)
+        self.book_operations_menu.addTab(self.tab_import_books, "Toplu İçe Aktar")
+        layout.addWidget(QLabel("CSV veya JSONL dosyası sütunları: " + ", ".join(BookImporter.fields)))
+        self.import_books_button = QPushButton("Dosya Seç ve İçe Aktar")
+        layout.addWidget(self.import_books_button)
+        self.import_books_button.clicked.connect(self.import_books)
+        self.import_progress_label = QLabel()
+        layout.addWidget(self.import_progress_label)
+        layout.addStretch()
+
+    @instrumented
+    def import_books(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Kitapları İçe Aktar", "",
+                                              "Kitap dosyaları (*.csv *.jsonl *.csv.gz *.jsonl.gz)")
+        if not path:
             return
+        rejects_path = path + ".rejects.csv"
+        progress = ImportProgress(self)
+        progress.changed.connect(lambda processed, inserted, rejected: self.import_progress_label.setText(
+            f"Okunan: {processed}  Eklenen: {inserted}  Reddedilen: {rejected}"))
+        importer = BookImporter(self.session.get_bind(), progress=progress.changed.emit)
+        self.import_books_button.setEnabled(False)
+        self.executor.submit("import", lambda session: importer.run(path, rejects_path),
+                             lambda result: self.import_finished(result, rejects_path))
 
-        self.session.delete(book)
-        self.session.commit()
-        self.refresh_lists()
+    def import_finished(self, result, rejects_path):
+        self.import_books_button.setEnabled(True)
+        self.search_cache.clear()
+        message = f"{result.inserted} kitap eklendi, {result.rejected} satır reddedildi."
+        if result.rejected:
+            message += f"\nReddedilen satırlar: {rejects_path}"
+        self.refresh_book_list()
+        self.open_dialog(QMessageBox(QMessageBox.Information, "Toplu İçe Aktar", message, QMessageBox.Ok, self))
 
-    def init_membership_tab(self):
-        self.tab_membership = QWidget()
-        layout = QVBoxLayout(self.tab_membership)
-        self.tabs.addTab(self.tab_membership, "Üyelik İşlemleri")
+    def init_membership_tab(self, tab):
+        self.tab_membership = tab
+        layout = QVBoxLayout(tab)
         self.sub_tabs = QTabWidget()
         layout.addWidget(self.sub_tabs)
         self.init_add_member_tab()
@@ -313,20 +3754,11 @@ class LibraryManagement(QMainWindow):
         layout.addRow(self.add_member_button)
         self.add_member_button.clicked.connect(self.add_member)
 
+    @instrumented
     def add_member(self):
-        full_name = self.full_name_input.text()
-        membership_type = self.membership_type_input.currentText()
-        registration_date = self.registration_date_input.date().toPyDate()
-        contact_info = self.contact_info_input.text()
-
-        if not full_name or not membership_type or not registration_date or not contact_info:
-            QMessageBox.warning(self, "Hata", "Lütfen tüm alanları doldurun.")
-            return
-
-        new_member = Member(full_name=full_name, membership_type=membership_type, registration_date=registration_date, contact_info=contact_info)
-        self.session.add(new_member)
-        self.session.commit()
-        self.refresh_lists()
+        self.call_service(lambda: self.service.add_member(
+            self.full_name_input.text(), self.membership_type_input.currentText(),
+            self.registration_date_input.date().toPyDate(), self.contact_info_input.text()))
 
     def init_edit_member_tab(self):
         self.tab_edit_member = QWidget()
@@ -348,28 +3780,15 @@ class LibraryManagement(QMainWindow):
         layout.addRow(self.edit_member_button)
         self.edit_member_button.clicked.connect(self.edit_member)
 
+    @instrumented
     def edit_member(self):
-        member_id = self.member_id_input_edit.text()
-        full_name = self.full_name_input_edit.text()
-        membership_type = self.membership_type_input_edit.currentText()
-        registration_date = self.registration_date_input_edit.date().toPyDate()
-        contact_info = self.contact_info_input_edit.text()
-
-        if not full_name or not membership_type or not registration_date or not contact_info:
-            QMessageBox.warning(self, "Hata", "Lütfen tüm alanları doldurun.")
-            return
-
-        member = self.session.query(Member).filter_by(id=member_id).first()
-        if not member:
+        member_id = self.parse_id(self.member_id_input_edit.text())
+        if member_id is None:
             QMessageBox.warning(self, "Hata", "Bu üye bulunamadı.")
             return
-
-        member.full_name = full_name
-        member.membership_type = membership_type
-        member.registration_date = registration_date
-        member.contact_info = contact_info
-        self.session.commit()
-        self.refresh_lists()
+        self.call_service(lambda: self.service.edit_member(
+            member_id, self.full_name_input_edit.text(), self.membership_type_input_edit.currentText(),
+            self.registration_date_input_edit.date().toPyDate(), self.contact_info_input_edit.text()))
 
     def init_delete_member_tab(self):
         self.tab_delete_member = QWidget()
@@ -382,33 +3801,29 @@ class LibraryManagement(QMainWindow):
         layout.addWidget(self.delete_member_button)
         self.delete_member_button.clicked.connect(self.delete_member)
 
+    @instrumented
     def delete_member(self):
-        member_id = self.member_id_input_delete.text()
-
-        member = self.session.query(Member).filter_by(id=member_id).first()
-        if not member:
+        member_id = self.parse_id(self.member_id_input_delete.text())
+        if member_id is None:
             QMessageBox.warning(self, "Hata", "Bu üye bulunamadı.")
             return
+        self.call_service(lambda: self.service.delete_member(member_id))
 
-        lendings = self.session.query(Lending).filter_by(member_id=member_id).all()
-        if lendings:
-            QMessageBox.warning(self, "Hata", "Bu üye ödünç verilmiş kitapların var, silinemez.")
-            return
-
-        self.session.delete(member)
-        self.session.commit()
-        self.refresh_lists()
-
-    def init_lending_tab(self):
-        self.tab_lending = QWidget()
-        layout = QVBoxLayout(self.tab_lending)
-        self.tabs.addTab(self.tab_lending, "Ödünç İşlemleri")
+    def init_lending_tab(self, tab):
+        self.tab_lending = tab
+        layout = QVBoxLayout(tab)
         self.book_id_input = QLineEdit()
         layout.addWidget(QLabel("Kitap ID:"))
         layout.addWidget(self.book_id_input)
+        self.book_preview = QLabel()
+        layout.addWidget(self.book_preview)
+        self.book_id_input.editingFinished.connect(self.preview_book)
         self.member_id_input = QLineEdit()
         layout.addWidget(QLabel("Üye ID:"))
         layout.addWidget(self.member_id_input)
+        self.member_preview = QLabel()
+        layout.addWidget(self.member_preview)
+        self.member_id_input.editingFinished.connect(self.preview_member)
         self.lending_date_input = QDateEdit()
         self.lending_date_input.setDate(datetime.now().date())
         layout.addWidget(QLabel("Ödünç Tarihi:"))
@@ -421,6 +3836,18 @@ class LibraryManagement(QMainWindow):
         layout.addWidget(self.lend_book_button)
         self.lend_book_button.clicked.connect(self.lend_book)
 
+        self.batch_lending_button = QPushButton("Toplu Ödünç Ver")
+        layout.addWidget(self.batch_lending_button)
+        self.batch_lending_button.clicked.connect(self.show_batch_lending_dialog)
+
+        self.place_hold_button = QPushButton("Ayırt")
+        layout.addWidget(self.place_hold_button)
+        self.place_hold_button.clicked.connect(self.place_hold)
+
+        self.cancel_hold_button = QPushButton("Ayırtma İptal")
+        layout.addWidget(self.cancel_hold_button)
+        self.cancel_hold_button.clicked.connect(self.cancel_hold)
+
         self.return_button = QPushButton("İade Et")
         self.return_button.clicked.connect(self.return_lending)
         layout.addWidget(self.return_button)
@@ -437,174 +3864,206 @@ class LibraryManagement(QMainWindow):
         layout.addWidget(self.least_borrowed_button)
         self.least_borrowed_button.clicked.connect(self.display_least_borrowed_books)
 
-    def lend_book(self):
+    def describe_book(self, text_value):
+        book_id = self.parse_id(text_value.strip())
+        if book_id is None:
+            return None
         try:
-            book_id_input_text = self.book_id_input.text()
-            if not book_id_input_text:
-                QMessageBox.warning(self, "Uyarı", "Lütfen kitap ID'sini girin.")
-                return
+            book = self.service.get_book(book_id)
+        except NotFoundError:
+            return None
+        return f"{book.title} — {book.author} ({book.available_copies}/{book.total_copies} mevcut)"
 
-            book_id = int(book_id_input_text)
-            member_id_input_text = self.member_id_input.text()
-            if not member_id_input_text:
-                QMessageBox.warning(self, "Uyarı", "Lütfen üye ID'sini girin.")
-                return
-
-            member_id = int(member_id_input_text)
-            lending_date = self.lending_date_input.date().toPyDate()
-            return_date = self.return_date_input.date().toPyDate()
+    def preview_book(self):
+        self.book_preview.setText(self.describe_book(self.book_id_input.text()) or "Bu kitap bulunamadı.")
 
-            if lending_date >= return_date:
-                QMessageBox.warning(self, "Uyarı", "Teslim tarihi ödünç tarihinden önce olamaz.")
-                return
+    def preview_member(self):
+        member_id = self.parse_id(self.member_id_input.text().strip())
+        try:
+            member = self.service.get_member(member_id) if member_id is not None else None
+        except NotFoundError:
+            member = None
+        self.member_preview.setText(f"{member.full_name} ({member.membership_type})" if member else
+                                    "Bu üye bulunamadı.")
 
-            book = self.session.query(Book).filter_by(id=book_id).first()
-            if not book:
-                QMessageBox.critical(self, "Hata", "Bu kitap bulunamadı.")
-                return
+    @instrumented
+    def lend_book(self):
+        book_id_input_text = self.book_id_input.text()
+        if not book_id_input_text:
+            QMessageBox.warning(self, "Uyarı", "Lütfen kitap ID'sini girin.")
+            return
 
-            member = self.session.query(Member).filter_by(id=member_id).first()
-            if not member:
-                QMessageBox.critical(self, "Hata", "Bu üye bulunamadı.")
-                return
+        member_id_input_text = self.member_id_input.text()
+        if not member_id_input_text:
+            QMessageBox.warning(self, "Uyarı", "Lütfen üye ID'sini girin.")
+            return
 
-            if book.status != 'Mevcut':
-                QMessageBox.warning(self, "Uyarı", "Bu kitap şu anda müsait değil.")
-                return
+        book_id = self.parse_id(book_id_input_text.strip())
+        member_id = self.parse_id(member_id_input_text.strip())
+        if book_id is None or member_id is None:
+            QMessageBox.warning(self, "Uyarı", "Kitap ve üye ID'si sayı olmalıdır.")
+            return
+        lending_date = self.lending_date_input.date().toPyDate()
+        return_date = self.return_date_input.date().toPyDate()
+        self.call_service(lambda: self.service.lend_book(book_id, member_id, lending_date, return_date))
 
-            new_lending = Lending(book_id=book_id, member_id=member_id, lending_date=lending_date, return_date=return_date)
-            self.session.add(new_lending)
-            self.session.commit()
+    @instrumented
+    def place_hold(self):
+        book_id = self.parse_id(self.book_id_input.text().strip())
+        member_id = self.parse_id(self.member_id_input.text().strip())
+        if book_id is None or member_id is None:
+            QMessageBox.warning(self, "Uyarı", "Lütfen kitap ve üye ID'sini girin.")
+            return
+        result = self.call_service(lambda: self.service.place_hold(book_id, member_id))
+        if result:
+            hold_id, position = result
+            QMessageBox.information(self, "Ayırt", f"Ayırtma {hold_id} oluşturuldu. Sıradaki yeri: {position}")
 
-            book.status = 'Kiralık'
-            self.session.commit()
+    @instrumented
+    def cancel_hold(self):
+        hold_id, accepted = QInputDialog.getInt(self, "Ayırtma İptal", "Ayırtma ID:", 1, 1)
+        if accepted:
+            self.call_service(lambda: self.service.cancel_hold(hold_id))
 
-            self.refresh_lists()
-        except Exception as e:
-            QMessageBox.critical(self, "Hata", f"Beklenmedik bir hata oluştu: {str(e)}")
+    def report_assigned_holds(self, lending_ids):
+        holds = self.service.assigned_holds(lending_ids) if lending_ids else []
+        if holds:
+            QMessageBox.information(self, "Ayırtma", "\n".join(
+                f"Kitap {hold.book_id} (kopya {hold.copy_id}) {hold.member_id} numaralı üyeye ayrıldı, "
+                f"rafa kaldırmayın." for hold in holds))
 
-    def return_book(self):
-        book_id_input_text = self.book_id_input.text()
-        if not book_id_input_text:
-            QMessageBox.warning(self, "Hata", "Lütfen kitap ID'sini girin.")
-            return
+    @instrumented
+    def show_batch_lending_dialog(self):
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Toplu Ödünç")
+        layout = QVBoxLayout(dialog)
 
-        book_id = int(book_id_input_text)
-        member_id = int(self.member_id_input.text())
+        member_id_input = QLineEdit(self.member_id_input.text())
+        layout.addWidget(QLabel("Üye ID:"))
+        layout.addWidget(member_id_input)
 
-        book = self.session.query(Book).filter_by(id=book_id).first()
-        if not book:
-            QMessageBox.warning(self, "Hata", "Bu kitap bulunamadı.")
-            return
+        scan_input = QLineEdit()
+        layout.addWidget(QLabel("Kitap ID (okutup Enter'a basın):"))
+        layout.addWidget(scan_input)
+        basket = QListWidget()
+        layout.addWidget(basket)
 
-        member = self.session.query(Member).filter_by(id=member_id).first()
-        if not member:
-            QMessageBox.warning(self, "Hata", "Bu üye bulunamadı.")
-            return
+        def add_to_basket():
+            text_value = scan_input.text().strip()
+            description = self.describe_book(text_value) if text_value.isdigit() else None
+            if description is not None:
+                item = QListWidgetItem(f"{text_value} — {description}")
+                item.setData(Qt.UserRole, int(text_value))
+                basket.addItem(item)
+            elif text_value:
+                QMessageBox.warning(dialog, "Uyarı", f"Bu kitap bulunamadı: {text_value}")
+            scan_input.clear()
 
-        lendings = self.session.query(Lending).filter_by(book_id=book_id, member_id=member_id).all()
-        if not lendings:
-            QMessageBox.warning(self, "Hata", "Bu kitap bu üyeye ödünç verilmemiş.")
-            return
+        scan_input.returnPressed.connect(add_to_basket)
 
-        for lending in lendings:
-            lending.returned = 1
-            self.session.commit()
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+        # Enter tuşu diyaloğu kapatmasın, sepete eklesin.
+        buttons.button(QDialogButtonBox.Ok).setAutoDefault(False)
+        buttons.button(QDialogButtonBox.Ok).setDefault(False)
+        layout.addWidget(buttons)
 
-        self.session.delete(lending)  # <--- Add this line to remove the lending from the list
-        self.session.commit()
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        if not member_id_input.text().isdigit():
+            QMessageBox.warning(self, "Uyarı", "Lütfen üye ID'sini girin.")
+            return
+        member_id = int(member_id_input.text())
+        book_ids = [basket.item(i).data(Qt.UserRole) for i in range(basket.count())]
+        lending_date = self.lending_date_input.date().toPyDate()
+        return_date = self.return_date_input.date().toPyDate()
+        lendings = self.call_service(
+            lambda: self.service.lend_books(member_id, book_ids, lending_date, return_date))
+        if lendings:
+            QMessageBox.information(self, "Toplu Ödünç", f"{len(lendings)} kitap ödünç verildi.")
 
-        book.status = 'Mevcut'
-        self.session.commit()
+    @instrumented
+    def return_book(self):
+        book_id_input_text = self.book_id_input.text()
+        if not book_id_input_text:
+            QMessageBox.warning(self, "Hata", "Lütfen kitap ID'sini girin.")
+            return
 
-        self.refresh_lists()
+        book_id = self.parse_id(book_id_input_text.strip())
+        member_id = self.parse_id(self.member_id_input.text().strip())
+        if book_id is None or member_id is None:
+            QMessageBox.warning(self, "Hata", "Lütfen geçerli kitap ve üye ID'si girin.")
+            return
+        self.report_assigned_holds(self.call_service(lambda: self.service.return_book(book_id, member_id)))
 
+    @instrumented
     def display_overdue_books(self):
-        lendings = self.session.query(Lending).filter(Lending.returned == False).all()
-        dialog = OverdueBooksDialog(self.session, lendings)
-        dialog.exec_()
-
-    def init_book_list_tab(self):
-        self.tab_book_list = QWidget()
-        layout = QVBoxLayout(self.tab_book_list)
-        self.tabs.addTab(self.tab_book_list, "Kitap Listesi")
-        self.book_table = QTableWidget()
+        self.open_dialog(OverdueBooksDialog(self.session, OverdueReport(), self))
+
+    def init_book_list_tab(self, tab):
+        self.tab_book_list = tab
+        layout = QVBoxLayout(tab)
+        self.book_model = LazyTableModel(self.session, *LIST_VIEWS["books"], executor=self.executor, parent=self)
+        self.book_table = self.create_table_view(self.book_model)
         layout.addWidget(self.book_table)
-        self.refresh_book_list()
 
+    def create_table_view(self, model):
+        view = QTableView()
+        view.setModel(model)
+        view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        view.setSelectionMode(QAbstractItemView.SingleSelection)
+        view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        view.verticalHeader().setDefaultSectionSize(22)
+        view.verticalHeader().hide()
+        return view
+
+    @instrumented
     def refresh_book_list(self):
-        books = self.session.query(Book).all()
-        self.display_books(books)
-
-    def display_books(self, books):
-        self.book_table.setRowCount(len(books))
-        self.book_table.setColumnCount(8)
-        self.book_table.setHorizontalHeaderLabels(['ID', 'ISBN', 'Kitap Adı', 'Yazar', 'Yayınevi', 'Basım Yılı',
-                                                    'Sayfa Sayısı', 'Tür', 'Durum'])
-        for i, book in enumerate(books):
-            self.book_table.setItem(i, 0, QTableWidgetItem(str(book.id)))
-            self.book_table.setItem(i, 1, QTableWidgetItem(book.isbn))
-            self.book_table.setItem(i, 2, QTableWidgetItem(book.title))
-            self.book_table.setItem(i, 3, QTableWidgetItem(book.author))
-            self.book_table.setItem(i, 4, QTableWidgetItem(book.publisher))
-            self.book_table.setItem(i, 5, QTableWidgetItem(str(book.publication_year)))
-            self.book_table.setItem(i, 6, QTableWidgetItem(str(book.page_count)))
-            self.book_table.setItem(i, 7, QTableWidgetItem(book.genre))
-            self.book_table.setItem(i, 8, QTableWidgetItem(book.status))
-
-    def init_member_list_tab(self):
-        self.tab_member_list = QWidget()
-        layout = QVBoxLayout(self.tab_member_list)
-        self.tabs.addTab(self.tab_member_list, "Üye Listesi")
-        self.member_table = QTableWidget()
+        if hasattr(self, "book_model"):
+            self.book_model.reload()
+
+    def init_member_list_tab(self, tab):
+        self.tab_member_list = tab
+        layout = QVBoxLayout(tab)
+        self.member_model = LazyTableModel(self.session, *LIST_VIEWS["members"], executor=self.executor,
+                                           parent=self)
+        self.member_table = self.create_table_view(self.member_model)
         layout.addWidget(self.member_table)
-        self.refresh_member_list()
 
+    @instrumented
     def refresh_member_list(self):
-        members = self.session.query(Member).all()
-        self.display_members(members)
-
-    def display_members(self, members):
-        self.member_table.setRowCount(len(members))
-        self.member_table.setColumnCount(5)
-        self.member_table.setHorizontalHeaderLabels(['ID', 'Ad Soyad', 'Üyelik Türü', 'Kayıt Tarihi', 'İletişim Bilgileri'])
-        for i, member in enumerate(members):
-            self.member_table.setItem(i, 0, QTableWidgetItem(str(member.id)))
-            self.member_table.setItem(i, 1, QTableWidgetItem(member.full_name))
-            self.member_table.setItem(i, 2, QTableWidgetItem(member.membership_type))
-            self.member_table.setItem(i, 3, QTableWidgetItem(member.registration_date.strftime('%Y-%m-%d')))
-            self.member_table.setItem(i, 4, QTableWidgetItem(member.contact_info))
-
-    def init_lending_list_tab(self):
-        self.tab_lending_list = QWidget()
-        layout = QVBoxLayout(self.tab_lending_list)
-        self.tabs.addTab(self.tab_lending_list, "Ödünç Verilen Kitaplar")
-        self.lending_table = QTableWidget()
-        self.lending_table.setColumnCount(6)
-        self.lending_table.setHorizontalHeaderLabels(
-            ["ID", "Kitap ID", "Üye ID", "Ödünç Tarihi", "Teslim Tarihi", "Durum"])
+        if hasattr(self, "member_model"):
+            self.member_model.reload()
+
+    def init_lending_list_tab(self, tab):
+        self.tab_lending_list = tab
+        layout = QVBoxLayout(tab)
+        self.lending_model = LazyTableModel(self.session, *LIST_VIEWS["lendings"], executor=self.executor,
+                                            parent=self)
+        self.lending_table = self.create_table_view(self.lending_model)
         layout.addWidget(self.lending_table)
-        self.refresh_lending_list()
 
         # Buton iade et butonu ekleniyor
         self.return_button = QPushButton("İade Et")
         self.return_button.clicked.connect(self.show_return_dialog)
         layout.addWidget(self.return_button)
         
+    @instrumented
     def show_return_dialog(self):
         dialog = QDialog(self)
         dialog.setWindowTitle("İade Et")
         layout = QVBoxLayout(dialog)
 
         book_id_label = QLabel("Kitap ID:")
-        self.book_id_input = QLineEdit()
+        book_id_input = QLineEdit()
         layout.addWidget(book_id_label)
-        layout.addWidget(self.book_id_input)
+        layout.addWidget(book_id_input)
 
         member_id_label = QLabel("Üye ID:")
-        self.member_id_input = QLineEdit()
+        member_id_input = QLineEdit()
         layout.addWidget(member_id_label)
-        layout.addWidget(self.member_id_input)
+        layout.addWidget(member_id_input)
 
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         buttons.accepted.connect(dialog.accept)
@@ -612,176 +4071,441 @@ class LibraryManagement(QMainWindow):
         layout.addWidget(buttons)
 
         if dialog.exec_() == QDialog.Accepted:
-            book_id = int(self.book_id_input.text())
-            member_id = int(self.member_id_input.text())
-
-            book = self.session.query(Book).filter_by(id=book_id).first()
-            if not book:
-                QMessageBox.warning(self, "Hata", "Bu kitap bulunamadı.")
-                return
-
-            member = self.session.query(Member).filter_by(id=member_id).first()
-            if not member:
-                QMessageBox.warning(self, "Hata", "Bu üye bulunamadı.")
+            book_id = self.parse_id(book_id_input.text().strip())
+            member_id = self.parse_id(member_id_input.text().strip())
+            if book_id is None or member_id is None:
+                QMessageBox.warning(self, "Hata", "Lütfen geçerli kitap ve üye ID'si girin.")
                 return
+            self.report_assigned_holds(self.call_service(lambda: self.service.return_book(book_id, member_id)))
 
-            lendings = self.session.query(Lending).filter_by(book_id=book_id, member_id=member_id, returned=0).all()
-            if not lendings:
-                QMessageBox.warning(self, "Hata", "Bu kitap bu üyeye ait iade edilmemiş ödünç bulunamadı.")
-                return
-
-            for lending in lendings:
-                lending.returned = 1
-                self.session.commit()
-
-            self.session.commit() 
-
-            book.status = 'Mevcut'
-            self.session.commit()
-
-            self.refresh_lending_list()
-
+    @instrumented
     def refresh_lending_list(self):
-        lendings = self.session.query(Lending).filter(Lending.returned == False).all()
-        self.display_lendings(lendings)
-
-    def display_lendings(self, lendings):
-        self.lending_table.setRowCount(0)
-        for lending in lendings:
-            row_position = self.lending_table.rowCount()
-            self.lending_table.insertRow(row_position)
-            self.lending_table.setItem(row_position, 0, QTableWidgetItem(str(lending.id)))
-            self.lending_table.setItem(row_position, 1, QTableWidgetItem(str(lending.book_id)))
-            self.lending_table.setItem(row_position, 2, QTableWidgetItem(str(lending.member_id)))
-            self.lending_table.setItem(row_position, 3, QTableWidgetItem(str(lending.lending_date)))
-            self.lending_table.setItem(row_position, 4, QTableWidgetItem(str(lending.return_date)))
-            returned_value = bool(lending.returned)
-            self.lending_table.setItem(row_position, 5, QTableWidgetItem(str(int(lending.returned))))
+        if hasattr(self, "lending_model"):
+            self.lending_model.reload()
 
+    @instrumented
     def return_lending(self):
-        selected_row = self.lending_table.currentRow()
+        self.ensure_tab(self.init_lending_list_tab)
+        selected_row = self.lending_table.currentIndex().row()
         if selected_row == -1:
             QMessageBox.warning(self, "Hata", "Lütfen iade etmek istediğiniz ödünçü seçin.")
             return
 
-        lending_id = self.lending_table.item(selected_row, 0).text()
-        lending = self.session.query(Lending).filter_by(id=int(lending_id)).first()
-        if not lending:
-            QMessageBox.warning(self, "Hata", "Bu ödünç bulunamadı.")
-            return
+        lending_id = self.lending_model.row_id(selected_row)
+        self.report_assigned_holds(self.call_service(lambda: self.service.return_lending(lending_id)))
 
-        if lending.returned:
-            QMessageBox.warning(self, "Hata", "Bu ödünç zaten iadede.")
-            return
+    def count_lendings_per_book(self):
+        return self.service.count_lendings_per_book()
 
-        book = self.session.query(Book).filter_by(id=lending.book_id).first()
-        if not book:
-            QMessageBox.warning(self, "Hata", "Bu kitap bulunamadı.")
-            return
+    @instrumented
+    def display_most_borrowed_books(self):
+        self.executor.submit("stats", lambda session: self.service.most_borrowed(STATS_TOP_K, session=session),
+                             lambda rows: self.show_borrowed_books("En Çok Ödünç Alınan Kitaplar", rows))
 
-        book.status = 'Mevcut'
-        lending.returned = True
-        self.session.commit()
+    @instrumented
+    def display_least_borrowed_books(self):
+        self.executor.submit("stats", lambda session: self.service.least_borrowed(STATS_TOP_K, session=session),
+                             lambda rows: self.show_borrowed_books("En Az Ödünç Alınan Kitaplar", rows))
 
-        self.lending_table.removeRow(selected_row)
-        self.refresh_lists()
+    def init_statistics_tab(self, tab):
+        layout = QVBoxLayout(tab)
+        controls = QHBoxLayout()
+        self.stats_dimension_input = QComboBox()
+        for dimension, label in ROLLUP_DIMENSIONS.items():
+            self.stats_dimension_input.addItem(label, dimension)
+        self.stats_dimension_input.addItem("Gün", "day")
+        controls.addWidget(self.stats_dimension_input)
+        today = datetime.now().date()
+        self.stats_from_input = QDateEdit()
+        self.stats_from_input.setDate(today.fromordinal(today.toordinal() - 30))
+        controls.addWidget(QLabel("Başlangıç:"))
+        controls.addWidget(self.stats_from_input)
+        self.stats_to_input = QDateEdit()
+        self.stats_to_input.setDate(today)
+        controls.addWidget(QLabel("Bitiş:"))
+        controls.addWidget(self.stats_to_input)
+        self.stats_button = QPushButton("Göster")
+        self.stats_button.clicked.connect(self.refresh_statistics)
+        controls.addWidget(self.stats_button)
+        layout.addLayout(controls)
+        self.stats_totals_label = QLabel()
+        layout.addWidget(self.stats_totals_label)
+        self.stats_table = QTableWidget(0, 4)
+        self.stats_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.stats_table.verticalHeader().hide()
+        layout.addWidget(self.stats_table)
+        self.stats_dimension_input.currentIndexChanged.connect(self.refresh_statistics)
+        self.refresh_statistics()
 
-    def count_lendings_per_book(self):
-        lendings_per_book = {}
-        lendings = self.session.query(Lending).all()
-        for lending in lendings:
-            book_id = lending.book_id
-            if book_id not in lendings_per_book:
-                lendings_per_book[book_id] = 0
-            lendings_per_book[book_id] += 1
-        return lendings_per_book
+    @instrumented
+    def refresh_statistics(self):
+        dimension = self.stats_dimension_input.currentData()
+        date_from = self.stats_from_input.date().toPyDate()
+        date_to = self.stats_to_input.date().toPyDate()
 
-    def display_most_borrowed_books(self):
-        lendings_per_book = self.count_lendings_per_book()
-        sorted_lendings = sorted(lendings_per_book.items(), key=lambda x: x[1], reverse=True)
+        # Tablo her zaman özet tablolarından dolar; özetleri arşiv zamanlayıcısı günceller.
+        def job(session):
+            if dimension == "day":
+                rows = [(day.isoformat(), *counts) for day, *counts in
+                        self.service.circulation_daily(date_from, date_to, session=session)]
+            else:
+                rows = [(row.label, row.loans, row.returns, row.overdues) for row in self.service.circulation_report(
+                    dimension, date_from, date_to, STATS_REPORT_LIMIT, session=session)]
+            return rows, self.service.circulation_totals(date_from, date_to, session=session)
 
-        books_info = []
-        for book_id, count in sorted_lendings:
-            book = self.session.query(Book).filter_by(id=book_id).first()
-            books_info.append(f"{book.title} - Ödünç Sayısı: {count}")
+        self.executor.submit("statistics", job, self.show_statistics)
 
-        QMessageBox.information(self, "En Çok Ödünç Alınan Kitaplar", "\n".join(books_info))
+    def show_statistics(self, result):
+        rows, (loans, returns, overdues) = result
+        self.stats_totals_label.setText(f"Toplam ödünç: {loans}   İade: {returns}   Gecikmeye düşen: {overdues}")
+        self.stats_table.setHorizontalHeaderLabels(
+            [self.stats_dimension_input.currentText(), "Ödünç", "İade", "Gecikme"])
+        self.stats_table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for col, value in enumerate(values):
+                self.stats_table.setItem(row, col, QTableWidgetItem(str(value)))
+        self.stats_table.resizeColumnsToContents()
 
-    def display_least_borrowed_books(self):
-        lendings_per_book = self.count_lendings_per_book()
-        sorted_lendings = sorted(lendings_per_book.items(), key=lambda x: x[1])
+    def show_borrowed_books(self, title, rows):
+        books_info = [f"{book_title} - Ödünç Sayısı: {count}" for _, book_title, count in rows]
+        self.open_dialog(QMessageBox(QMessageBox.Information, title, "\n".join(books_info) or "Kitap bulunamadı.",
+                                     QMessageBox.Ok, self))
 
-        books_info = []
-        for book_id, count in sorted_lendings:
-            book = self.session.query(Book).filter_by(id=book_id).first()
-            books_info.append(f"{book.title} - Ödünç Sayısı: {count}")
+    def apply_pending_changes(self):
+        models = {Book: getattr(self, "book_model", None), Member: getattr(self, "member_model", None),
+                  Lending: getattr(self, "lending_model", None)}
+        for entity, entity_ids in self.changes.take().items():
+            if entity is Book:
+                books = self.service.get_books(list(entity_ids)) if self.search_cache.entries else []
+                self.search_cache.invalidate(entity_ids, books)
+            model = models.get(entity)
+            if model is None:
+                continue
+            for entity_id in sorted(entity_ids):
+                model.apply_change(entity_id)
 
-        QMessageBox.information(self, "En Az Ödünç Alınan Kitaplar", "\n".join(books_info))
-        
+    @instrumented
     def refresh_lists(self):
         self.refresh_book_list()
         self.refresh_member_list()
         self.refresh_lending_list()
 
-class BookSearchDialog(QDialog):
-    def __init__(self, books):
-        super().__init__()
-
-        self.setWindowTitle("Arama Sonuçları")
-        self.setMinimumWidth(400)
+class BookResultsDialog(QDialog):
+    # Sonuçlar tek bir tabloda gösterilir; yalnızca görünen satırlar çizilir, satırlar kaydırdıkça parça parça gelir.
+    # Başlığa tıklamak o sütuna göre sıralar, satıra çift tıklamak kitabı düzenleme formunda açar.
+    title = "Kitaplar"
+    empty_text = "Kitap bulunamadı."
 
-        layout = QVBoxLayout()
+    def __init__(self, session, results, executor=None, on_open=None, parent=None):
+        super().__init__(parent)
+        self.on_open = on_open
+        self.fuzzy = results.fuzzy
+        self.total = results.total
+        self.limited = results.limited
 
-        if not books:
-            layout.addWidget(QLabel("Arama sonucunda hiçbir kitap bulunamadı."))
-        else:
-            for book in books:
-                book_info = f"İsim: {book.title}\nYazar: {book.author}\nYayınevi: {book.publisher}\nTür: {book.genre}\nDurum: {book.status}"
-                layout.addWidget(QLabel(book_info))
+        self.setWindowTitle(self.title)
+        self.setMinimumWidth(800)
+        self.setMinimumHeight(500)
 
+        layout = QVBoxLayout()
+        self.summary = QLabel("Yükleniyor...")
+        layout.addWidget(self.summary)
+        self.model = results.model(session, executor, self)
+        self.model.loaded.connect(self.update_summary)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.verticalHeader().setDefaultSectionSize(22)
+        self.table.verticalHeader().hide()
+        # Varsayılan sıra (ilgi/benzerlik) korunur; başlığa tıklanınca o sütuna göre sıralanır.
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table.setSortingEnabled(True)
+        self.table.doubleClicked.connect(self.open_row)
+        layout.addWidget(self.table)
         self.setLayout(layout)
+        self.model.fetchMore()
 
-class BookFilterDialog(QDialog):
-    def __init__(self, books):
-        super().__init__()
-
-        self.setWindowTitle("Kitap Filtreleme")
-        self.setMinimumWidth(400)
+    def update_summary(self):
+        count = self.model.rowCount()
+        if not count and self.model.exhausted():
+            self.summary.setText(self.empty_text)
+            return
+        if self.total is None:
+            shown = f"{count}" if self.model.exhausted() else f"{count}+"
+        else:
+            shown = f"en iyi {self.total}" if self.limited else f"{self.total}"
+        self.summary.setText(f"{shown} sonuç" + (" (yakın eşleşmeler)" if self.fuzzy else ""))
 
-        layout = QVBoxLayout()
+    def open_row(self, index):
+        if self.on_open is not None and index.isValid():
+            self.accept()
+            self.on_open(self.model.row_id(index.row()))
 
-        if not books:
-            layout.addWidget(QLabel("Filtreleme sonucunda hiçbir kitap bulunamadı."))
-        else:
-            for book in books:
-                book_info = f"ID: {book.id}\nİsim: {book.title}\nYazar: {book.author}\nYayınevi: {book.publisher}\nTür: {book.genre}\nDurum: {book.status}"
-                layout.addWidget(QLabel(book_info))
+class BookSearchDialog(BookResultsDialog):
+    title = "Arama Sonuçları"
+    empty_text = "Arama sonucunda hiçbir kitap bulunamadı."
 
-        self.setLayout(layout)
+class BookFilterDialog(BookResultsDialog):
+    title = "Kitap Filtreleme"
+    empty_text = "Filtreleme sonucunda hiçbir kitap bulunamadı."
 
 class OverdueBooksDialog(QtWidgets.QDialog):
-    def __init__(self, session, lendings, parent=None):
+    def __init__(self, session, report, parent=None):
         super().__init__(parent)
         self.session = session
 
         self.setWindowTitle("Geçmiş Ödünçler")
-        self.setMinimumWidth(400)
+        self.setMinimumWidth(800)
 
         layout = QVBoxLayout()
 
-        if not lendings:
+        self.model = report.model(session, self)
+        self.model.fetchMore()
+        if not self.model.rowCount():
             layout.addWidget(QLabel("Geçmiş ödünç verilen kitap bulunamadı."))
         else:
-            for lending in lendings:
-                book = self.session.query(Book).filter_by(id=lending.book_id).first()
-                lending_info = f"Kitap ID: {lending.book_id}\nKitap İsim: {book.title}\nÜye ID: {lending.member_id}\nÖdünç Tarihi: {lending.lending_date}\nTeslim Tarihi: {lending.return_date}"
-                layout.addWidget(QLabel(lending_info))
+            self.table = QTableView()
+            self.table.setModel(self.model)
+            self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+            self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+            self.table.verticalHeader().hide()
+            layout.addWidget(self.table)
 
         self.setLayout(layout)
 
-if __name__ == "__main__":
-    import sys
-    app = QApplication(sys.argv)
-    window = LibraryManagement()
+def run_check_plans(args):
+    engine = make_engine(args.database, pragmas=args.pragmas)
+    run_migrations(engine)
+    full_scans = check_query_plans(engine)
+    for name, detail in full_scans:
+        print(f"{name}: {detail}")
+    if not full_scans:
+        print("Tüm sorgular dizin kullanıyor.")
+    return 1 if full_scans else 0
+
+def run_overdue_report(args):
+    engine = make_engine(args.database, pragmas=args.pragmas)
+    run_migrations(engine)
+    today = datetime.strptime(args.date, "%Y-%m-%d").date() if args.date else None
+    report = OverdueReport(today)
+    writer = csv.writer(sys.stdout)
+    writer.writerow(report.headers)
+    with sessionmaker(bind=engine)() as session:
+        for row in report.rows(session):
+            writer.writerow(row)
+    return 0
+
+def run_import_books(args):
+    engine = make_engine(args.database, pragmas=args.pragmas)
+    run_migrations(engine)
+    started = time.perf_counter()
+
+    def progress(processed, inserted, rejected):
+        print(f"\rokunan {processed}  eklenen {inserted}  reddedilen {rejected}", end="", file=sys.stderr)
+
+    importer = BookImporter(engine, args.batch_size, progress=progress)
+    result = importer.run(args.path, args.rejects)
+    elapsed = time.perf_counter() - started
+    print(f"\n{result.inserted} kitap {elapsed:.1f} sn içinde eklendi, {result.rejected} satır reddedildi.",
+          file=sys.stderr)
+    return 0
+
+def run_export(args):
+    engine = make_engine(args.database, pragmas=args.pragmas)
+    run_migrations(engine)
+    parse_date = lambda value: datetime.strptime(value, "%Y-%m-%d").date() if value else None
+    count = TableExporter(engine).export(args.table, args.path, args.format, status=args.status,
+                                         date_from=parse_date(args.date_from), date_to=parse_date(args.date_to),
+                                         returned=args.returned)
+    print(f"{count} kayıt yazıldı.", file=sys.stderr)
+    return 0
+
+def run_server(args):
+    engine = make_engine(args.database, args.workers, args.pragmas)
+    run_migrations(engine)
+    server = LibraryHTTPServer(LibraryService(sessionmaker(bind=engine)), args.host, args.port, args.workers)
+    print(f"http://{args.host}:{args.port} adresinde dinleniyor", file=sys.stderr)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def run_generate(args):
+    engine = make_engine(args.database, pragmas=args.pragmas)
+    run_migrations(engine)
+    started = time.perf_counter()
+
+    def progress(stage, count):
+        print(f"\r{stage}: {count}", end="", file=sys.stderr)
+
+    result = DataGenerator(engine, args.books, args.members, args.lendings, args.open_ratio, args.years, args.seed,
+                           args.batch_size, progress).run()
+    print(f"\n{result.books} kitap, {result.members} üye, {result.lendings} ödünç ({result.open_lendings} açık) "
+          f"{time.perf_counter() - started:.1f} sn içinde üretildi.", file=sys.stderr)
+    return 0
+
+def run_benchmark(args):
+    engine = make_engine(args.database, pragmas=args.pragmas)
+    run_migrations(engine)
+    report = LibraryBenchmark(engine, args.repeat, args.seed).run(args.only)
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output and args.output != "-":
+        with open(args.output, "w", encoding="utf-8") as target:
+            target.write(output + "\n")
+    else:
+        print(output)
+    if not args.compare:
+        return 0
+    with open(args.compare, encoding="utf-8") as source:
+        baseline = json.load(source)
+    failed = False
+    for name, before, after, ratio, regressed in LibraryBenchmark.compare(baseline, report, args.threshold):
+        failed = failed or regressed
+        print(f"{'!' if regressed else ' '} {name:<26} {before:>10.3f} ms -> {after:>10.3f} ms  x{ratio:.2f}",
+              file=sys.stderr)
+    return 1 if failed else 0
+
+def run_archive(args):
+    engine = make_engine(args.database, pragmas=args.pragmas)
+    run_migrations(engine)
+    started = time.perf_counter()
+
+    def progress(moved):
+        print(f"\rarşivlenen: {moved}", end="", file=sys.stderr)
+
+    moved = LendingArchiver(engine, args.after_days, args.batch_size, progress).run()
+    print(f"\n{moved} ödünç kaydı {time.perf_counter() - started:.1f} sn içinde arşive taşındı.", file=sys.stderr)
+    return 0
+
+def run_notices(args):
+    engine = make_engine(args.database, pragmas=args.pragmas)
+    run_migrations(engine)
+    started = time.perf_counter()
+
+    def progress(kind, scanned, written):
+        print(f"\r{kind}: taranan {scanned}, yazılan {written}", end="", file=sys.stderr)
+
+    notifier = OverdueNotifier(engine, args.batch_size, args.due_days, progress)
+    results = notifier.run(date.fromisoformat(args.date) if args.date else None)
+    print(file=sys.stderr)
+    for result in results:
+        print(f"{result.kind}: {result.scanned} ödünç tarandı, {result.written} bildirim yazıldı.", file=sys.stderr)
+    print(f"{time.perf_counter() - started:.1f} sn", file=sys.stderr)
+    return 0
+
+def run_statistics(args):
+    engine = make_engine(args.database, pragmas=args.pragmas)
+    run_migrations(engine)
+    Session = sessionmaker(bind=engine)
+    started = time.perf_counter()
+
+    def progress(count):
+        print(f"\rişlenen ödünç: {count}", end="", file=sys.stderr)
+
+    builder = RollupBuilder(Session, progress=progress)
+    ingested = builder.rebuild() if args.rebuild else builder.run()
+    print(f"\n{ingested} ödünç özetlere işlendi ({time.perf_counter() - started:.1f} sn).", file=sys.stderr)
+    date_to = date.fromisoformat(args.date_to) if args.date_to else date.today()
+    date_from = date.fromisoformat(args.date_from) if args.date_from else date_to.fromordinal(date_to.toordinal() - 30)
+    writer = csv.writer(sys.stdout)
+    with Session() as session:
+        rollups = CirculationRollups(session)
+        if args.dimension == "day":
+            writer.writerow(["Gün", "Ödünç", "İade", "Gecikme"])
+            writer.writerows(rollups.daily(date_from, date_to))
+        else:
+            writer.writerow([ROLLUP_DIMENSIONS[args.dimension], "Ödünç", "İade", "Gecikme"])
+            writer.writerows((row.label, row.loans, row.returns, row.overdues)
+                             for row in rollups.report(args.dimension, date_from, date_to, args.limit))
+    return 0
+
+def run_gui(args):
+    app = QApplication(sys.argv[:1])
+    window = LibraryManagement(args.database, args.pragmas, args.startup_report)
     window.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    return app.exec_()
+
+def parse_pragma(value):
+    name, separator, setting = value.partition("=")
+    if not separator or not re.fullmatch(r"\w+", name) or not re.fullmatch(r"[\w-]+", setting):
+        raise argparse.ArgumentTypeError("PRAGMA AD=DEĞER biçiminde olmalı")
+    # Sayısal ayarlar (busy_timeout, cache_size) varsayılanlar gibi int olmalı; make_engine onlarla hesap yapar.
+    return name.lower(), int(setting) if re.fullmatch(r"-?\d+", setting) else setting
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kütüphane Yönetim Sistemi")
+    parser.add_argument("--database", default=DATABASE_URL)
+    parser.add_argument("--pragma", dest="pragmas", action="append", type=parse_pragma, default=[],
+                        metavar="AD=DEĞER", help="SQLite PRAGMA ayarını değiştirir, ör. synchronous=FULL")
+    parser.add_argument("--startup-report", action="store_true", help="açılış süresinin dökümünü yazar")
+    parser.set_defaults(func=run_gui)
+    commands = parser.add_subparsers(dest="command")
+    check_plans = commands.add_parser("check-plans", help="tam tablo taraması yapan sorguları listeler")
+    check_plans.set_defaults(func=run_check_plans)
+    overdue = commands.add_parser("overdue", help="gecikmiş ödünçleri CSV olarak yazar")
+    overdue.add_argument("--date", help="YYYY-AA-GG, varsayılan bugün")
+    overdue.set_defaults(func=run_overdue_report)
+    import_books = commands.add_parser("import-books", help="CSV/JSONL kitap kataloğunu toplu içe aktarır")
+    import_books.add_argument("path")
+    import_books.add_argument("--rejects", help="reddedilen satırların yazılacağı CSV dosyası")
+    import_books.add_argument("--batch-size", type=int, default=5000)
+    import_books.set_defaults(func=run_import_books)
+    export = commands.add_parser("export", help="kitap, üye veya ödünç kayıtlarını CSV/JSONL olarak dışa aktarır")
+    export.add_argument("table", choices=sorted(TableExporter.entities))
+    export.add_argument("path", help="çıktı dosyası; .gz uzantısı sıkıştırır, - standart çıktıdır")
+    export.add_argument("--format", choices=["csv", "jsonl"])
+    export.add_argument("--status", help="kitaplar için durum (Mevcut/Kiralık)")
+    export.add_argument("--from", dest="date_from", help="YYYY-AA-GG; üyelerde kayıt, ödünçlerde ödünç tarihi")
+    export.add_argument("--to", dest="date_to", help="YYYY-AA-GG")
+    export.add_argument("--returned", type=int, choices=[0, 1], help="ödünçler için iade durumu")
+    export.set_defaults(func=run_export)
+    serve = commands.add_parser("serve", help="JSON/HTTP sunucusunu başlatır")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("--workers", type=int, default=16)
+    serve.set_defaults(func=run_server)
+    generate = commands.add_parser("generate", help="veritabanını sentetik kitap, üye ve ödünç kayıtlarıyla doldurur")
+    generate.add_argument("--books", type=int, default=10000)
+    generate.add_argument("--members", type=int, default=1000)
+    generate.add_argument("--lendings", type=int, default=100000)
+    generate.add_argument("--open-ratio", type=float, default=0.05, help="şu anda ödünçte olan kitap oranı")
+    generate.add_argument("--years", type=int, default=3, help="ödünç geçmişinin kapsadığı yıl sayısı")
+    generate.add_argument("--seed", type=int, default=13)
+    generate.add_argument("--batch-size", type=int, default=50000)
+    generate.set_defaults(func=run_generate)
+    bench = commands.add_parser("bench", help="sıcak yolları ölçer ve sonuçları JSON olarak yazar")
+    bench.add_argument("--repeat", type=int, default=20)
+    bench.add_argument("--seed", type=int, default=13)
+    bench.add_argument("--only", nargs="+", help="yalnızca adı verilen ölçümler")
+    bench.add_argument("--output", help="JSON çıktı dosyası, varsayılan standart çıktı")
+    bench.add_argument("--compare", help="karşılaştırılacak önceki JSON çıktısı")
+    bench.add_argument("--threshold", type=float, default=1.2, help="gerileme sayılacak medyan oranı")
+    bench.set_defaults(func=run_benchmark)
+    archive = commands.add_parser("archive", help="iade edilmiş eski ödünçleri lending_history tablosuna taşır")
+    archive.add_argument("--after-days", type=int, default=ARCHIVE_AFTER_DAYS,
+                         help="iade tarihinin üzerinden geçmesi gereken gün sayısı")
+    archive.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    archive.set_defaults(func=run_archive)
+    notices = commands.add_parser("notices", help="gecikmiş ve teslimi yaklaşan ödünçler için bildirimleri "
+                                                  "notices giden kutusuna yazar")
+    notices.add_argument("--date", help="YYYY-AA-GG, varsayılan bugün")
+    notices.add_argument("--due-days", type=int, default=NOTICE_DUE_DAYS,
+                         help="teslimine bu kadar gün kalanlara hatırlatma yazılır")
+    notices.add_argument("--batch-size", type=int, default=NOTICE_BATCH_SIZE)
+    notices.set_defaults(func=run_notices)
+    stats = commands.add_parser("stats", help="günlük özetleri günceller ve dönem istatistiklerini CSV olarak yazar")
+    stats.add_argument("--dimension", choices=list(ROLLUP_DIMENSIONS) + ["day"], default="genre")
+    stats.add_argument("--from", dest="date_from", help="YYYY-AA-GG, varsayılan bitişten 30 gün önce")
+    stats.add_argument("--to", dest="date_to", help="YYYY-AA-GG, varsayılan bugün")
+    stats.add_argument("--limit", type=int, default=STATS_REPORT_LIMIT)
+    stats.add_argument("--rebuild", action="store_true", help="özetleri silip bütün geçmişten yeniden hesaplar")
+    stats.set_defaults(func=run_statistics)
+    args = parser.parse_args(argv)
+    args.pragmas = dict(args.pragmas)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
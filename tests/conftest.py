@@ -0,0 +1,107 @@
+import importlib.util
+import os
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+MODULE_PATH = Path(__file__).resolve().parent.parent / "V13-1.py"
+
+
+def load_library():
+    spec = importlib.util.spec_from_file_location("library", MODULE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["library"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def library():
+    return load_library()
+
+
+@pytest.fixture(scope="session")
+def qapp(library):
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def database(tmp_path):
+    return tmp_path / "library.db"
+
+
+@pytest.fixture
+def database_url(database):
+    return f"sqlite:///{database}"
+
+
+@pytest.fixture
+def engine(library, database_url):
+    engine = library.make_engine(database_url)
+    library.run_migrations(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def Session(library, engine):
+    return library.sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def service(library, Session):
+    return library.LibraryService(Session)
+
+
+@pytest.fixture
+def today():
+    return date.today()
+
+
+@pytest.fixture
+def add_book(service):
+    def add(isbn, title=None, copies=1, **fields):
+        values = dict(author="Yazar", publisher="Yayınevi", publication_year=2000, page_count=100, genre="Roman")
+        values.update(fields)
+        return service.add_book(isbn, title or f"Kitap {isbn}", copies=copies, **values)
+    return add
+
+
+@pytest.fixture
+def add_member(service):
+    def add(name, membership_type="Standart"):
+        return service.add_member(name, membership_type, date.today(), f"{name}@example.com")
+    return add
+
+
+def wait(qapp, window):
+    qapp.processEvents()
+    while window.executor.is_busy():
+        window.executor.pool.waitForDone(20)
+        qapp.processEvents()
+    qapp.processEvents()
+
+
+@pytest.fixture
+def messages(monkeypatch):
+    from PyQt5.QtWidgets import QMessageBox
+    shown = []
+    for kind in ("information", "warning", "critical"):
+        monkeypatch.setattr(QMessageBox, kind, staticmethod(lambda *args, kind=kind: shown.append((kind, args[2]))))
+    return shown
+
+
+@pytest.fixture
+def window(library, qapp, engine, database_url, messages):
+    window = library.LibraryManagement(database_url)
+    wait(qapp, window)
+    yield window
+    wait(qapp, window)
+    window.close()
+    window.deleteLater()
+    qapp.processEvents()
@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from sqlalchemy import text
+
+
+def insert_lending(engine, book_id, member_id, lent, due, returned_on=None, returned=1):
+    with engine.begin() as connection:
+        return connection.execute(text(
+            "INSERT INTO lendings (book_id, member_id, lending_date, return_date, returned, returned_on) "
+            "VALUES (:book, :member, :lent, :due, :returned, :returned_on)"),
+            dict(book=book_id, member=member_id, lent=lent, due=due, returned=returned,
+                 returned_on=returned_on)).lastrowid
+
+
+def ids(engine, table):
+    with engine.connect() as connection:
+        return [row[0] for row in connection.execute(text(f"SELECT id FROM {table} ORDER BY id"))]
+
+
+def test_archives_by_return_date_not_due_date(library, engine, add_book, add_member, today):
+    book_id, member_id = add_book("900"), add_member("Arşiv")
+    ago = lambda days: today - timedelta(days=days)
+    returned_long_ago = insert_lending(engine, book_id, member_id, ago(90), ago(76), returned_on=ago(70))
+    legacy = insert_lending(engine, book_id, member_id, ago(90), ago(76))
+    returned_late = insert_lending(engine, book_id, member_id, ago(90), ago(76), returned_on=ago(2))
+    still_open = insert_lending(engine, book_id, member_id, ago(90), ago(76), returned=0)
+    newest = insert_lending(engine, book_id, member_id, ago(90), ago(76), returned_on=ago(70))
+    before = ids(engine, "all_lendings")
+
+    moved = library.LendingArchiver(engine, after_days=30, batch_size=1).run(today)
+
+    assert moved == 2
+    assert ids(engine, "lending_history") == [returned_long_ago, legacy]
+    assert ids(engine, "lendings")[-3:] == [returned_late, still_open, newest]
+    assert ids(engine, "all_lendings") == before
+    assert library.LendingArchiver(engine, after_days=30).run(today) == 0
+
+
+def test_progress_reports_running_total(library, engine, add_book, add_member, today):
+    book_id, member_id = add_book("910"), add_member("Arşiv")
+    old = today - timedelta(days=60)
+    for _ in range(4):
+        insert_lending(engine, book_id, member_id, old, old, returned_on=old)
+    seen = []
+    assert library.LendingArchiver(engine, after_days=30, batch_size=2, progress=seen.append).run(today) == 3
+    assert seen == [2, 3]
@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+import pytest
+from PyQt5.QtCore import Qt
+from sqlalchemy import event
+
+
+@pytest.fixture
+def novels(add_book):
+    return [add_book(f"13{number:02d}", f"Deniz {'Deniz ' * (number % 4)}Romanı {number}", genre="Roman")
+            for number in range(10)]
+
+
+def load_all(model):
+    while model.canFetchMore():
+        model.fetchMore()
+    return [model.row_id(row) for row in range(model.rowCount())]
+
+
+def test_ranked_pages_follow_search_order(library, service, Session, novels, qapp):
+    expected = [book.id for book in service.search_books("deniz")]
+    with Session() as session:
+        results = service.book_results("deniz", "Tüm Kitaplar", session)
+        assert (results.total, results.limited, results.fuzzy) == (10, False, False)
+        model = results.model(session)
+        model.batch_size = 3
+        model.reload()
+        assert load_all(model) == expected
+        model.sort(5, Qt.AscendingOrder)
+        assert sorted(load_all(model)) == sorted(novels)
+
+
+def test_pages_do_not_rank_again(library, service, Session, engine, novels):
+    statements = []
+
+    def listener(connection, cursor, statement, *args):
+        statements.append(statement)
+
+    with Session() as session:
+        results = service.book_results("deniz", "Tüm Kitaplar", session)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            rows = results.query.page(session, limit=4)
+            results.query.page(session, results.query.key_of(rows[-1]), 4)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+    assert len(statements) == 2 and not any("bm25" in statement for statement in statements)
+
+
+def test_ranked_candidates_are_capped(library, service, Session, novels, monkeypatch, qapp):
+    monkeypatch.setattr(library, "SEARCH_RANKED_LIMIT", 4)
+    expected = [book.id for book in service.search_books("deniz", limit=4)]
+    with Session() as session:
+        results = service.book_results("deniz", "Tüm Kitaplar", session)
+        assert (results.total, results.limited) == (4, True)
+        dialog = library.BookSearchDialog(session, results)
+        assert load_all(dialog.model) == expected
+        assert dialog.summary.text() == "en iyi 4 sonuç"
+        dialog.close()
+
+
+def test_fuzzy_and_empty_results(library, service, Session, novels, qapp):
+    with Session() as session:
+        results = service.book_results("denzi romnı", "Tüm Kitaplar", session)
+        assert results.fuzzy and results.total
+        expected = [book.id for book in library.fuzzy_search(session, "denzi romnı")]
+        dialog = library.BookSearchDialog(session, results)
+        assert load_all(dialog.model) == expected
+        assert dialog.summary.text() == f"{len(expected)} sonuç (yakın eşleşmeler)"
+        dialog.close()
+        dialog = library.BookSearchDialog(session, service.book_results("qqqqzzzz", "Tüm Kitaplar", session))
+        assert dialog.model.rowCount() == 0 and dialog.summary.text() == dialog.empty_text
+        dialog.close()
+
+
+def test_status_filter_applies_to_ranked_results(library, service, Session, novels, add_member, today):
+    service.lend_books(add_member("Okur"), novels[:3], today, today + timedelta(days=7))
+    with Session() as session:
+        results = service.book_results("deniz", "Mevcut", session)
+        ids = [row[0] for row in results.query.page(session)]
+    assert results.total == 7 and sorted(ids) == novels[3:]
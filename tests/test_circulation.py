@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+import pytest
+from PyQt5.QtWidgets import QDialog
+
+
+def test_checkout_rejects_double_lend(library, service, add_book, add_member, today):
+    book_id = add_book("100")
+    first, second = add_member("ali"), add_member("veli")
+    service.lend_book(book_id, first, today, today + timedelta(days=14))
+    with pytest.raises(library.LibraryError):
+        service.lend_book(book_id, second, today, today + timedelta(days=14))
+    book = service.get_book(book_id)
+    assert (book.available_copies, book.status, book.loan_count) == (0, "Kiralık", 1)
+
+
+def test_checkout_rejects_lend_from_stale_session(library, Session, service, add_book, add_member, today):
+    # İki oturum aynı son kopyayı görür; koşullu UPDATE ikincisini reddeder.
+    book_id = add_book("101")
+    first, second = add_member("ali"), add_member("veli")
+    with Session() as stale:
+        assert stale.get(library.Book, book_id).available_copies == 1
+        service.lend_book(book_id, first, today, today + timedelta(days=14))
+        with pytest.raises(library.LibraryError):
+            library.checkout_books(stale, second, [book_id], today, today + timedelta(days=14))
+        stale.rollback()
+    with Session() as session:
+        assert session.query(library.Lending).filter_by(book_id=book_id, returned=False).count() == 1
+
+
+def test_batch_checkout_is_all_or_nothing(library, Session, service, add_book, add_member, today):
+    free, taken = add_book("102"), add_book("103")
+    first, second = add_member("ali"), add_member("veli")
+    service.lend_book(taken, first, today, today + timedelta(days=14))
+    with pytest.raises(library.LibraryError, match="103|müsait"):
+        service.lend_books(second, [free, taken], today, today + timedelta(days=14))
+    assert service.get_book(free).available_copies == 1
+    lending_ids = service.lend_books(second, [free, free], today, today + timedelta(days=14))
+    assert len(lending_ids) == 1
+
+
+def test_return_book_restores_availability(library, service, add_book, add_member, today):
+    book_id = add_book("104", copies=2)
+    member_id = add_member("ali")
+    service.lend_book(book_id, member_id, today, today + timedelta(days=14))
+    assert service.get_book(book_id).available_copies == 1
+    service.return_book(book_id, member_id)
+    book = service.get_book(book_id)
+    assert (book.available_copies, book.status) == (2, "Mevcut")
+    with pytest.raises(library.LibraryError):
+        service.return_book(book_id, member_id)
+
+
+def test_gui_rejects_non_numeric_ids(window, messages, monkeypatch):
+    window.book_id_input.setText("abc")
+    window.member_id_input.setText("1")
+    window.lend_book()
+    window.return_book()
+    window.book_id_input.setText("1")
+    window.member_id_input.setText("")
+    window.return_book()
+    monkeypatch.setattr(QDialog, "exec_", lambda dialog: QDialog.Accepted)
+    window.show_return_dialog()
+    assert [kind for kind, _ in messages] == ["warning"] * 4
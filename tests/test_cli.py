@@ -0,0 +1,24 @@
+import argparse
+
+import pytest
+from sqlalchemy import text
+
+
+def test_parse_pragma_coerces_numbers(library):
+    assert library.parse_pragma("busy_timeout=10000") == ("busy_timeout", 10000)
+    assert library.parse_pragma("cache_size=-2000") == ("cache_size", -2000)
+    assert library.parse_pragma("Synchronous=FULL") == ("synchronous", "FULL")
+    with pytest.raises(argparse.ArgumentTypeError):
+        library.parse_pragma("busy_timeout=1;DROP")
+
+
+def test_numeric_pragma_reaches_the_engine(library, database_url, capsys):
+    assert library.main(["--database", database_url, "--pragma", "busy_timeout=10000", "check-plans"]) == 0
+    assert "dizin" in capsys.readouterr().out
+    engine = library.make_engine(database_url, pragmas=dict([library.parse_pragma("busy_timeout=10000")]))
+    try:
+        assert engine.pool.timeout() == 10
+        with engine.connect() as connection:
+            assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 10000
+    finally:
+        engine.dispose()
@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import event
+
+
+@pytest.fixture
+def queries(engine):
+    statements = []
+
+    def count(connection, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    yield statements
+    event.remove(engine, "before_cursor_execute", count)
+
+
+def test_reads_hit_the_cache(service, add_book, queries):
+    book_id = add_book("800")
+    queries.clear()
+    assert service.get_book(book_id).isbn == "800"
+    assert service.get_book(book_id).isbn == "800"
+    assert service.get_book_by_isbn("800").id == book_id
+    assert len(queries) == 1
+    assert service.entities.stats()["books"] == {"size": 1, "hits": 2, "misses": 1}
+
+
+def test_writes_invalidate_cached_records(library, service, add_book, add_member, today):
+    book_id = add_book("810")
+    member_id = add_member("Ayşe")
+    assert service.get_book(book_id).available_copies == 1
+    service.lend_book(book_id, member_id, today, today + timedelta(days=7))
+    assert service.get_book(book_id).available_copies == 0
+    book = service.get_book(book_id)
+    service.edit_book(book_id, "811", "Yeni Başlık", book.author, book.publisher, book.publication_year,
+                      book.page_count, book.genre, book.status)
+    assert service.get_book(book_id).title == "Yeni Başlık"
+    assert service.get_book_by_isbn("811").id == book_id
+    with pytest.raises(library.NotFoundError):
+        service.get_book_by_isbn("810")
+    assert service.get_member(member_id).full_name == "Ayşe"
+    member = service.get_member(member_id)
+    service.edit_member(member_id, "Ayşe Y.", member.membership_type, member.registration_date, member.contact_info)
+    assert service.get_member(member_id).full_name == "Ayşe Y."
+
+
+def test_load_racing_a_commit_is_not_stored(library, service, add_book, Session):
+    book_id = add_book("820")
+    cache = service.entities
+    generation = cache.generation
+    with Session() as session:
+        record = library.BookRecord(*session.query(*library.Book.__table__.columns)
+                                    .filter(library.Book.id == book_id).one())
+    cache.invalidate([(library.Book, book_id)])
+    cache.put(library.Book, record, generation)
+    assert book_id not in cache.entries[library.Book]
+
+
+def test_capacity_and_ttl(library, service, add_book, Session, monkeypatch):
+    cache = library.EntityCache(capacity=2, ttl=10)
+    ids = [add_book(f"83{number}") for number in range(3)]
+    clock = [50.0]
+    monkeypatch.setattr(library.time, "monotonic", lambda: clock[0])
+    with Session() as session:
+        for book_id in ids:
+            cache.get(session, library.Book, book_id)
+        assert list(cache.entries[library.Book]) == ids[1:]
+        assert "830" not in cache.isbn_index
+        assert cache.cached(library.Book, ids[2]) is not None
+        clock[0] += 11
+        assert cache.cached(library.Book, ids[2]) is None
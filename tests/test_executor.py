@@ -0,0 +1,62 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from PyQt5.QtCore import Qt
+from sqlalchemy import text
+
+SLOW_QUERY = text("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT COUNT(*) FROM n")
+
+
+def connect(worker, outcome):
+    worker.signals.finished.connect(lambda _, result: outcome.append(("finished", result)), Qt.DirectConnection)
+    worker.signals.failed.connect(lambda _, message: outcome.append(("failed", message)), Qt.DirectConnection)
+
+
+def test_worker_returns_job_result(library, qapp, Session):
+    outcome = []
+    worker = library.QueryWorker(Session, lambda session: session.execute(text("SELECT 42")).scalar(), None)
+    connect(worker, outcome)
+    worker.run()
+    assert outcome == [("finished", 42)]
+
+
+def test_cancel_interrupts_running_query(library, qapp, Session):
+    outcome = []
+    started = threading.Event()
+
+    def job(session):
+        started.set()
+        return session.execute(SLOW_QUERY).scalar()
+
+    worker = library.QueryWorker(Session, job, None)
+    connect(worker, outcome)
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+    started.wait()
+    time.sleep(0.05)
+    worker.cancel()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert outcome and outcome[0][0] == "failed" and "interrupt" in outcome[0][1]
+
+
+def test_connection_released_before_session_closes(library, qapp, Session):
+    # İptal bağlantı havuza döndükten sonra gelirse o bağlantıyı kullanan başka sorguyu kesmemeli.
+    seen = []
+
+    @contextmanager
+    def session_factory():
+        with Session() as session:
+            yield session
+            seen.append(worker.dbapi_connection)
+
+    worker = library.QueryWorker(session_factory, lambda session: session.execute(text("SELECT 1")).scalar(), None)
+    connect(worker, [])
+    worker.run()
+    assert seen == [None]
+
+    with Session() as session:
+        session.connection()
+        worker.cancel()
+        assert session.execute(text("SELECT 7")).scalar() == 7
@@ -0,0 +1,28 @@
+import csv
+import gzip
+import json
+from datetime import timedelta
+
+
+def test_export_books_csv_with_status_filter(library, engine, tmp_path, add_book):
+    add_book("500", status="Kiralık")
+    path = tmp_path / "books.csv"
+    assert library.TableExporter(engine, batch_size=1).export("books", str(path), status="Mevcut") == 2
+    with open(path, encoding="utf-8") as source:
+        rows = list(csv.DictReader(source))
+    assert [row["isbn"] for row in rows] == [book["isbn"] for book in library.DEFAULT_BOOKS]
+    assert set(rows[0]) == {column.name for column in library.Book.__table__.columns}
+
+
+def test_export_lendings_jsonl_gz_with_filters(library, engine, service, add_book, add_member, today):
+    member_id = add_member("ali")
+    lending_ids = [service.lend_book(add_book(str(600 + i)), member_id, today - timedelta(days=i),
+                                     today + timedelta(days=7)) for i in range(3)]
+    service.return_lending(lending_ids[0])
+    path = str(engine.url.database) + ".lendings.jsonl.gz"
+    exporter = library.TableExporter(engine, batch_size=2)
+    assert exporter.export("lendings", path, returned=False, date_from=today - timedelta(days=1)) == 1
+    with gzip.open(path, "rt", encoding="utf-8") as source:
+        rows = [json.loads(line) for line in source]
+    assert [(row["id"], row["returned"], row["lending_date"]) for row in rows] == \
+        [(lending_ids[1], 0, (today - timedelta(days=1)).isoformat())]
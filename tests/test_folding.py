@@ -0,0 +1,45 @@
+import sqlite3
+
+import pytest
+
+
+@pytest.mark.parametrize("text, folded", [
+    ("IŞIK", "isik"), ("ışık", "isik"), ("İstanbul", "istanbul"), ("istanbul", "istanbul"),
+    ("Çağlayan Göğü", "caglayan gogu"), ("Âşık Ümit", "asik umit"),
+])
+def test_fold_text_merges_turkish_letters(library, text, folded):
+    assert library.fold_text(text) == folded
+    assert library.trigram_fold(text) == folded
+
+
+def test_search_ignores_turkish_case_and_dotted_i(service, add_book):
+    book_id = add_book("990", "IŞIKLI İSTANBUL SOKAKLARI", author="Çağrı Öztürk")
+    for term in ("ışıklı", "isikli", "Istanbul", "istanbul sok", "cagri", "ÖZTÜRK"):
+        assert [book.id for book in service.search_books(term)] == [book_id], term
+
+
+def test_fuzzy_search_tolerates_typos(service, add_book):
+    book_id = add_book("991", "Kırmızı Pazartesi", author="Gabriel García Márquez")
+    assert [book.id for book in service.search_books("kirmizi pazartsi")] == [book_id]
+
+
+def test_plain_sqlite_clients_keep_the_index_current(library, service, database, engine):
+    with engine.connect() as connection:
+        triggers = connection.exec_driver_sql("SELECT sql FROM sqlite_master WHERE type = 'trigger' "
+                                              "AND name LIKE 'books_fts_%'").scalars().all()
+    assert len(triggers) == 3 and not any("search_fold" in sql for sql in triggers)
+    connection = sqlite3.connect(database)
+    with connection:
+        book_id = connection.execute(
+            "INSERT INTO books (isbn, title, author, publisher, publication_year, page_count, genre, status, "
+            "available_copies, total_copies) VALUES ('992', 'Şeker Portakalı', 'Vasconcelos', 'Can', 1968, 180, "
+            "'Roman', 'Mevcut', 0, 0)").lastrowid
+    assert [book.id for book in service.search_books("seker")] == [book_id]
+    with connection:
+        connection.execute("UPDATE books SET title = 'Güneşli Gün' WHERE id = ?", (book_id,))
+    assert service.search_books("seker") == []
+    assert [book.id for book in service.search_books("gunesli")] == [book_id]
+    with connection:
+        connection.execute("DELETE FROM books WHERE id = ?", (book_id,))
+    connection.close()
+    assert service.search_books("gunesli") == []
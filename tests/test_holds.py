@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+import pytest
+
+
+@pytest.fixture
+def lent_book(service, add_book, add_member, today):
+    book_id, borrower = add_book("1000"), add_member("Okur")
+    service.lend_book(book_id, borrower, today, today + timedelta(days=14))
+    return book_id, borrower
+
+
+def test_premium_hold_is_served_first(library, service, add_member, lent_book, today):
+    book_id, borrower = lent_book
+    standard, premium = add_member("Standart Üye"), add_member("Premium Üye", "Premium")
+    assert service.place_hold(book_id, standard)[1] == 1
+    assert service.place_hold(book_id, premium)[1] == 1
+    assert [hold.member_id for hold in service.book_holds(book_id)] == [premium, standard]
+
+    lending_ids = service.return_book(book_id, borrower)
+    assert [hold.member_id for hold in service.assigned_holds(lending_ids)] == [premium]
+    assert service.get_book(book_id).available_copies == 0
+    with pytest.raises(library.LibraryError):
+        service.lend_book(book_id, standard, today, today + timedelta(days=14))
+
+    service.lend_book(book_id, premium, today, today + timedelta(days=14))
+    assert service.member_holds(premium) == []
+    assert [hold.status for hold in service.member_holds(standard)] == ["Bekliyor"]
+
+
+def test_hold_rules(library, service, add_book, add_member, lent_book):
+    book_id, borrower = lent_book
+    member = add_member("Bekleyen")
+    with pytest.raises(library.LibraryError):
+        service.place_hold(book_id, borrower)
+    service.place_hold(book_id, member)
+    with pytest.raises(library.LibraryError):
+        service.place_hold(book_id, member)
+    with pytest.raises(library.LibraryError):
+        service.place_hold(add_book("1001"), member)
+    with pytest.raises(library.NotFoundError):
+        service.place_hold(9999, member)
+
+
+def test_cancelled_assignment_passes_the_copy_on(service, add_member, lent_book):
+    book_id, borrower = lent_book
+    first, second = add_member("Birinci"), add_member("İkinci")
+    first_hold, _ = service.place_hold(book_id, first)
+    second_hold, _ = service.place_hold(book_id, second)
+    service.return_book(book_id, borrower)
+    service.cancel_hold(first_hold)
+    assert [(hold.id, hold.status) for hold in service.member_holds(second)] == [(second_hold, "Ayrıldı")]
+    service.cancel_hold(second_hold)
+    book = service.get_book(book_id)
+    assert (book.available_copies, book.status) == (1, "Mevcut")
+
+
+def test_new_copies_fill_waiting_holds(service, add_member, lent_book):
+    book_id, _ = lent_book
+    member = add_member("Bekleyen")
+    service.place_hold(book_id, member)
+    service.add_copies(book_id, 2)
+    assert [hold.status for hold in service.member_holds(member)] == ["Ayrıldı"]
+    book = service.get_book(book_id)
+    assert (book.available_copies, book.total_copies) == (1, 3)
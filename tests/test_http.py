@@ -0,0 +1,114 @@
+import asyncio
+import json
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import text
+
+
+@pytest.fixture
+def server(library, service):
+    server = library.LibraryHTTPServer(service, workers=2)
+    yield server
+    server.pool.shutdown()
+
+
+def call(server, method, target, payload=None):
+    return server.dispatch(method, target, json.dumps(payload).encode() if payload is not None else b"")
+
+
+def book_payload(isbn, **fields):
+    payload = dict(isbn=isbn, title=f"Kitap {isbn}", author="Yazar", publisher="Yayınevi", publication_year=2001,
+                   page_count=120, genre="Roman")
+    payload.update(fields)
+    return payload
+
+
+def test_book_and_member_crud(server):
+    status, created = call(server, "POST", "/books", book_payload("700", copies=2))
+    assert status == 201
+    book_id = created["id"]
+    assert call(server, "GET", f"/books/{book_id}")[1]["total_copies"] == 2
+    assert call(server, "GET", "/books?isbn=700")[1][0]["id"] == book_id
+    assert call(server, "PUT", f"/books/{book_id}", book_payload("700", title="Yeni"))[0] == 200
+    assert [book["id"] for book in call(server, "GET", "/books?q=yeni")[1]] == [book_id]
+    assert call(server, "POST", f"/books/{book_id}/copies", {"count": 1})[1]["available_copies"] == 3
+    assert call(server, "DELETE", f"/books/{book_id}")[0] == 200
+    assert call(server, "GET", f"/books/{book_id}")[0] == 404
+
+    status, created = call(server, "POST", "/members", {"full_name": "Ali", "contact_info": "ali@example.com"})
+    assert status == 201
+    assert call(server, "GET", f"/members/{created['id']}")[1]["membership_type"] == "Standart"
+
+
+def test_lend_return_and_holds(server, today):
+    book_id = call(server, "POST", "/books", book_payload("710"))[1]["id"]
+    first = call(server, "POST", "/members", {"full_name": "A", "contact_info": "a"})[1]["id"]
+    second = call(server, "POST", "/members", {"full_name": "B", "contact_info": "b"})[1]["id"]
+    due = (today + timedelta(days=7)).isoformat()
+    status, lent = call(server, "POST", "/lendings", {"member_id": first, "book_ids": [book_id], "return_date": due})
+    assert status == 201 and len(lent["lending_ids"]) == 1
+    assert call(server, "POST", "/holds", {"book_id": book_id, "member_id": second}) == (201, {"id": 1, "position": 1})
+    status, returned = call(server, "POST", "/returns", {"book_id": book_id, "member_id": first})
+    assert returned["returned"] == lent["lending_ids"]
+    assert [(hold["member_id"], hold["status"]) for hold in returned["holds"]] == [(second, "Ayrıldı")]
+    assert call(server, "GET", f"/members/{second}/holds")[1][0]["status"] == "Ayrıldı"
+
+
+@pytest.mark.parametrize("book_ids", ["12", [], ["1"], [1.0], [True], None, {"1": 1}])
+def test_lendings_reject_malformed_book_ids(server, book_ids, today):
+    status, body = call(server, "POST", "/lendings", {"member_id": 1, "book_ids": book_ids,
+                                                       "return_date": (today + timedelta(days=7)).isoformat()})
+    assert status == 400 and "book_ids" in body["error"]
+
+
+def test_validation_and_routing_errors(server):
+    assert call(server, "POST", "/lendings", {"member_id": 1})[0] == 400
+    assert call(server, "POST", "/books", [1, 2])[0] == 400
+    assert server.dispatch("POST", "/books", b"{bozuk")[0] == 400
+    assert call(server, "PATCH", "/books/1", {})[0] == 405
+    assert call(server, "GET", "/nope")[0] == 404
+    assert call(server, "GET", "/stats/catalog?dimension=nope")[0] == 400
+
+
+def test_circulation_reads_do_not_refresh_rollups(library, server, service, engine, today):
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO lendings (book_id, member_id, lending_date, return_date, returned) "
+                                "VALUES (1, 1, :day, :day, 0)"), {"day": today.isoformat()})
+    with service.Session() as session:
+        before = library.rollup_state(session)
+    for target in ("/stats/circulation", "/stats/daily"):
+        assert call(server, "GET", target)[0] == 200
+    with service.Session() as session:
+        assert library.rollup_state(session) == before
+    service.refresh_rollups()
+    assert call(server, "GET", "/stats/daily")[1][-1]["loans"] == 1
+
+
+def test_keep_alive_over_a_socket(server):
+    async def exchange():
+        listener = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        responses = []
+        for target in ("/books/1", "/books/999"):
+            writer.write(f"GET {target} HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+            await writer.drain()
+            status_line = await reader.readline()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line == b"\r\n":
+                    break
+                name, _, value = line.decode().partition(":")
+                headers[name.lower()] = value.strip()
+            body = json.loads(await reader.readexactly(int(headers["content-length"])))
+            responses.append((status_line.split()[1], headers["connection"], body))
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+        return responses
+
+    first, second = asyncio.run(exchange())
+    assert first[:2] == (b"200", "keep-alive") and first[2]["isbn"] == "123456789"
+    assert second[:2] == (b"404", "keep-alive")
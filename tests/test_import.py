@@ -0,0 +1,52 @@
+import csv
+import gzip
+import json
+
+from sqlalchemy import text
+
+FIELDS = ["isbn", "title", "author", "publisher", "publication_year", "page_count", "genre", "status"]
+
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as target:
+        writer = csv.DictWriter(target, FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def book(isbn, **fields):
+    values = dict(isbn=isbn, title=f"Kitap {isbn}", author="Yazar", publisher="Yayınevi", publication_year=2001,
+                  page_count=150, genre="Roman", status="Mevcut")
+    values.update(fields)
+    return values
+
+
+def test_import_csv_with_rejects(library, engine, tmp_path):
+    source, rejects = tmp_path / "books.csv", tmp_path / "rejects.csv"
+    write_csv(source, [book("1001"), book("1002", status=""), book("1001"), book("123456789"),
+                       book("1003", page_count="çok"), book("1004", title=""), book("1005", status="Kayıp")])
+    result = library.BookImporter(engine, batch_size=2).run(str(source), str(rejects))
+    assert result == library.ImportResult(7, 2, 5)
+    with open(rejects, encoding="utf-8") as lines:
+        assert [row[0] for row in csv.reader(lines)][1:] == ["3", "4", "5", "6", "7"]
+    with engine.connect() as connection:
+        rows = connection.execute(text(
+            "SELECT isbn, status, available_copies, total_copies FROM books WHERE isbn IN ('1001', '1002') "
+            "ORDER BY isbn")).all()
+        assert rows == [("1001", "Mevcut", 1, 1), ("1002", "Mevcut", 1, 1)]
+        assert connection.execute(text("SELECT COUNT(*) FROM copies")).scalar() == 4
+
+
+def test_import_gzipped_jsonl_in_small_transactions(library, engine, tmp_path, service):
+    source = tmp_path / "books.jsonl.gz"
+    with gzip.open(source, "wt", encoding="utf-8") as target:
+        for i in range(25):
+            target.write(json.dumps(book(str(2000 + i), title=f"Işık {i}")) + "\n")
+        target.write("{bozuk\n\n")
+    progress = []
+    importer = library.BookImporter(engine, batch_size=4, transaction_size=8,
+                                    progress=lambda *counts: progress.append(counts))
+    assert importer.run(str(source)) == library.ImportResult(26, 25, 1)
+    assert progress[-1] == (26, 25, 1)
+    with service.Session() as session:
+        assert len(library.search_catalog(session, "isik", fuzzy=False)) == 25
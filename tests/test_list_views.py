@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import text
+
+
+@pytest.fixture
+def model(library, qapp, Session):
+    session = Session()
+    yield lambda name, **options: library.LazyTableModel(session, *library.LIST_VIEWS[name], **options)
+    session.close()
+
+
+def load_all(model):
+    while model.canFetchMore():
+        model.fetchMore()
+    return [model.row_id(row) for row in range(model.rowCount())]
+
+
+def test_pages_cover_every_row_once(model, add_book):
+    book_ids = [1, 2] + [add_book(str(100 + i)) for i in range(7)]
+    books = model("books", batch_size=2)
+    assert load_all(books) == book_ids
+    assert books.exhausted()
+
+
+def test_sorting_with_null_keys_keeps_every_row(library, model, engine, add_book):
+    add_book("200", "Beta")
+    add_book("201", "Alfa")
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE books SET title = NULL, publication_year = NULL WHERE isbn IN ('200', '123456789')"))
+    books = model("books", batch_size=1)
+    for column in (2, 5):
+        for order in (0, 1):
+            books.sort(column, order)
+            rows = load_all(books)
+            assert sorted(rows) == [1, 2, 3, 4]
+            keys = [books.query.key_of(row) for row in books._rows]
+            assert keys == sorted(keys, reverse=bool(order))
+
+
+def test_null_dates_page_in_lending_list(model, engine, service, add_book, add_member, today):
+    member_id = add_member("ali")
+    for i in range(4):
+        service.lend_book(add_book(str(300 + i)), member_id, today, today + timedelta(days=i + 1))
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE lendings SET return_date = NULL WHERE id % 2 = 0"))
+    lendings = model("lendings", batch_size=1)
+    lendings.sort(4)
+    assert len(load_all(lendings)) == 4
+    assert lendings.data(lendings.index(0, 4)) == ""
+
+
+def test_apply_change_updates_and_removes_rows(model, service, add_book, add_member, today):
+    book_id = add_book("400")
+    member_id = add_member("ali")
+    lending_id = service.lend_book(book_id, member_id, today, today + timedelta(days=7))
+    books, lendings = model("books"), model("lendings")
+    load_all(books)
+    load_all(lendings)
+
+    service.edit_book(book_id, "400", "Yeni Ad", "Yazar", "Yayınevi", 2000, 100, "Roman", "Mevcut")
+    books.apply_change(book_id)
+    assert books.data(books.index(books.find_row(book_id), 2)) == "Yeni Ad"
+
+    service.return_lending(lending_id)
+    lendings.apply_change(lending_id)
+    assert lendings.find_row(lending_id) == -1
@@ -0,0 +1,64 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import text
+
+# 1.0 sürümündeki (göç öncesi) şema ve örnek kayıtlar.
+BASELINE_SCHEMA = [
+    """CREATE TABLE books (id INTEGER NOT NULL, isbn VARCHAR, title VARCHAR, author VARCHAR, publisher VARCHAR,
+        publication_year INTEGER, page_count INTEGER, genre VARCHAR, status VARCHAR, PRIMARY KEY (id))""",
+    """CREATE TABLE members (id INTEGER NOT NULL, full_name VARCHAR, membership_type VARCHAR, registration_date DATE,
+        contact_info VARCHAR, PRIMARY KEY (id))""",
+    """CREATE TABLE lendings (id INTEGER NOT NULL, book_id INTEGER, member_id INTEGER, lending_date DATE,
+        return_date DATE, returned INTEGER, PRIMARY KEY (id), FOREIGN KEY(book_id) REFERENCES books (id),
+        FOREIGN KEY(member_id) REFERENCES members (id))""",
+    """INSERT INTO books VALUES (1, '111', 'Işıklı Yol', 'Ömer Şahin', 'İz', 2001, 120, 'Roman', 'Kiralık'),
+        (2, '222', 'Deniz', 'Ayşe Çelik', 'Can', 2010, 300, 'Şiir', 'Mevcut')""",
+    "INSERT INTO members VALUES (1, 'Ali Veli', 'Standart', '2024-01-01', 'ali@example.com')",
+    "INSERT INTO lendings VALUES (1, 1, 1, '2024-01-02', '2024-01-20', 0), (2, 2, 1, '2024-01-02', '2024-01-10', 1)",
+]
+
+
+def create_baseline(database, statements=BASELINE_SCHEMA):
+    connection = sqlite3.connect(database)
+    for statement in statements:
+        connection.execute(statement)
+    connection.commit()
+    connection.close()
+
+
+def test_run_migrations_from_baseline_schema(library, database, database_url):
+    create_baseline(database)
+    engine = library.make_engine(database_url)
+    latest = library.MIGRATIONS[-1][0]
+    assert library.run_migrations(engine) == latest
+    assert library.run_migrations(engine) == latest
+    with engine.connect() as connection:
+        versions = connection.execute(text("SELECT version FROM schema_version ORDER BY version")).scalars().all()
+        assert versions == [version for version, _, _ in library.MIGRATIONS]
+        books = connection.execute(text(
+            "SELECT id, available_copies, total_copies, loan_count FROM books ORDER BY id")).all()
+        assert books == [(1, 0, 1, 1), (2, 1, 1, 1)]
+        assert connection.execute(text("SELECT COUNT(*) FROM all_lendings")).scalar() == 2
+        assert connection.execute(text("SELECT copy_id IS NOT NULL FROM lendings WHERE id = 1")).scalar()
+        # Örnek kayıtlar dolu veritabanına eklenmez.
+        assert connection.execute(text("SELECT COUNT(*) FROM members")).scalar() == 1
+    assert library.check_query_plans(engine) == []
+    engine.dispose()
+
+
+def test_fresh_database_is_seeded(library, engine):
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT isbn FROM books ORDER BY id")).scalars().all() == \
+            [book["isbn"] for book in library.DEFAULT_BOOKS]
+        assert connection.execute(text("SELECT COUNT(*) FROM copies")).scalar() == len(library.DEFAULT_BOOKS)
+
+
+def test_duplicate_isbns_stop_the_migration(library, database, database_url):
+    create_baseline(database, BASELINE_SCHEMA[:3] + [
+        "INSERT INTO books (id, isbn, title) VALUES (1, '111', 'A'), (2, '111', 'B')"])
+    engine = library.make_engine(database_url)
+    with pytest.raises(library.MigrationError, match="111"):
+        library.run_migrations(engine)
+    assert library.schema_version(engine) == 1
+    engine.dispose()
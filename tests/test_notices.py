@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from sqlalchemy import text
+
+
+def notices(engine):
+    with engine.connect() as connection:
+        return connection.execute(text("SELECT lending_id, kind, contact_info, subject FROM notices "
+                                       "ORDER BY lending_id, kind")).all()
+
+
+def insert_lending(engine, book_id, member_id, lent, due, returned=0):
+    with engine.begin() as connection:
+        return connection.execute(text(
+            "INSERT INTO lendings (book_id, member_id, lending_date, return_date, returned) "
+            "VALUES (:book, :member, :lent, :due, :returned)"),
+            dict(book=book_id, member=member_id, lent=lent, due=due, returned=returned)).lastrowid
+
+
+def test_writes_each_notice_once(library, engine, add_book, add_member, today):
+    book_id, member_id = add_book("1100", "Geciken Kitap"), add_member("Bildirim")
+    day = lambda offset: today + timedelta(days=offset)
+    overdue = [insert_lending(engine, book_id, member_id, day(-30), day(-offset)) for offset in (3, 9, 1)]
+    due_soon = insert_lending(engine, book_id, member_id, day(-5), day(2))
+    insert_lending(engine, book_id, member_id, day(-5), day(library.NOTICE_DUE_DAYS + 5))
+    insert_lending(engine, book_id, member_id, day(-30), day(-20), returned=1)
+
+    notifier = library.OverdueNotifier(engine, batch_size=2)
+    assert notifier.run(today) == [library.NoticeResult("Gecikme", 3, 3), library.NoticeResult("Hatırlatma", 1, 1)]
+    rows = notices(engine)
+    assert [(lending_id, kind) for lending_id, kind, _, _ in rows] == \
+        sorted([(lending_id, "Gecikme") for lending_id in overdue] + [(due_soon, "Hatırlatma")])
+    assert all(contact == "Bildirim@example.com" and "Geciken Kitap" in subject for _, _, contact, subject in rows)
+
+    assert notifier.run(today) == [library.NoticeResult("Gecikme", 0, 0), library.NoticeResult("Hatırlatma", 0, 0)]
+    assert len(notices(engine)) == 4
+
+
+def test_backdated_entries_are_found_on_the_next_run(library, engine, add_book, add_member, today):
+    book_id, member_id = add_book("1110"), add_member("Geç Giriş")
+    notifier = library.OverdueNotifier(engine)
+    insert_lending(engine, book_id, member_id, today - timedelta(days=10), today - timedelta(days=1))
+    notifier.run(today)
+    late = insert_lending(engine, book_id, member_id, today - timedelta(days=90), today - timedelta(days=60))
+    assert notifier.run(today)[0] == library.NoticeResult("Gecikme", 1, 1)
+    assert (late, "Gecikme") in [(lending_id, kind) for lending_id, kind, _, _ in notices(engine)]
+
+
+def test_due_reminder_and_overdue_notice_are_separate(library, engine, add_book, add_member, today):
+    book_id, member_id = add_book("1120"), add_member("İki Tür")
+    lending_id = insert_lending(engine, book_id, member_id, today - timedelta(days=5), today + timedelta(days=1))
+    notifier = library.OverdueNotifier(engine)
+    notifier.run(today)
+    notifier.run(today + timedelta(days=3))
+    assert [(row[0], row[1]) for row in notices(engine)] == [(lending_id, "Gecikme"), (lending_id, "Hatırlatma")]
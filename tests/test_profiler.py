@@ -0,0 +1,61 @@
+from sqlalchemy import text
+
+from conftest import wait
+
+
+def raw_connection(engine):
+    with engine.connect() as connection:
+        return type(connection.connection.dbapi_connection)
+
+
+def test_profiled_connection_only_when_requested(library, database_url, engine):
+    assert raw_connection(engine) is not library.ProfiledConnection
+    profiled = library.make_engine(database_url, profiled=True)
+    try:
+        assert raw_connection(profiled) is library.ProfiledConnection
+    finally:
+        profiled.dispose()
+
+
+def test_action_counts_queries_rows_and_n_plus_one(library, database_url, add_book):
+    for number in range(3):
+        add_book(f"90{number}")
+    engine = library.make_engine(database_url, profiled=True)
+    profiler = library.QueryProfiler(engine, n_plus_one_threshold=3)
+    try:
+        with engine.connect() as connection, profiler.action("liste"):
+            connection.execute(text("SELECT id FROM books")).fetchall()
+            with profiler.action("ayrıntı"):
+                for book_id in range(1, 4):
+                    connection.execute(text("SELECT title FROM books WHERE id = :id"), {"id": book_id}).fetchone()
+    finally:
+        engine.dispose()
+    snapshot = profiler.snapshot()
+    assert snapshot["actions"]["ayrıntı"]["queries"] == 3
+    assert snapshot["actions"]["liste"]["queries"] == 4
+    assert snapshot["actions"]["liste"]["rows"] >= 6
+    assert [(finding["action"], finding["max_repeats"]) for finding in snapshot["n_plus_one"]] == [
+        ("ayrıntı", 3), ("liste", 3)]
+    profiler.reset()
+    assert profiler.snapshot()["actions"] == {}
+
+
+def test_latency_histogram_percentiles(library):
+    histogram = library.LatencyHistogram(bounds=(1, 10, 100))
+    for milliseconds in (0.5, 0.5, 5, 50, 500):
+        histogram.add(milliseconds)
+    assert histogram.percentile(0.4) == 1
+    assert histogram.percentile(0.6) == 10
+    assert histogram.percentile(1.0) == 500
+    assert histogram.to_dict()["buckets"] == {"<=1": 2, "<=10": 1, "<=100": 1, ">100": 1}
+
+
+def test_gui_profiles_executor_jobs(library, qapp, window):
+    assert raw_connection(window.Session.kw["bind"]) is library.ProfiledConnection
+    results = []
+    window.executor.submit("deneme", lambda session: session.query(library.Book).all(), results.append,
+                           label="deneme")
+    wait(qapp, window)
+    stats = window.profiler.snapshot()["actions"]["deneme"]
+    assert (stats["calls"], stats["queries"], stats["rows"]) == (1, 1, len(results[0]))
+    assert stats["populate"]["count"] == 1
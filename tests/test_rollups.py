@@ -0,0 +1,71 @@
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+EVER = (date(1990, 1, 1), date(2100, 1, 1))
+
+
+def truth(engine, through):
+    loans = returns = overdues = 0
+    with engine.connect() as connection:
+        rows = connection.execute(text(
+            "SELECT return_date, returned, COALESCE(returned_on, return_date) FROM all_lendings")).all()
+    for due, returned, returned_on in rows:
+        loans += 1
+        returns += bool(returned)
+        overdues += bool(due) and date.fromisoformat(due) < through and \
+            (not returned or returned_on > due)
+    return loans, returns, overdues
+
+
+def insert_lending(engine, book_id, member_id, lent, due):
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO lendings (book_id, member_id, lending_date, return_date, returned) "
+                                "VALUES (:book, :member, :lent, :due, 0)"),
+                           dict(book=book_id, member=member_id, lent=lent, due=due))
+
+
+def test_service_writes_roll_up_immediately(service, engine, add_book, add_member, today):
+    service.refresh_rollups()
+    book_id, member_id = add_book("950", copies=2, genre="Felsefe"), add_member("Özet", "Premium")
+    service.lend_books(member_id, [book_id], today, today + timedelta(days=7))
+    service.lend_books(member_id, [book_id], today - timedelta(days=20), today - timedelta(days=5))
+    service.return_book(book_id, member_id)
+    assert service.circulation_totals(*EVER) == truth(engine, today)
+    felsefe = {row.key: row for row in service.circulation_report("genre", *EVER)}["Felsefe"]
+    assert (felsefe.loans, felsefe.returns) == (2, 2)
+
+
+def test_bulk_inserts_wait_for_the_builder(service, engine, add_book, add_member, today):
+    service.refresh_rollups()
+    book_id, member_id = add_book("960", copies=2), add_member("Toplu")
+    insert_lending(engine, book_id, member_id, date(2020, 1, 1), date(2020, 1, 15))
+    service.lend_books(member_id, [book_id], today, today + timedelta(days=7))
+    assert service.circulation_totals(*EVER) != truth(engine, today)
+    service.refresh_rollups()
+    assert service.circulation_totals(*EVER) == truth(engine, today)
+
+
+def test_rollup_new_lendings_is_idempotent(library, service, Session, add_book, add_member, today):
+    service.refresh_rollups()
+    book_id, member_id = add_book("970"), add_member("Tekrar")
+    lending_ids = service.lend_books(member_id, [book_id], today, today + timedelta(days=7))
+    before = service.circulation_totals(*EVER)
+    with Session.begin() as session:
+        library.rollup_new_lendings(session, lending_ids)
+    assert service.circulation_totals(*EVER) == before
+
+
+def test_overdue_days_close_once_and_match_rebuild(library, service, engine, Session, add_book, add_member,
+                                                   today):
+    service.refresh_rollups()
+    book_id, member_id = add_book("980"), add_member("Gecikme")
+    service.lend_books(member_id, [book_id], today, today + timedelta(days=3))
+    later = today + timedelta(days=10)
+    service.rollups.run(later)
+    service.rollups.run(later)
+    incremental = service.circulation_totals(*EVER)
+    assert incremental == truth(engine, later)
+    library.LendingArchiver(engine, after_days=0).run(later)
+    assert library.RollupBuilder(Session, batch_size=2).rebuild(later) == incremental[0]
+    assert service.circulation_totals(*EVER) == incremental
@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+from conftest import wait
+
+
+def book(book_id, title, author="Yazar", status="Mevcut"):
+    return SimpleNamespace(id=book_id, title=title, author=author, publisher="", genre="", status=status)
+
+
+def test_cache_hits_misses_and_lru(library):
+    cache = library.SearchCache(capacity=2)
+    first, second, third = (cache.key(term, "Tüm Kitaplar", 50) for term in ("ada", "bora", "cem"))
+    assert cache.get(first) is None
+    cache.put(first, [book(1, "Ada")], cache.version)
+    cache.put(second, [book(2, "Bora")], cache.version)
+    assert [b.id for b in cache.get(first)] == [1]
+    cache.put(third, [book(3, "Cem")], cache.version)
+    assert cache.get(second) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert cache.key("  ADA ", "Tüm Kitaplar", 50) == first
+
+
+def test_cache_ttl_and_stale_writes(library, monkeypatch):
+    cache = library.SearchCache(ttl=10)
+    key = cache.key("ada", "Tüm Kitaplar", 50)
+    clock = [100.0]
+    monkeypatch.setattr(library.time, "monotonic", lambda: clock[0])
+    version = cache.version
+    cache.invalidate([9], [])
+    cache.put(key, [book(1, "Ada")], version)
+    assert key not in cache.entries
+    cache.put(key, [book(1, "Ada")], cache.version)
+    clock[0] += 11
+    assert cache.get(key) is None and key not in cache.entries
+
+
+def test_invalidate_drops_only_affected_entries(library):
+    cache = library.SearchCache()
+    ada, bora = cache.key("ada", "Tüm Kitaplar", 50), cache.key("bora", "Mevcut", 50)
+    cache.put(ada, [book(1, "Ada")], cache.version)
+    cache.put(bora, [book(2, "Bora")], cache.version)
+    cache.invalidate([3], [book(3, "Ada Masalları")])
+    assert list(cache.entries) == [bora]
+    cache.invalidate([3], [book(3, "Bora", status="Kiralık")])
+    assert list(cache.entries) == [bora]
+    cache.invalidate([2], [book(2, "Başka")])
+    assert not cache.entries
+
+
+def test_typing_and_filter_changes_keep_debounce_interval(library, window):
+    window.ensure_tab(window.init_search_tab)
+    window.search_input.setText("kitap")
+    assert window.search_timer.isActive()
+    assert window.search_timer.interval() == library.SEARCH_DEBOUNCE_MS
+    window.search_timer.stop()
+    window.filter_by_status.setCurrentIndex(2)
+    assert window.search_timer.isActive()
+    assert window.search_timer.interval() == library.SEARCH_DEBOUNCE_MS
+
+
+def test_live_search_uses_cache(qapp, window, add_book):
+    add_book("555", "Deniz Kitabı")
+    window.ensure_tab(window.init_search_tab)
+    window.search_input.setText("deniz")
+    window.search_timer.stop()
+    window.live_search()
+    wait(qapp, window)
+    assert window.search_results.count() == 1
+    assert window.search_summary.text() == "1 sonuç"
+    window.live_search()
+    assert window.search_summary.text() == "1 sonuç (önbellekten)"
@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+import pytest
+from PyQt5.QtCore import Qt
+
+
+@pytest.fixture
+def catalog(service, add_book, add_member, today):
+    books = [add_book(f"12{number:02d}", genre="Roman" if number % 2 else "Şiir") for number in range(12)]
+    member_id = add_member("Kopya")
+    service.lend_books(member_id, books[:3], today - timedelta(days=20), today - timedelta(days=2))
+    service.lend_books(member_id, books[3:5], today, today + timedelta(days=7))
+    return books, member_id
+
+
+def sql_ids(Session, library, status):
+    with Session() as session:
+        query = session.query(library.Book.id).order_by(library.Book.id)
+        if status != "Tüm Kitaplar":
+            query = query.filter(library.availability_criterion(status))
+        return [book_id for book_id, in query]
+
+
+@pytest.mark.parametrize("status", ["Tüm Kitaplar", "Mevcut", "Kiralık"])
+def test_filter_matches_sql(library, service, Session, catalog, status):
+    assert [book.id for book in service.filter_books(status)] == sql_ids(Session, library, status)
+
+
+def test_writes_are_applied_incrementally(library, service, Session, catalog, add_book):
+    books, member_id = catalog
+    service.filter_books()
+    service.return_book(books[0], member_id)
+    new_book = add_book("1299")
+    service.delete_book(books[-1])
+    for status in ("Tüm Kitaplar", "Mevcut", "Kiralık"):
+        assert [book.id for book in service.filter_books(status)] == sql_ids(Session, library, status)
+    assert new_book in [book.id for book in service.filter_books("Mevcut")]
+
+
+def loan_totals(service):
+    rows = service.catalog_breakdown("genre")
+    return sum(row.open_loans for row in rows), sum(row.overdue for row in rows), sum(row.books for row in rows)
+
+
+def test_breakdown_counts_open_and_overdue_loans(service, catalog):
+    books, member_id = catalog
+    assert loan_totals(service) == (5, 3, len(service.filter_books()))
+    service.return_book(books[0], member_id)
+    service.return_book(books[3], member_id)
+    assert loan_totals(service) == (3, 2, len(service.filter_books()))
+
+
+def test_book_results_page_snapshot_ids(library, service, Session, catalog, qapp):
+    expected = sql_ids(Session, library, "Mevcut")
+    with Session() as session:
+        results = service.book_results("", "Mevcut", session)
+        assert isinstance(results.query, library.IdListQuery) and results.total == len(expected)
+        model = library.LazyTableModel(session, results.query.columns, results.headers, batch_size=3,
+                                       query=results.query)
+        while model.canFetchMore():
+            model.fetchMore()
+        assert [model.row_id(row) for row in range(model.rowCount())] == expected
+        model.sort(1, Qt.DescendingOrder)
+        while model.canFetchMore():
+            model.fetchMore()
+        assert sorted(model.row_id(row) for row in range(model.rowCount())) == expected
+        model.sort(-1, Qt.DescendingOrder)
+        while model.canFetchMore():
+            model.fetchMore()
+        assert [model.row_id(row) for row in range(model.rowCount())] == expected[::-1]
+
+
+def test_book_results_skip_rows_that_no_longer_match(library, service, Session, catalog, today):
+    books, member_id = catalog
+    with Session() as session:
+        results = service.book_results("", "Mevcut", session)
+        service.lend_books(member_id, books[5:9], today, today + timedelta(days=7))
+        rows = results.query.page(session, limit=3)
+        assert len(rows) == 3 and not {row[0] for row in rows} & set(books[5:9])
+
+
+def test_filter_dialog_shows_snapshot_total(library, service, Session, catalog, qapp):
+    with Session() as session:
+        dialog = library.BookFilterDialog(session, service.book_results("", "Kiralık", session))
+        assert dialog.summary.text() == "5 sonuç"
+        dialog.close()
+
+
+def test_http_listing_without_term_uses_snapshot(library, service, catalog, monkeypatch):
+    server = library.LibraryHTTPServer(service, workers=1)
+    monkeypatch.setattr(service, "search_books", None)
+    status, books = server.dispatch("GET", "/books?status=Kiral%C4%B1k&limit=2", b"")
+    server.pool.shutdown()
+    assert status == 200 and [book["id"] for book in books] == catalog[0][:2]